@@ -0,0 +1,147 @@
+# generate.py — génération de notebooks synthétiques pour les benchmarks
+# - Forme configurable : nombre de notes, profondeur et largeur des dossiers
+# - Tailles de notes selon une loi log-normale (médiane + dispersion)
+# - Contenu Markdown mêlant ASCII, accents, CJK et emoji (déterministe par graine)
+
+import os, math, random, argparse, json
+
+ASCII_WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt labore dolore magna aliqua enim minim veniam quis nostrud exercitation "
+    "ullamco laboris nisi aliquip commodo consequat duis aute irure reprehenderit "
+    "voluptate velit esse cillum fugiat nulla pariatur excepteur sint occaecat "
+    "cupidatat proident sunt culpa officia deserunt mollit anim laborum anki card "
+    "review interval lecture notes chapter summary definition theorem proof example"
+).split()
+
+UNICODE_WORDS = (
+    "été café déjà naïve cœur français révision mémoire répétition élève "
+    "Straße Übung größer Ärger ñandú año "
+    "日本語 学習 記憶 復習 漢字 中文 笔记 单词 한국어 공부 "
+    "Москва память повторение καρδιά μνήμη "
+    "🧠 📝 ✨ 🇫🇷 👍🏽"
+).split()
+
+
+def _words(rng, count, unicode_ratio):
+    ascii_count = sum(1 for _ in range(count) if rng.random() >= unicode_ratio)
+    words = rng.choices(ASCII_WORDS, k=ascii_count) + rng.choices(UNICODE_WORDS, k=count - ascii_count)
+    rng.shuffle(words)
+    return words
+
+
+def make_note(rng, target_chars, unicode_ratio=0.1, title="Note"):
+    """Note Markdown d'environ `target_chars` caractères (titres, listes, code, paragraphes)."""
+    parts = [f"# {title}\n"]
+    size = len(parts[0])
+    section = 0
+    while size < target_chars:
+        kind = rng.random()
+        if kind < 0.08:
+            section += 1
+            block = f"## Section {section} {' '.join(_words(rng, 3, unicode_ratio))}\n"
+        elif kind < 0.25:
+            block = "\n".join(f"- {' '.join(_words(rng, rng.randint(3, 10), unicode_ratio))}"
+                              for _ in range(rng.randint(2, 6))) + "\n"
+        elif kind < 0.30:
+            block = "```python\n" + "\n".join(
+                f"x_{i} = {rng.randint(0, 999)}  # {' '.join(_words(rng, 3, 0))}"
+                for i in range(rng.randint(2, 8))) + "\n```\n"
+        else:
+            block = " ".join(_words(rng, rng.randint(20, 80), unicode_ratio)).capitalize() + ".\n"
+        parts.append(block)
+        size += len(block) + 1
+    return "\n".join(parts)
+
+
+def make_folders(root, depth, fanout):
+    """Crée l'arbre complet de dossiers et renvoie leurs chemins (racine comprise)."""
+    folders = [root]
+    level = [root]
+    for d in range(depth):
+        next_level = []
+        for parent in level:
+            for i in range(fanout):
+                path = os.path.join(parent, f"dossier_{d}_{i}")
+                os.makedirs(path, exist_ok=True)
+                next_level.append(path)
+        folders.extend(next_level)
+        level = next_level
+    return folders
+
+
+def generate_notebook(root, notes=1000, depth=3, fanout=4, size_median=2000, size_sigma=1.0,
+                      max_size=200000, unicode_ratio=0.1, large_note_mb=0.0, seed=0):
+    """Remplit `root` avec un notebook synthétique et renvoie ses statistiques.
+
+    Les notes sont réparties uniformément entre tous les dossiers. Avec
+    `large_note_mb`, une note supplémentaire de cette taille est créée à la racine.
+    """
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    folders = make_folders(root, depth, fanout)
+    mu = math.log(max(1, size_median))
+    total_bytes = 0
+    sizes = []
+    for n in range(notes):
+        folder = rng.choice(folders)
+        target = min(max_size, int(rng.lognormvariate(mu, size_sigma)))
+        title = f"note {n} {' '.join(_words(rng, 2, unicode_ratio))}"
+        content = make_note(rng, target, unicode_ratio, title)
+        path = os.path.join(folder, f"note_{n:06d}.md")
+        data = content.encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(data)
+        sizes.append(len(data))
+        total_bytes += len(data)
+
+    large_note = None
+    if large_note_mb > 0:
+        large_note = os.path.join(root, "large_note.md")
+        content = make_note(rng, int(large_note_mb * 1024 * 1024), unicode_ratio, "Large note")
+        with open(large_note, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    sizes.sort()
+    return {
+        "root": root,
+        "notes": notes,
+        "folders": len(folders),
+        "depth": depth,
+        "fanout": fanout,
+        "total_bytes": total_bytes,
+        "median_note_bytes": sizes[len(sizes) // 2] if sizes else 0,
+        "max_note_bytes": sizes[-1] if sizes else 0,
+        "unicode_ratio": unicode_ratio,
+        "large_note": large_note,
+        "seed": seed,
+    }
+
+
+def add_shape_arguments(parser):
+    """Options de forme du notebook (partagées avec run.py)."""
+    parser.add_argument("--notes", type=int, default=1000, help="nombre de notes")
+    parser.add_argument("--depth", type=int, default=3, help="profondeur des dossiers")
+    parser.add_argument("--fanout", type=int, default=4, help="sous-dossiers par dossier")
+    parser.add_argument("--size-median", type=int, default=2000, help="taille médiane d'une note (caractères)")
+    parser.add_argument("--size-sigma", type=float, default=1.0, help="dispersion log-normale des tailles")
+    parser.add_argument("--max-size", type=int, default=200000, help="taille maximale d'une note")
+    parser.add_argument("--unicode-ratio", type=float, default=0.1, help="part de mots non ASCII")
+    parser.add_argument("--large-note-mb", type=float, default=5.0, help="taille de la grande note (0 : aucune)")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def shape_kwargs(args):
+    return {
+        "notes": args.notes, "depth": args.depth, "fanout": args.fanout,
+        "size_median": args.size_median, "size_sigma": args.size_sigma, "max_size": args.max_size,
+        "unicode_ratio": args.unicode_ratio, "large_note_mb": args.large_note_mb, "seed": args.seed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génère un notebook synthétique.")
+    parser.add_argument("root", help="dossier de destination")
+    add_shape_arguments(parser)
+    args = parser.parse_args()
+    print(json.dumps(generate_notebook(args.root, **shape_kwargs(args)), indent=2, ensure_ascii=False))
@@ -0,0 +1,90 @@
+# import_time.py — coût d'import de l'add-on au démarrage d'Anki
+# Chaque mesure est faite dans un processus Python neuf. Les modules Qt qu'Anki
+# charge de toute façon (QtCore, QtGui, QtWidgets) sont importés avant le chrono.
+#
+#   python benchmarks/import_time.py --repeat 15 --out import-time.json
+#
+# Scénarios :
+#   eager : ce que main.py importait avant (ui_main et toute l'interface + lecture de la langue)
+#   lazy  : ce que main.py importe désormais (lang, sans lecture disque)
+#   main  : main.py réel (seulement si aqt est importable, c.-à-d. dans l'environnement d'Anki)
+#   first_open : coût reporté à la première ouverture (ui_main), pour information
+
+import os, sys, json, argparse, statistics, subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.join(os.path.dirname(HERE), "code of the add-on")
+
+PROBE = r"""
+import sys, time, types, json, importlib
+for name in ("PyQt6.QtCore", "PyQt6.QtGui", "PyQt6.QtWidgets"):
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        pass
+before = set(sys.modules)
+start = time.perf_counter()
+pkg = types.ModuleType("ankinote")
+pkg.__path__ = [{addon_dir!r}]
+sys.modules["ankinote"] = pkg
+scenario = {scenario!r}
+if scenario == "eager":
+    importlib.import_module("ankinote.ui_main")
+    importlib.import_module("ankinote.lang").load_language()
+elif scenario == "lazy":
+    importlib.import_module("ankinote.lang")
+elif scenario == "main":
+    importlib.import_module("ankinote.main")
+elif scenario == "first_open":
+    importlib.import_module("ankinote.ui_main")
+elapsed = time.perf_counter() - start
+loaded = sorted(set(sys.modules) - before)
+print(json.dumps({{"ms": elapsed * 1000, "modules": len(loaded),
+                  "addon_modules": [m for m in loaded if m.startswith("ankinote.")]}}))
+"""
+
+
+def measure(scenario, repeat):
+    samples, info = [], None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-c", PROBE.format(addon_dir=ADDON_DIR, scenario=scenario)],
+            capture_output=True, text=True, env=dict(os.environ, QT_QPA_PLATFORM="offscreen"),
+        )
+        if proc.returncode != 0:
+            error = (proc.stderr.strip().splitlines() or ["?"])[-1]
+            return {"skipped": error}
+        info = json.loads(proc.stdout.strip().splitlines()[-1])
+        samples.append(info["ms"])
+    return {
+        "unit": "ms",
+        "samples": len(samples),
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "modules": info["modules"],
+        "addon_modules": info["addon_modules"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Coût d'import de l'add-on (avant / après import paresseux).")
+    parser.add_argument("--repeat", type=int, default=10, help="processus par scénario")
+    parser.add_argument("--out", help="fichier JSON de sortie")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for scenario in ("eager", "lazy", "main", "first_open"):
+        results[scenario] = r = measure(scenario, args.repeat)
+        if "skipped" in r:
+            print(f"{scenario:11} ignoré : {r['skipped']}")
+        else:
+            print(f"{scenario:11} médiane {r['median']:8.2f} ms   {r['modules']:4d} modules "
+                  f"({len(r['addon_modules'])} de l'add-on)")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,627 @@
+# run.py — benchmarks headless du Notebook (QT_QPA_PLATFORM=offscreen)
+# - Génère un notebook synthétique, chronomètre les vrais chemins de code de l'add-on
+# - Écrit les résultats en JSON et les compare éventuellement à une référence
+#
+# Exemples :
+#   python benchmarks/run.py --notes 5000 --out results.json
+#   python benchmarks/run.py --baseline baseline.json --fail-on-regression
+#   python benchmarks/run.py --only storage,index
+
+import os, sys, json, time, types, shutil, random, tempfile, platform, argparse, statistics, importlib
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.join(os.path.dirname(HERE), "code of the add-on")
+sys.path.insert(0, HERE)
+
+from generate import generate_notebook, add_shape_arguments, shape_kwargs  # noqa: E402
+
+RESULTS_SCHEMA = 1
+QUERIES = ["lorem", "anki card", "mémoire", "記憶", "interval review", "exercitation ullamco", "zzzz"]
+STRUCTURED_QUERIES = ['"anki card"', "lorem -zzzz", "mémoire OR 記憶", "/interval\\s+rev/", "lorem in:d0_1", "case:on Lorem"]
+QUICK_OPEN_QUERIES = ["note_0001", "d0_1", "dossier note", "n42", "large"]
+
+
+# ----------------------------- Chargement de l'add-on -----------------------------
+
+def load_addon():
+    """Importe les modules de l'add-on comme paquet « ankinote » sans exécuter __init__ (aqt)."""
+    if "ankinote" not in sys.modules:
+        pkg = types.ModuleType("ankinote")
+        pkg.__path__ = [ADDON_DIR]
+        sys.modules["ankinote"] = pkg
+    return lambda name: importlib.import_module("ankinote." + name)
+
+
+class Skip(Exception):
+    """Benchmark impossible dans cet environnement (dépendance absente...)."""
+
+
+# ----------------------------- Mesure -----------------------------
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "unit": "ms",
+        "samples": len(samples),
+        "min": samples[0],
+        "median": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))],
+        "mean": statistics.fmean(samples),
+        "max": samples[-1],
+    }
+
+
+class Context:
+    """État partagé entre les benchmarks : notebook généré, modules, application Qt."""
+
+    def __init__(self, args, stats):
+        self.args = args
+        self.stats = stats
+        self.root = stats["root"]
+        self.module = load_addon()
+        self.rng = random.Random(args.seed)
+        self._app = None
+        self.notes = sorted(
+            os.path.join(d, f) for d, _, files in os.walk(self.root) for f in files
+            if f.endswith(".md") and f != "large_note.md"
+        )
+
+    def sample_notes(self, count):
+        return self.rng.sample(self.notes, min(count, len(self.notes)))
+
+    def median_note(self):
+        return sorted(self.notes, key=os.path.getsize)[len(self.notes) // 2]
+
+    def app(self):
+        """QApplication offscreen (créée au premier benchmark qui en a besoin)."""
+        if self._app is None:
+            try:
+                from PyQt6.QtWidgets import QApplication
+            except ImportError as e:
+                raise Skip(f"PyQt6 indisponible : {e}")
+            self._app = QApplication.instance() or QApplication([])
+        return self._app
+
+    def wait_until(self, predicate, timeout=60.0):
+        """Fait tourner la boucle d'événements jusqu'à ce que `predicate()` soit vrai."""
+        app = self.app()
+        deadline = time.perf_counter() + timeout
+        while not predicate():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("délai dépassé")
+            app.processEvents()
+            time.sleep(0.0005)
+
+    def repeat(self, fn, repeat=None, setup=None):
+        """Exécute `fn` plusieurs fois (après `setup` non chronométré) ; durées en ms."""
+        samples = []
+        for i in range(repeat or self.args.repeat):
+            arg = setup(i) if setup else None
+            start = time.perf_counter()
+            fn(arg) if setup else fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return samples
+
+
+BENCHMARKS = []
+
+
+def benchmark(name, group):
+    def register(fn):
+        BENCHMARKS.append((name, group, fn))
+        return fn
+    return register
+
+
+# ----------------------------- storage.py -----------------------------
+
+@benchmark("storage.load_markdown", "storage")
+def bench_load_markdown(ctx):
+    storage = ctx.module("storage")
+    paths = ctx.sample_notes(ctx.args.repeat)
+    return ctx.repeat(lambda p: storage.load_markdown(p), len(paths), setup=lambda i: paths[i])
+
+
+@benchmark("storage.save_markdown", "storage")
+def bench_save_markdown(ctx):
+    storage = ctx.module("storage")
+    path = ctx.median_note()
+    content = storage.load_markdown(path)
+    return ctx.repeat(lambda c: storage.save_markdown(path, c), setup=lambda i: content + str(i))
+
+
+@benchmark("storage.save_markdown_async+flush", "storage")
+def bench_save_async(ctx):
+    storage = ctx.module("storage")
+    path = ctx.median_note()
+    content = storage.load_markdown(path)
+
+    def run(c):
+        storage.save_markdown_async(path, c)
+        storage.flush_saves()
+    return ctx.repeat(run, setup=lambda i: content + str(i))
+
+
+@benchmark("storage.iter_markdown_chunks.large", "storage")
+def bench_iter_chunks(ctx):
+    storage = ctx.module("storage")
+    large = ctx.stats.get("large_note")
+    if not large:
+        raise Skip("pas de grande note (--large-note-mb 0)")
+    return ctx.repeat(lambda: sum(len(c) for c in storage.iter_markdown_chunks(large)))
+
+
+@benchmark("storage.create_rename_delete", "storage")
+def bench_create_rename_delete(ctx):
+    storage = ctx.module("storage")
+    folder = os.path.join(ctx.root, "_bench_tmp")
+    storage.create_folder_at(folder)
+
+    def run(i):
+        a = os.path.join(folder, f"a_{i}.md")
+        b = os.path.join(folder, f"b_{i}.md")
+        storage.create_note_at(a)
+        storage.rename_path(a, b)
+        storage.delete_path(b)
+    samples = ctx.repeat(run, setup=lambda i: i)
+    storage.delete_path(folder)
+    return samples
+
+
+# ----------------------------- Index de recherche -----------------------------
+
+@benchmark("index.cold_build", "index")
+def bench_index_cold(ctx):
+    search_index = ctx.module("search_index")
+
+    def setup(i):
+        index = search_index.NotebookIndex(ctx.root)
+        try:
+            os.remove(index.index_file)
+        except OSError:
+            pass
+        return index
+
+    def run(index):
+        index.load()
+        index.refresh()
+        index.save()
+    return ctx.repeat(run, repeat=max(1, ctx.args.repeat // 5), setup=setup)
+
+
+@benchmark("index.warm_load", "index")
+def bench_index_warm(ctx):
+    search_index = ctx.module("search_index")
+
+    def run(index):
+        index.load()
+        index.refresh()
+    return ctx.repeat(run, repeat=max(1, ctx.args.repeat // 5),
+                      setup=lambda i: search_index.NotebookIndex(ctx.root))
+
+
+@benchmark("index.search", "index")
+def bench_index_search(ctx):
+    index = ctx.module("search_index").get_index(ctx.root)
+    return ctx.repeat(lambda q: index.search(q), len(QUERIES) * 3, setup=lambda i: QUERIES[i % len(QUERIES)])
+
+
+@benchmark("index.search.structured", "index")
+def bench_index_search_structured(ctx):
+    """Requêtes structurées : candidats tirés de l'index puis notes lues par morceaux."""
+    index = ctx.module("search_index").get_index(ctx.root)
+    return ctx.repeat(lambda q: index.search(q), len(STRUCTURED_QUERIES) * 2,
+                      setup=lambda i: STRUCTURED_QUERIES[i % len(STRUCTURED_QUERIES)])
+
+
+@benchmark("index.search.sharded", "index")
+def bench_index_search_sharded(ctx):
+    """Plusieurs racines (copies des dossiers de premier niveau) interrogées en parallèle."""
+    search_index = ctx.module("search_index")
+    base = tempfile.mkdtemp(prefix="ankinote-bench-roots-")
+    roots = []
+    for name in sorted(os.listdir(ctx.root)):
+        if os.path.isdir(os.path.join(ctx.root, name)) and not name.startswith("."):
+            roots.append(shutil.copytree(os.path.join(ctx.root, name), os.path.join(base, name)))
+    if len(roots) < 2:
+        shutil.rmtree(base, ignore_errors=True)
+        raise Skip("moins de deux dossiers de premier niveau")
+    for root in roots:
+        search_index.get_index(root)  # index déjà chargés : on mesure la requête répartie
+
+    def run(query):
+        for _ in search_index.iter_search_shards(roots, query):
+            pass
+    try:
+        return ctx.repeat(run, len(QUERIES) * 3, setup=lambda i: QUERIES[i % len(QUERIES)])
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+@benchmark("index.update_file", "index")
+def bench_index_update(ctx):
+    search_index = ctx.module("search_index")
+    storage = ctx.module("storage")
+    index = search_index.get_index(ctx.root)
+    path = ctx.median_note()
+    content = storage.load_markdown(path)
+    return ctx.repeat(lambda c: index.update_file(path, c), setup=lambda i: content + f" bench{i}")
+
+
+# ----------------------------- Ouverture rapide / aperçu -----------------------------
+
+@benchmark("quick_open.build", "quick_open")
+def bench_quick_open_build(ctx):
+    try:
+        quick_open = ctx.module("quick_open")
+    except ImportError as e:
+        raise Skip(f"PyQt6 indisponible : {e}")
+    return ctx.repeat(lambda index: index.build(), max(1, ctx.args.repeat // 5),
+                      setup=lambda i: quick_open.PathIndex(ctx.root))
+
+
+@benchmark("quick_open.query", "quick_open")
+def bench_quick_open_query(ctx):
+    try:
+        quick_open = ctx.module("quick_open")
+    except ImportError as e:
+        raise Skip(f"PyQt6 indisponible : {e}")
+    index = quick_open.get_path_index(ctx.root)
+    queries = QUICK_OPEN_QUERIES
+    return ctx.repeat(lambda q: index.query(q), len(queries) * 4, setup=lambda i: queries[i % len(queries)])
+
+
+@benchmark("preview.edit_one_block.large", "preview")
+def bench_preview_edit(ctx):
+    try:
+        preview = ctx.module("preview")
+    except ImportError as e:
+        raise Skip(f"PyQt6 indisponible : {e}")
+    large = ctx.stats.get("large_note")
+    if not large:
+        raise Skip("pas de grande note (--large-note-mb 0)")
+    storage = ctx.module("storage")
+    text = "".join(storage.iter_markdown_chunks(large))
+    renderer = preview.BlockRenderer()
+    keys = [renderer.key(b) for b in preview.split_blocks(text)]
+    middle = len(text) // 2
+
+    def run(edited):
+        blocks = preview.split_blocks(edited)
+        new_keys = [renderer.key(b) for b in blocks]
+        start, _, end = preview.diff_blocks(keys, new_keys)
+        for i in range(start, end):
+            renderer.render(blocks[i], new_keys[i])
+    return ctx.repeat(run, setup=lambda i: text[:middle] + f"x{i}" + text[middle:])
+
+
+# ----------------------------- Cartes Anki -----------------------------
+
+CARD_NOTES = 1000
+CARD_BLOCKS_PER_NOTE = 4
+
+
+def _cards_notebook(ctx):
+    """Notebook temporaire : CARD_NOTES notes de CARD_BLOCKS_PER_NOTE blocs (Q/R + un texte à trous)."""
+    root = tempfile.mkdtemp(prefix="ankinote-bench-cards-")
+    for i in range(CARD_NOTES):
+        folder = os.path.join(root, f"d{i % 10}")
+        os.makedirs(folder, exist_ok=True)
+        blocks = [f"Q: question {i}.{k} ?\nA: réponse **{k}**" for k in range(CARD_BLOCKS_PER_NOTE - 1)]
+        blocks.append(f"Le {{{{c1::mot {i}}}}} est à trous.")
+        with open(os.path.join(folder, f"n{i}.md"), "w", encoding="utf-8") as f:
+            f.write(f"# Note {i}\n\n" + "\n\n".join(blocks) + "\n")
+    ctx.module("storage").open_notebook(root)
+    return root
+
+
+def _temp_collection():
+    try:
+        from anki.collection import Collection
+    except ImportError as e:
+        raise Skip(f"paquet anki indisponible : {e}")
+    return Collection(os.path.join(tempfile.mkdtemp(prefix="ankinote-bench-col-"), "collection.anki2"))
+
+
+@benchmark("cards.plan_sync.cold", "cards")
+def bench_cards_plan_cold(ctx):
+    """Première synchro : lecture de toutes les notes et ajout des marqueurs."""
+    cards = ctx.module("cards")
+    roots = []
+
+    def setup(i):
+        roots.append(_cards_notebook(ctx))
+        return roots[-1]
+    samples = ctx.repeat(lambda root: cards.plan_sync(root), max(1, ctx.args.repeat // 10), setup=setup)
+    for root in roots:
+        shutil.rmtree(root, ignore_errors=True)
+    return samples
+
+
+@benchmark("cards.sync.temp_collection", "cards")
+def bench_cards_sync(ctx):
+    """Synchro complète (plan + ajout groupé) vers une collection temporaire, puis re-synchro d'une note."""
+    cards = ctx.module("cards")
+    col = _temp_collection()
+    root = _cards_notebook(ctx)
+    try:
+        start = time.perf_counter()
+        plan = cards.plan_sync(root)
+        cards.apply_plan(col, plan)
+        first = (time.perf_counter() - start) * 1000
+        if col.note_count() != CARD_NOTES * CARD_BLOCKS_PER_NOTE:
+            raise AssertionError(f"{col.note_count()} notes dans la collection")
+        note = os.path.join(root, "d0", "n0.md")
+
+        def edit(i):
+            with open(note, "a", encoding="utf-8") as f:
+                f.write(f"\nQ: ajout {i}\nA: {i}\n")
+
+        def run(_):
+            cards.apply_plan(col, cards.plan_sync(root))
+        return [first] + ctx.repeat(run, setup=edit)
+    finally:
+        col.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+# ----------------------------- Interface (Qt offscreen) -----------------------------
+
+def _ui_main(ctx):
+    ctx.app()
+    try:
+        ui_main = ctx.module("ui_main")
+    except ImportError as e:
+        raise Skip(f"dépendance indisponible : {e}")
+    # Ne jamais toucher à la configuration de l'utilisateur
+    config = os.path.join(tempfile.mkdtemp(prefix="ankinote-bench-config-"), "config.json")
+    with open(config, "w", encoding="utf-8") as f:
+        json.dump({"notebook_path": ctx.root}, f)
+    ctx.module("config").CONFIG_PATH = config
+    ui_main.SEARCH_DEBOUNCE_MS = 0
+    return ui_main
+
+
+@benchmark("ui.NotebookMain.init", "ui")
+def bench_main_init(ctx):
+    ui_main = _ui_main(ctx)
+    widgets = []
+
+    def run():
+        widgets.append(ui_main.NotebookMain())
+    samples = ctx.repeat(run, max(1, ctx.args.repeat // 5))
+    for w in widgets:
+        w.flush()
+        w.deleteLater()
+    return samples
+
+
+def _expand_two_levels(main):
+    model = main.tree_model
+    for row in range(model.rowCount()):
+        index = model.index(row, 0)
+        if model.is_dir(index):
+            main.tree.expand(index)
+            model.fetchMore(index)
+            for sub in range(model.rowCount(index)):
+                child = model.index(sub, 0, index)
+                if model.is_dir(child):
+                    main.tree.expand(child)
+
+
+@benchmark("ui.NotebookMain.init.snapshot", "ui")
+def bench_main_init_snapshot(ctx):
+    """Ouverture depuis l'instantané de session (deux niveaux dépliés, une note ouverte)."""
+    ui_main = _ui_main(ctx)
+    main = ui_main.NotebookMain()
+    _expand_two_levels(main)
+    main.editor.load_file(ctx.median_note())
+    main.flush()
+    main.deleteLater()
+    widgets = []
+
+    def run():
+        widgets.append(ui_main.NotebookMain())
+    samples = ctx.repeat(run, max(1, ctx.args.repeat // 5))
+    for w in widgets:
+        w.deleteLater()
+    return samples
+
+
+@benchmark("ui.NotebookMain.refresh_tree", "ui")
+def bench_refresh_tree(ctx):
+    ui_main = _ui_main(ctx)
+    main = ui_main.NotebookMain()
+    # Deux niveaux dépliés : refresh_tree relit exactement ces dossiers
+    _expand_two_levels(main)
+    samples = ctx.repeat(main.refresh_tree)
+    main.flush()
+    main.deleteLater()
+    return samples
+
+
+@benchmark("ui.SearchDialog.on_search_changed", "ui")
+def bench_search_dialog(ctx):
+    ui_main = _ui_main(ctx)
+    ctx.module("search_index").get_index(ctx.root)  # index déjà chargé : on mesure la requête
+    dialog = ui_main.SearchDialog(None, ctx.root, lambda *args: None)
+    done = []
+    dialog._signals.finished.connect(done.append)
+
+    def run(query):
+        done.clear()
+        dialog.input.setText(query)  # -> on_search_changed
+        ctx.wait_until(lambda: done and done[-1] == dialog._query_id)
+    samples = ctx.repeat(run, len(QUERIES) * 3, setup=lambda i: QUERIES[i % len(QUERIES)])
+    dialog.done(0)
+    return samples
+
+
+def _editor(ctx):
+    _ui_main(ctx)
+    return ctx.module("editor_widget").NotebookEditor()
+
+
+@benchmark("ui.NotebookEditor.load_file", "ui")
+def bench_editor_load(ctx):
+    editor = _editor(ctx)
+    paths = ctx.sample_notes(ctx.args.repeat)
+    return ctx.repeat(editor.load_file, len(paths), setup=lambda i: paths[i])
+
+
+@benchmark("ui.NotebookEditor.switch_tab", "ui")
+def bench_editor_switch_tab(ctx):
+    """Retour sur un onglet déjà ouvert (document en cache, sans relecture)."""
+    editor = _editor(ctx)
+    paths = ctx.sample_notes(min(8, ctx.args.repeat))
+    for path in paths:
+        editor.load_file(path)
+    return ctx.repeat(editor.load_file, ctx.args.repeat, setup=lambda i: paths[i % len(paths)])
+
+
+@benchmark("ui.NotebookEditor.load_file.large", "ui")
+def bench_editor_load_large(ctx):
+    large = ctx.stats.get("large_note")
+    if not large:
+        raise Skip("pas de grande note (--large-note-mb 0)")
+    editor = _editor(ctx)
+
+    def run():
+        editor.load_file(large)
+        ctx.wait_until(lambda: not editor.is_loading())
+        editor.detach()
+    return ctx.repeat(run, max(1, ctx.args.repeat // 5))
+
+
+@benchmark("ui.NotebookEditor.save_file", "ui")
+def bench_editor_save(ctx):
+    editor = _editor(ctx)
+    editor.load_file(ctx.median_note())
+    storage = ctx.module("storage")
+
+    def edit(i):
+        editor.text_edit.appendPlainText(f"bench {i}")
+
+    def run(_):
+        editor.save_file()
+        storage.flush_saves()
+    return ctx.repeat(run, setup=edit)
+
+
+@benchmark("ui.NotebookEditor.keystroke.large", "ui")
+def bench_editor_keystroke_large(ctx):
+    """Frappe dans une grande note : la modification va au journal, la note n'est pas réécrite."""
+    large = ctx.stats.get("large_note")
+    if not large:
+        raise Skip("pas de grande note (--large-note-mb 0)")
+    editor = _editor(ctx)
+    editor.load_file(large)
+    ctx.wait_until(lambda: not editor.is_loading())
+    samples = ctx.repeat(lambda: editor.text_edit.insertPlainText("x"))
+    editor.detach(save=True)
+    ctx.module("storage").flush_saves()
+    return samples
+
+
+# ----------------------------- Comparaison / sortie -----------------------------
+
+def compare(results, baseline, tolerance, noise_ms):
+    """Compare les médianes à la référence ; renvoie la liste des régressions."""
+    regressions = []
+    print(f"\n{'benchmark':45} {'référence':>11} {'actuel':>11} {'ratio':>7}")
+    for name, res in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or "median" not in base or "median" not in res:
+            continue
+        ratio = res["median"] / base["median"] if base["median"] else float("inf")
+        slower = ratio > 1 + tolerance and res["median"] - base["median"] > noise_ms
+        flag = "  ⚠️" if slower else ""
+        print(f"{name:45} {base['median']:10.2f}  {res['median']:10.2f}  {ratio:6.2f}{flag}")
+        if slower:
+            regressions.append(name)
+    return regressions
+
+
+def environment():
+    env = {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()}
+    try:
+        from PyQt6.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+        env.update(qt=QT_VERSION_STR, pyqt=PYQT_VERSION_STR)
+    except ImportError:
+        env.update(qt=None, pyqt=None)
+    return env
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks headless du Notebook.")
+    add_shape_arguments(parser)
+    parser.add_argument("--root", help="notebook existant ou dossier où le générer (temporaire par défaut)")
+    parser.add_argument("--repeat", type=int, default=20, help="répétitions par benchmark")
+    parser.add_argument("--only", help="groupes ou noms à exécuter, séparés par des virgules")
+    parser.add_argument("--out", default="benchmark-results.json", help="fichier JSON de sortie")
+    parser.add_argument("--baseline", help="résultats de référence (JSON) à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="ralentissement toléré (0.25 = +25 %%)")
+    parser.add_argument("--noise-ms", type=float, default=1.0, help="écart absolu ignoré (ms)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="code de sortie 1 si régression")
+    parser.add_argument("--keep", action="store_true", help="conserver le notebook généré")
+    args = parser.parse_args(argv)
+
+    temporary = args.root is None
+    root = args.root or tempfile.mkdtemp(prefix="ankinote-bench-")
+    start = time.perf_counter()
+    if temporary or not os.listdir(root):
+        stats = generate_notebook(root, **shape_kwargs(args))
+    else:
+        large = os.path.join(root, "large_note.md")
+        stats = {"root": root, "notes": None, "large_note": large if os.path.exists(large) else None}
+    stats["generation_s"] = round(time.perf_counter() - start, 3)
+    print(f"Notebook : {root} ({stats.get('notes')} notes, {stats.get('total_bytes', '?')} octets)")
+
+    selected = set(args.only.split(",")) if args.only else None
+    ctx = Context(args, stats)
+    results = {}
+    try:
+        for name, group, fn in BENCHMARKS:
+            if selected and name not in selected and group not in selected:
+                continue
+            try:
+                results[name] = summarize(fn(ctx))
+                r = results[name]
+                print(f"{name:45} médiane {r['median']:9.2f} ms   p95 {r['p95']:9.2f} ms")
+            except Skip as e:
+                results[name] = {"skipped": str(e)}
+                print(f"{name:45} ignoré : {e}")
+    finally:
+        ctx.module("storage").flush_saves()
+        if temporary and not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+    report = {
+        "schema": RESULTS_SCHEMA,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": environment(),
+        "notebook": stats,
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nRésultats : {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        shape = ("notes", "depth", "fanout", "median_note_bytes", "unicode_ratio", "seed")
+        if any(baseline.get("notebook", {}).get(k) != stats.get(k) for k in shape):
+            print("\n⚠️ La forme du notebook diffère de la référence : comparaison indicative.")
+        regressions = compare(results, baseline, args.tolerance, args.noise_ms)
+        if regressions:
+            print(f"\n{len(regressions)} régression(s) : {', '.join(regressions)}")
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# attachments.py — pièces jointes des notes (images collées ou déposées dans l'éditeur)
+# - Un seul magasin par notebook : <racine>/attachments/<empreinte>.<ext>
+# - Nom = empreinte SHA-256 du contenu : la même image collée deux fois n'est stockée qu'une fois
+# - La note référence l'image par un lien Markdown relatif (lisible par d'autres éditeurs)
+#
+# Les pièces jointes sont toujours de vrais fichiers, y compris pour un notebook SQLite.
+
+import os, hashlib
+from . import storage, perf
+
+ATTACHMENTS_DIRNAME = "attachments"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".bmp")
+HASH_CHARS = 32
+CHUNK_SIZE = 256 * 1024
+
+
+def notebook_root(note_path):
+    """Racine du notebook d'une note (son dossier si aucune racine n'est ouverte)."""
+    return storage.backend_for(note_path).root_path or os.path.dirname(os.path.abspath(note_path))
+
+
+def attachments_dir(note_path):
+    return os.path.join(notebook_root(note_path), ATTACHMENTS_DIRNAME)
+
+
+def is_image(path):
+    return os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+
+
+def _target(note_path, digest, ext):
+    return os.path.join(attachments_dir(note_path), digest[:HASH_CHARS] + ext.lower())
+
+
+def _write_new(target, chunks):
+    """Écrit `target` (fichier caché puis rename) s'il n'existe pas déjà."""
+    if os.path.exists(target):
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_path = os.path.join(os.path.dirname(target), f".{os.path.basename(target)}.{os.getpid()}.tmp")
+    written = 0
+    try:
+        with open(tmp_path, "wb") as out:
+            for data in chunks:
+                written += out.write(data)
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if perf.ENABLED:
+        perf.count("bytes_written", written)
+
+
+@perf.timed("attachments.store")
+def store_bytes(note_path, data, ext):
+    """Range un contenu (image collée) ; renvoie le chemin de la pièce jointe."""
+    target = _target(note_path, hashlib.sha256(data).hexdigest(), ext)
+    _write_new(target, [data])
+    return target
+
+
+@perf.timed("attachments.store")
+def store_file(note_path, source):
+    """Range une copie d'un fichier déposé (lu par morceaux) ; renvoie le chemin de la pièce jointe."""
+    h = hashlib.sha256()
+    with open(source, "rb") as f:
+        for data in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(data)
+    target = _target(note_path, h.hexdigest(), os.path.splitext(source)[1])
+    if os.path.normcase(os.path.abspath(source)) != os.path.normcase(target):
+        with open(source, "rb") as f:
+            _write_new(target, iter(lambda: f.read(CHUNK_SIZE), b""))
+    return target
+
+
+def markdown_image(note_path, attachment_path, alt=""):
+    """Lien Markdown ![alt](chemin relatif) d'une pièce jointe depuis une note."""
+    rel = os.path.relpath(attachment_path, os.path.dirname(os.path.abspath(note_path))).replace(os.sep, "/")
+    alt = alt.replace("[", "").replace("]", "")
+    return f"![{alt}]({rel})"
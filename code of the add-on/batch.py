@@ -0,0 +1,108 @@
+# batch.py — opérations groupées sur l'arborescence (déplacer, renommer, supprimer)
+# - Planification sans Qt : sélection réduite aux éléments de plus haut niveau, noms cibles uniques
+# - Exécution élément par élément, interruptible entre deux éléments (progress -> False)
+# - Les index suivent via les notifications de storage.py ; l'arbre est mis à jour
+#   une seule fois par l'appelant (dossiers parents touchés : affected_dirs)
+
+import os
+from . import storage, perf
+
+# Noms refusés par le renommage groupé (séparateurs, caractères interdits sous Windows)
+_INVALID_CHARS = set('/\\:*?"<>|')
+
+
+def top_level(paths):
+    """Chemins sans doublons ni éléments contenus dans un autre dossier sélectionné."""
+    result = []
+    for path in sorted({os.path.normpath(p) for p in paths}):
+        if not any(path.startswith(os.path.join(kept, "")) for kept in result):
+            result.append(path)
+    return result
+
+
+def _unique(path, taken):
+    """`path`, ou `nom (2)`, `nom (3)`... s'il existe ou a déjà été attribué dans le lot."""
+    candidate, n = path, 2
+    stem, ext = os.path.splitext(path)
+    while candidate.lower() in taken or storage.exists(candidate):
+        candidate = f"{stem} ({n}){ext}"
+        n += 1
+    taken.add(candidate.lower())
+    return candidate
+
+
+def plan_move(paths, dest_folder):
+    """[(source, cible)] pour déplacer `paths` dans `dest_folder`.
+
+    Sont ignorés : les éléments déjà dans ce dossier et les dossiers qu'on
+    voudrait déplacer dans eux-mêmes.
+    """
+    dest_folder = os.path.normpath(dest_folder)
+    taken, ops = set(), []
+    for src in top_level(paths):
+        if os.path.dirname(src) == dest_folder:
+            continue
+        if dest_folder == src or dest_folder.startswith(os.path.join(src, "")):
+            continue
+        ops.append((src, _unique(os.path.join(dest_folder, os.path.basename(src)), taken)))
+    return ops
+
+
+def plan_rename(paths, template, start=1):
+    """[(source, cible)] pour renommer `paths` selon un modèle ({name} : nom actuel, {n} : numéro).
+
+    L'extension des notes est conservée. Lève ValueError si le modèle produit un nom invalide.
+    """
+    taken, ops = set(), []
+    for n, src in enumerate(sorted(top_level(paths), key=lambda p: os.path.basename(p).lower()), start):
+        stem, ext = os.path.splitext(os.path.basename(src))
+        if storage.is_dir(src):
+            stem, ext = os.path.basename(src), ""
+        name = template.replace("{name}", stem).replace("{n}", str(n)).strip()
+        if not name or name in (".", "..") or _INVALID_CHARS & set(name) or storage.is_hidden_name(name):
+            raise ValueError(name)
+        target = os.path.join(os.path.dirname(src), name + ext)
+        if os.path.normcase(target) == os.path.normcase(src):
+            continue
+        ops.append((src, _unique(target, taken)))
+    return ops
+
+
+def affected_dirs(ops, deleted=()):
+    """Dossiers parents dont le contenu a changé (à resynchroniser une fois à la fin)."""
+    dirs = {os.path.dirname(p) for pair in ops for p in pair}
+    dirs.update(os.path.dirname(p) for p in deleted)
+    return sorted(dirs)
+
+
+@perf.timed("batch.move")
+def run_moves(ops, progress=None):
+    """Exécute [(source, cible)] ; renvoie (faits, [(chemin, message)] des échecs)."""
+    done, failures = [], []
+    for i, (src, dst) in enumerate(ops):
+        try:
+            storage.rename_path(src, dst)
+        except OSError as e:
+            failures.append((src, str(e)))
+        else:
+            done.append((src, dst))
+        if progress is not None and progress(i + 1, len(ops)) is False:
+            break
+    return done, failures
+
+
+@perf.timed("batch.delete")
+def run_deletes(paths, progress=None):
+    """Supprime `paths` (dossiers récursivement) ; renvoie (supprimés, échecs)."""
+    paths = top_level(paths)
+    done, failures = [], []
+    for i, path in enumerate(paths):
+        try:
+            storage.delete_path(path)
+        except OSError as e:
+            failures.append((path, str(e)))
+        else:
+            done.append(path)
+        if progress is not None and progress(i + 1, len(paths)) is False:
+            break
+    return done, failures
@@ -0,0 +1,330 @@
+# cards.py — cartes Anki générées à partir des blocs Q/R et texte à trous des notes
+# - Syntaxe : "Q: question" puis "A: réponse" (paragraphe), ou paragraphe avec {{c1::...}}
+# - Identifiant stable par bloc : commentaire <!--card:xxxx--> ajouté au bloc à la première synchro
+# - État (<racine>/.ankinote/cards.json) : id du bloc -> note Anki + empreinte du contenu,
+#   notes inchangées (mtime / taille) ignorées sans être relues
+# - Synchro : ajouts et mises à jour groupés, une seule étape d'annulation
+#
+# Sans dépendance à aqt : plan_sync() ne touche qu'au notebook, apply_plan(col, ...)
+# ne touche qu'à la collection (testable avec une collection temporaire du paquet anki).
+
+import os, re, json, uuid, hashlib, html
+from collections import namedtuple
+from . import storage
+from .config import load_config
+
+STATE_DIRNAME = ".ankinote"
+STATE_FILENAME = "cards.json"
+STATE_VERSION = 1
+
+DEFAULT_DECK = "Notebook"
+BASIC_NOTETYPE = "Basic"
+CLOZE_NOTETYPE = "Cloze"
+NOTEBOOK_TAG = "notebook"
+ORPHAN_TAG = "notebook::orphan"  # bloc supprimé de la note : la carte est conservée et marquée
+
+MARKER_RE = re.compile(r"[ \t]*<!--card:([0-9a-z]{6,32})-->")
+QUESTION_RE = re.compile(r"^\s*(?:Q|Question)\s*:\s?(.*)$", re.IGNORECASE)
+ANSWER_RE = re.compile(r"^\s*(?:A|Answer|R|Réponse)\s*:\s?(.*)$", re.IGNORECASE)
+CLOZE_RE = re.compile(r"\{\{c\d+::")
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+HAS_CARDS_RE = re.compile(r"^\s*(?:Q|Question)\s*:|\{\{c\d+::", re.IGNORECASE | re.MULTILINE)
+
+# Bloc d'une note : kind = "basic" | "cloze", fields = champs Markdown, line = ligne du marqueur
+Block = namedtuple("Block", "id kind fields line")
+# Élément du plan : tout ce qu'il faut pour créer ou mettre à jour la note Anki
+CardItem = namedtuple("CardItem", "id kind fields deck tags digest nid old_deck")
+
+try:
+    import markdown as _markdown
+except ImportError:
+    _markdown = None
+
+
+# ----------------------------- Analyse des notes -----------------------------
+
+def _paragraphs(lines):
+    """(début, fin) des paragraphes hors blocs de code (fin exclue)."""
+    start, in_fence = None, False
+    for i, line in enumerate(lines):
+        if FENCE_RE.match(line):
+            if start is not None:
+                yield start, i
+                start = None
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        if line.strip():
+            if start is None:
+                start = i
+        elif start is not None:
+            yield start, i
+            start = None
+    if start is not None and not in_fence:
+        yield start, len(lines)
+
+
+def parse_blocks(text):
+    """Blocs Q/R et texte à trous d'une note (id None si le bloc n'a pas encore de marqueur)."""
+    lines = text.split("\n")
+    blocks = []
+    for start, end in _paragraphs(lines):
+        ids = {i: m.group(1) for i in range(start, end) for m in [MARKER_RE.search(lines[i])] if m}
+        clean = [MARKER_RE.sub("", lines[i]) for i in range(start, end)]
+        if any(QUESTION_RE.match(line) for line in clean):
+            # Un paragraphe peut enchaîner plusieurs paires Q/R (lignes précédentes ignorées)
+            i = 0
+            while i < len(clean):
+                q = QUESTION_RE.match(clean[i])
+                if not q:
+                    i += 1
+                    continue
+                question, answer, j = [q.group(1)], None, i + 1
+                while j < len(clean) and not QUESTION_RE.match(clean[j]):
+                    a = ANSWER_RE.match(clean[j]) if answer is None else None
+                    if a:
+                        answer = [a.group(1)]
+                    elif answer is None:
+                        question.append(clean[j])
+                    else:
+                        answer.append(clean[j])
+                    j += 1
+                if answer is not None:
+                    blocks.append(Block(ids.get(start + i), "basic",
+                                        ("\n".join(question).strip(), "\n".join(answer).strip()), start + i))
+                i = j
+        elif any(CLOZE_RE.search(line) for line in clean):
+            marker_line = next((i for i in ids), end - 1)
+            blocks.append(Block(ids.get(marker_line), "cloze", ("\n".join(clean).strip(),), marker_line))
+    return blocks
+
+
+def assign_ids(text, taken=None):
+    """Ajoute un marqueur aux blocs qui n'en ont pas (ou dont l'id est déjà pris ailleurs).
+
+    Renvoie (texte, blocs) ; le texte est inchangé si tous les blocs avaient un id unique.
+    """
+    taken = set() if taken is None else taken
+    blocks = parse_blocks(text)
+    lines = None
+    result = []
+    for block in blocks:
+        if block.id is None or block.id in taken:
+            new_id = uuid.uuid4().hex[:12]
+            if lines is None:
+                lines = text.split("\n")
+            line = MARKER_RE.sub("", lines[block.line])
+            lines[block.line] = f"{line} <!--card:{new_id}-->"
+            block = block._replace(id=new_id)
+        taken.add(block.id)
+        result.append(block)
+    return ("\n".join(lines) if lines is not None else text), result
+
+
+def render_field(text):
+    """Champ Anki : Markdown rendu en HTML (module markdown d'Anki, sinon texte échappé)."""
+    if _markdown is not None:
+        rendered = _markdown.markdown(text, extensions=["fenced_code", "tables"])
+        if rendered.startswith("<p>") and rendered.endswith("</p>") and rendered.count("<p>") == 1:
+            rendered = rendered[3:-4]
+        return rendered
+    return html.escape(text).replace("\n", "<br>")
+
+
+def _tag(name):
+    return re.sub(r"\s+", "_", name.strip()) or NOTEBOOK_TAG
+
+
+# ----------------------------- État de synchronisation -----------------------------
+
+class CardState:
+    """Correspondance bloc -> note Anki, et blocs connus de chaque note (cache mtime / taille)."""
+
+    def __init__(self, root_path):
+        self.root_path = os.path.normpath(root_path)
+        self.path = os.path.join(self.root_path, STATE_DIRNAME, STATE_FILENAME)
+        self.blocks = {}  # id -> {"nid", "hash", "deck"}
+        self.files = {}   # chemin relatif ("/") -> [mtime_ns, taille, [ids]]
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == STATE_VERSION:
+                self.blocks = data.get("blocks", {})
+                self.files = data.get("files", {})
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        storage.write_atomic(self.path, json.dumps(
+            {"version": STATE_VERSION, "blocks": self.blocks, "files": self.files},
+            separators=(",", ":")))
+
+
+class SyncPlan:
+    """Résultat de plan_sync : ce que apply_plan doit faire dans la collection."""
+
+    def __init__(self, state):
+        self.state = state
+        self.add = []        # CardItem sans note Anki
+        self.update = []     # CardItem dont le contenu, le paquet ou les tags ont changé
+        self.orphans = []    # ids de blocs disparus des notes
+        self.unchanged = 0
+        self.rewritten = []  # notes où des marqueurs ont été ajoutés
+        self.files = {}      # nouvel état des notes parcourues
+        self.added = 0
+        self.updated = 0
+
+
+def _deck_for(rel, base_deck):
+    folders = [p for p in rel.split("/")[:-1] if p]
+    return "::".join([base_deck] + folders)
+
+
+def plan_sync(root_path, progress=None):
+    """Parcourt le notebook, ajoute les marqueurs manquants et calcule les changements.
+
+    Seules les notes modifiées depuis la dernière synchro sont relues.
+    `progress(faites, total)` peut renvoyer False pour interrompre (ValueError).
+    """
+    state = CardState(root_path)
+    base_deck = load_config().get("cards_deck") or DEFAULT_DECK
+    plan = SyncPlan(state)
+    notes = list(storage.walk_notes(state.root_path))
+    seen = set()
+    for n, (full, mtime, size) in enumerate(notes, 1):
+        rel = os.path.relpath(full, state.root_path).replace(os.sep, "/")
+        cached = state.files.get(rel)
+        if cached and cached[0] == mtime and cached[1] == size and not seen.intersection(cached[2]):
+            plan.files[rel] = cached
+            seen.update(cached[2])
+            plan.unchanged += len(cached[2])
+            continue
+        text = storage.load_markdown(full)
+        if not HAS_CARDS_RE.search(text):
+            plan.files[rel] = [mtime, size, []]
+            continue
+        new_text, blocks = assign_ids(text, seen)
+        if new_text != text:
+            storage.save_markdown(full, new_text)
+            plan.rewritten.append(full)
+            st = storage.path_stat(full)
+            mtime, size = (st[0], st[1]) if st else (mtime, size)
+        plan.files[rel] = [mtime, size, [b.id for b in blocks]]
+        deck = _deck_for(rel, base_deck)
+        tags = [NOTEBOOK_TAG, _tag(os.path.splitext(rel.rsplit("/", 1)[-1])[0])]
+        for block in blocks:
+            digest = hashlib.blake2b(
+                json.dumps([block.kind, block.fields, deck, tags], ensure_ascii=False).encode("utf-8"),
+                digest_size=12).hexdigest()
+            known = state.blocks.get(block.id)
+            item = CardItem(block.id, block.kind, block.fields, deck, tags, digest,
+                            known["nid"] if known else None, known.get("deck") if known else None)
+            if known is None:
+                plan.add.append(item)
+            elif known["hash"] != digest:
+                plan.update.append(item)
+            else:
+                plan.unchanged += 1
+        if progress is not None and progress(n, len(notes)) is False:
+            raise ValueError("interrompu")
+    plan.orphans = [block_id for block_id in state.blocks if block_id not in seen]
+    return plan
+
+
+# ----------------------------- Collection Anki -----------------------------
+
+def _find_notetype(col, name, cloze):
+    """Type de note configuré, sinon le premier type standard (ou à trous) compatible."""
+    notetype = col.models.by_name(name)
+    if notetype is not None:
+        return notetype
+    for entry in col.models.all_names_and_ids():
+        candidate = col.models.get(entry.id)
+        if cloze and candidate["type"] == 1:
+            return candidate
+        if not cloze and candidate["type"] == 0 and len(candidate["flds"]) >= 2:
+            return candidate
+    raise ValueError(f"type de note introuvable : {name}")
+
+
+def _fill(note, item):
+    if item.kind == "basic":
+        note.fields[0] = render_field(item.fields[0])
+        note.fields[1] = render_field(item.fields[1])
+    else:
+        note.fields[0] = render_field(item.fields[0])
+    note.tags = sorted(set(t for t in note.tags if t != ORPHAN_TAG) | set(item.tags))
+
+
+def apply_plan(col, plan, undo_label="Notebook"):
+    """Applique le plan en lots (update_notes, add_notes) fusionnés en une étape d'annulation.
+
+    Met à jour puis enregistre l'état de synchro ; renvoie les OpChanges fusionnés.
+    """
+    from anki.collection import AddNoteRequest
+    from anki.errors import NotFoundError
+
+    config = load_config()
+    notetypes = {
+        "basic": _find_notetype(col, config.get("cards_basic_notetype") or BASIC_NOTETYPE, False),
+        "cloze": _find_notetype(col, config.get("cards_cloze_notetype") or CLOZE_NOTETYPE, True),
+    }
+    state = plan.state
+    pos = col.add_custom_undo_entry(undo_label)
+    deck_ids = {}
+
+    def deck_id(name):
+        if name not in deck_ids:
+            deck_ids[name] = col.decks.id(name)
+        return deck_ids[name]
+
+    # --- Mises à jour (un seul appel) ; note supprimée dans Anki ou type changé : recréation ---
+    to_add, updated, moves = list(plan.add), [], {}
+    for item in plan.update:
+        try:
+            note = col.get_note(item.nid)
+        except NotFoundError:
+            to_add.append(item)
+            continue
+        if note.mid != notetypes[item.kind]["id"]:
+            plan.orphans.append(item.id)
+            to_add.append(item)
+            continue
+        _fill(note, item)
+        updated.append((item, note))
+        if item.old_deck != item.deck:
+            moves.setdefault(item.deck, []).extend(note.card_ids())
+    if updated:
+        col.update_notes([note for _, note in updated])
+    for deck, card_ids in moves.items():
+        col.set_deck(card_ids, deck_id(deck))
+
+    # --- Ajouts (un seul appel) ---
+    requests, added = [], []
+    for item in to_add:
+        note = col.new_note(notetypes[item.kind])
+        _fill(note, item)
+        requests.append(AddNoteRequest(note=note, deck_id=deck_id(item.deck)))
+        added.append((item, note))
+    if requests:
+        col.add_notes(requests)
+
+    # --- Blocs disparus : notes Anki conservées, marquées pour revue ---
+    orphan_ids = [state.blocks[b]["nid"] for b in plan.orphans if b in state.blocks]
+    if orphan_ids:
+        existing = [nid for nid in orphan_ids if col.db.scalar("select 1 from notes where id = ?", nid)]
+        if existing:
+            col.tags.bulk_add(existing, ORPHAN_TAG)
+
+    changes = col.merge_undo_entries(pos)
+
+    for item, note in updated + added:
+        state.blocks[item.id] = {"nid": note.id, "hash": item.digest, "deck": item.deck}
+    for block_id in plan.orphans:
+        if block_id not in {item.id for item, _ in added}:
+            state.blocks.pop(block_id, None)
+    state.files = plan.files
+    state.save()
+    plan.added, plan.updated = len(added), len(updated)
+    return changes
@@ -0,0 +1,24 @@
+# config.py — configuration utilisateur du Notebook (~/.anki_notebook_config.json)
+# Module léger (sans Qt) : lisible depuis main.py sans charger l'interface
+
+import os, json
+
+CONFIG_PATH = os.path.join(os.path.expanduser("~"), ".anki_notebook_config.json")
+
+
+def load_config():
+    """Contenu de la configuration ({} si absente ou illisible)."""
+    try:
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_config(**values):
+    """Met à jour les clés données en conservant les autres (lève OSError en cas d'échec)."""
+    data = load_config()
+    data.update(values)
+    with open(CONFIG_PATH, "w", encoding="utf-8") as f:
+        json.dump(data, f)
@@ -1,37 +1,176 @@
 # editor_widget.py — éditeur Markdown moderne, multilingue et autosave
 
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTextEdit, QPushButton, QHBoxLayout
-from PyQt6.QtCore import QTimer
-from PyQt6.QtGui import QPalette, QColor
-from .storage import save_markdown, load_markdown
+import os, hashlib, functools
+from collections import OrderedDict
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QPlainTextEdit, QPushButton, QHBoxLayout, QLabel, QSplitter,
+    QTabBar, QPlainTextDocumentLayout
+)
+from PyQt6.QtCore import Qt, QTimer, QEvent, QBuffer, QIODevice, pyqtSignal
+from PyQt6.QtGui import QPalette, QColor, QTextCursor, QTextDocument, QSyntaxHighlighter, QTextCharFormat
+from .storage import save_markdown_async, load_markdown, save_queue, file_size, iter_markdown_chunks, path_stat, exists
+from .links import LINK_RE, link_at
 from .lang import t
+from .journal import NoteJournal
+from . import perf, attachments
+
+# Autosave : après une pause de frappe, et au plus tard après AUTOSAVE_MAX_LATENCY_MS.
+# Chaque modification est d'abord ajoutée au journal de la note (journal.py) : la note
+# elle-même n'est réécrite qu'après une longue pause ou quand le journal dépasse JOURNAL_COMPACT_BYTES
+AUTOSAVE_IDLE_MS = 15000
+AUTOSAVE_MAX_LATENCY_MS = 120000
+JOURNAL_COMPACT_BYTES = 256 * 1024
+# Journal indisponible (erreur d'écriture) : sauvegardes fréquentes
+UNJOURNALED_IDLE_MS = 1500
+UNJOURNALED_MAX_LATENCY_MS = 10000
+
+# Texte d'une sélection -> texte de toPlainText() (mêmes positions : un caractère pour un)
+_PLAIN_TEXT = str.maketrans({"\u2029": "\n", "\u2028": "\n", "\xa0": " "})
+
+# Grandes notes : lecture mmap et remplissage du document par morceaux
+LARGE_NOTE_BYTES = 1024 * 1024
+
+# Aperçu : rendu des blocs modifiés après une courte pause de frappe
+PREVIEW_DEBOUNCE_MS = 250
+
+# Onglets : documents gardés en mémoire (annulation, curseur, défilement) tant que
+# leur taille cumulée reste sous cette limite ; au-delà, les moins récents sont libérés
+TAB_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class WikiLinkHighlighter(QSyntaxHighlighter):
+    """Met en évidence les liens [[Note]] (Ctrl+clic pour les suivre)."""
+
+    def __init__(self, document):
+        super().__init__(document)
+        self.link_format = QTextCharFormat()
+        self.link_format.setForeground(QColor("#2a6fdb"))
+        self.link_format.setFontUnderline(True)
+
+    def highlightBlock(self, text):
+        if "[[" not in text:
+            return
+        for match in LINK_RE.finditer(text):
+            self.setFormat(match.start(), match.end() - match.start(), self.link_format)
+
+
+class _Tab:
+    """Note ouverte dans un onglet : document en cache (ou None s'il a été libéré) et état de vue."""
+
+    __slots__ = ("path", "document", "highlighter", "saved_digest", "cursor", "anchor", "scroll", "stat",
+                 "journal")
+
+    def __init__(self, path):
+        self.path = path
+        self.document = None
+        self.highlighter = None
+        self.saved_digest = None
+        self.cursor = self.anchor = self.scroll = None
+        self.stat = None
+        self.journal = None  # NoteJournal tant que le document est chargé
+
+    def size(self):
+        # Estimation : texte en UTF-16 ; la mise en page est du même ordre de grandeur
+        return self.document.characterCount() * 2 if self.document is not None else 0
+
+
+class _NoteTextEdit(QPlainTextEdit):
+    """Zone de texte qui confie les images collées ou déposées à `image_handler(mime)`.
+
+    Le handler renvoie True s'il a inséré les images ; sinon le comportement par défaut s'applique.
+    """
+
+    image_handler = None
+
+    def canInsertFromMimeData(self, source):
+        if self.image_handler is not None and (source.hasImage() or any(
+                url.isLocalFile() and attachments.is_image(url.toLocalFile()) for url in source.urls())):
+            return True
+        return super().canInsertFromMimeData(source)
+
+    def insertFromMimeData(self, source):
+        if self.image_handler is not None and self.image_handler(source):
+            return
+        super().insertFromMimeData(source)
 
 
 class NotebookEditor(QWidget):
     """Éditeur Markdown minimaliste (style Notion) avec autosave et traduction."""
 
+    # Émis (thread GUI) quand l'écrivain en arrière-plan échoue : (chemin, message)
+    save_failed = pyqtSignal(str, str)
+    # Émis quand la note ouverte change ("" si l'éditeur est détaché)
+    current_file_changed = pyqtSignal(str)
+    # Ctrl+clic sur un lien [[...]] : cible brute du lien
+    link_activated = pyqtSignal(str)
+
     def __init__(self, file_path=None, parent=None):
         super().__init__(parent)
         self.file_path = file_path
+        self._saved_digest = None  # empreinte du dernier contenu écrit / chargé
+        self._loader = None        # générateur de morceaux pendant un chargement progressif
+        self._load_hash = None
+        self._pending_goto = None
+        self._journal_muted = False
+        self._read_only = False    # notes réécrites en arrière-plan (synchro des cartes)
+        self.preview = None        # créé au premier affichage (QtWebEngine est coûteux)
 
-        # --- Zone de texte ---
-        self.text_edit = QTextEdit()
-        self.text_edit.setAcceptRichText(False)
+        # --- Zone de texte (texte brut, mise en page par blocs) ---
+        self.text_edit = _NoteTextEdit()
+        self.text_edit.image_handler = self._insert_images
         self.text_edit.setPlaceholderText(t("placeholder_note"))
-        self.text_edit.setLineWrapMode(QTextEdit.LineWrapMode.WidgetWidth)
+        self.text_edit.setLineWrapMode(QPlainTextEdit.LineWrapMode.WidgetWidth)
+        self.text_edit.viewport().installEventFilter(self)
+        # Affiché quand aucun onglet n'est ouvert ; appartient à l'éditeur (le document d'origine
+        # de QPlainTextEdit est détruit par Qt dès le premier setDocument)
+        self._blank_document = QTextDocument(self)
+        self._blank_document.setDocumentLayout(QPlainTextDocumentLayout(self._blank_document))
+        self.text_edit.setDocument(self._blank_document)
+
+        # --- Onglets (un QTextDocument par note, cache LRU borné en octets) ---
+        self._tabs = OrderedDict()  # chemin -> _Tab, du moins au plus récemment affiché
+        self.cache_bytes = TAB_CACHE_BYTES
+        self.tab_bar = QTabBar()
+        self.tab_bar.setTabsClosable(True)
+        self.tab_bar.setMovable(True)
+        self.tab_bar.setDocumentMode(True)
+        self.tab_bar.setExpanding(False)
+        self.tab_bar.setElideMode(Qt.TextElideMode.ElideMiddle)
+        self.tab_bar.currentChanged.connect(self._on_tab_changed)
+        self.tab_bar.tabCloseRequested.connect(self.close_tab)
 
         # --- Bouton sauvegarde ---
         self.btn_save = QPushButton(t("save"))
-        self.btn_save.clicked.connect(self.save_file)
+        self.btn_save.clicked.connect(self.flush)
+
+        # --- Erreurs de sauvegarde (remontées par la file d'écriture) ---
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("color: #c0392b;")
+        self.save_failed.connect(self._on_save_failed)
+        self._report_save_error = self.save_failed.emit
+        save_queue.add_error_callback(self._report_save_error)
+        # La file survit à l'éditeur : désinscription à sa destruction (le slot ne tient pas self)
+        self.destroyed.connect(functools.partial(save_queue.remove_error_callback, self._report_save_error))
+
+        # --- Aperçu Markdown (côte à côte, affiché à la demande) ---
+        self.btn_preview = QPushButton(t("preview"))
+        self.btn_preview.setCheckable(True)
+        self.btn_preview.toggled.connect(self.set_preview_visible)
 
         btn_layout = QHBoxLayout()
         btn_layout.addWidget(self.btn_save)
+        btn_layout.addWidget(self.btn_preview)
         btn_layout.addStretch()
+        btn_layout.addWidget(self.status_label)
+
+        self.splitter = QSplitter(Qt.Orientation.Horizontal)
+        self.splitter.addWidget(self.text_edit)
 
         # --- Layout global ---
         layout = QVBoxLayout()
         layout.addLayout(btn_layout)
-        layout.addWidget(self.text_edit)
+        layout.addWidget(self.tab_bar)
+        layout.addWidget(self.splitter)
         self.setLayout(layout)
 
         # --- Style clair et doux ---
@@ -44,7 +183,7 @@ class NotebookEditor(QWidget):
                 font-size: 13px;
             }
             QPushButton:hover { background-color: #ebebeb; }
-            QTextEdit {
+            QPlainTextEdit {
                 border: 1px solid #dcdcdc;
                 border-radius: 6px;
                 background-color: #ffffff;
@@ -57,11 +196,30 @@ class NotebookEditor(QWidget):
         # --- Thème clair/sombre ---
         self.apply_system_theme()
 
-        # --- Autosave (toutes les 2 secondes) ---
-        self.autosave_timer = QTimer()
-        self.autosave_timer.setInterval(2000)
-        self.autosave_timer.timeout.connect(self.save_file)
-        self.autosave_timer.start()
+        # --- Autosave piloté par les modifications (aucune écriture au repos) ---
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.setInterval(AUTOSAVE_IDLE_MS)
+        self.idle_timer.timeout.connect(self.save_file)
+
+        self.max_latency_timer = QTimer(self)
+        self.max_latency_timer.setSingleShot(True)
+        self.max_latency_timer.setInterval(AUTOSAVE_MAX_LATENCY_MS)
+        self.max_latency_timer.timeout.connect(self.save_file)
+
+        self.text_edit.textChanged.connect(self._on_text_changed)
+
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DEBOUNCE_MS)
+        self.preview_timer.timeout.connect(self.refresh_preview)
+        self.text_edit.textChanged.connect(self._schedule_preview)
+        self.text_edit.verticalScrollBar().valueChanged.connect(self._sync_preview_scroll)
+
+        # --- Chargement progressif des grandes notes (un morceau par tour de boucle) ---
+        self.load_timer = QTimer(self)
+        self.load_timer.setInterval(0)
+        self.load_timer.timeout.connect(self._load_next_chunk)
 
         # --- Charger le fichier si fourni ---
         if self.file_path:
@@ -72,6 +230,7 @@ class NotebookEditor(QWidget):
     def retranslate_ui(self):
         """Met à jour les textes si la langue change."""
         self.btn_save.setText(t("save"))
+        self.btn_preview.setText(t("preview"))
         self.text_edit.setPlaceholderText(t("placeholder_note"))
 
     # ----------------------------- Apparence ----------------------------------
@@ -96,18 +255,565 @@ class NotebookEditor(QWidget):
 
     # ----------------------------- Fichiers -----------------------------------
 
-    def load_file(self, file_path):
-        """Charge le contenu d'une note Markdown existante."""
-        self.file_path = file_path
-        content = load_markdown(file_path)
+    @staticmethod
+    def _digest(content):
+        return hashlib.blake2b(content.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def _on_text_changed(self):
+        if not self.file_path:
+            return
+        tab = self._tabs.get(self.file_path)
+        journal = tab.journal if tab is not None else None
+        if journal is None or not journal.ok:
+            idle, latency = UNJOURNALED_IDLE_MS, UNJOURNALED_MAX_LATENCY_MS
+        elif journal.size >= JOURNAL_COMPACT_BYTES:
+            idle = latency = 0  # compaction au prochain tour de boucle
+        else:
+            idle, latency = AUTOSAVE_IDLE_MS, AUTOSAVE_MAX_LATENCY_MS
+        self.idle_timer.start(idle)  # (re)démarre l'anti-rebond
+        if not self.max_latency_timer.isActive() or latency < self.max_latency_timer.remainingTime():
+            self.max_latency_timer.start(latency)
+
+    def _stop_timers(self):
+        self.idle_timer.stop()
+        self.max_latency_timer.stop()
+
+    def is_dirty(self):
+        """Vrai si le document contient des modifications non écrites."""
+        return bool(self.file_path) and not self.is_loading() and self.text_edit.document().isModified()
+
+    @perf.timed("editor.load_file")
+    def load_file(self, file_path, position=None, term=None):
+        """Affiche une note dans son onglet (créé au besoin), la note courante étant sauvegardée.
+
+        Un onglet dont le document est en cache est réaffiché tel quel (annulation,
+        curseur, défilement) ; sinon la note est lue. `position` (offset en
+        caractères) et `term` placent le curseur sur une occurrence trouvée par la
+        recherche. Au-delà de LARGE_NOTE_BYTES, la note est ajoutée au document par
+        morceaux sans bloquer la boucle d'événements.
+        """
+        self._activate(self._tabs.get(file_path) or self._add_tab(file_path), position, term)
+
+    # ----------------------------- Onglets -----------------------------
+
+    def _add_tab(self, path):
+        tab = self._tabs[path] = _Tab(path)
+        self._tabs.move_to_end(path, last=False)  # pas encore affiché : le moins récent
+        index = self.tab_bar.addTab(os.path.splitext(os.path.basename(path))[0])
+        self.tab_bar.setTabToolTip(index, path)
+        self.tab_bar.setTabData(index, path)
+        return tab
+
+    def _tab_index(self, path):
+        for i in range(self.tab_bar.count()):
+            if self.tab_bar.tabData(i) == path:
+                return i
+        return -1
+
+    def open_paths(self):
+        """Chemins des notes ouvertes, dans l'ordre des onglets."""
+        return [self.tab_bar.tabData(i) for i in range(self.tab_bar.count())]
+
+    def _new_document(self, tab):
+        doc = QTextDocument(self)
+        doc.setDocumentLayout(QPlainTextDocumentLayout(doc))
+        doc.setDefaultFont(self.text_edit.font())
+        tab.document = doc
+        tab.highlighter = WikiLinkHighlighter(doc)
+        doc.contentsChange.connect(lambda position, removed, added, tab=tab:
+                                   self._on_contents_change(tab, position, removed, added))
+        return doc
+
+    def _leave_current(self):
+        """Sauvegarde la note affichée et mémorise son état avant un changement d'onglet."""
+        tab = self._tabs.get(self.file_path) if self.file_path else None
+        if tab is None:
+            return
+        if self.is_loading():
+            # Chargement progressif interrompu : le document partiel est abandonné
+            self._cancel_chunked_load()
+            self._unload(tab, save=False)
+            return
+        self.save_file()
+        self._remember_view(tab)
+        tab.saved_digest = self._saved_digest
+
+    def _remember_view(self, tab):
+        cursor = self.text_edit.textCursor()
+        tab.cursor, tab.anchor = cursor.position(), cursor.anchor()
+        tab.scroll = self.text_edit.verticalScrollBar().value()
+
+    def _activate(self, tab, position=None, term=None):
+        if self.file_path != tab.path or tab.document is None:
+            self._leave_current()
+            self.file_path = tab.path
+            if tab.document is not None:
+                self.text_edit.setDocument(tab.document)
+                self._saved_digest = tab.saved_digest
+                self._restore_view(tab)
+                st = path_stat(tab.path)
+                if st != tab.stat:
+                    tab.stat = st
+                    self.reload_from_disk()  # modifiée ailleurs pendant que l'onglet était caché
+                self._schedule_preview()
+            else:
+                self.text_edit.setDocument(self._new_document(tab))
+                tab.stat = path_stat(tab.path)
+                if file_size(tab.path) > LARGE_NOTE_BYTES:
+                    self._start_chunked_load(position if position is not None else tab.cursor, term)
+                    position = None
+                else:
+                    content = load_markdown(tab.path)
+                    self._set_content(content)
+                    if position is None:
+                        self._restore_view(tab)
+                    else:
+                        self.goto_position(position, term, content)
+                        position = None
+        if position is not None:
+            self.goto_position(position, term)
+        self._tabs.move_to_end(tab.path)
+        index = self._tab_index(tab.path)
+        if index != self.tab_bar.currentIndex():
+            self.tab_bar.blockSignals(True)
+            self.tab_bar.setCurrentIndex(index)
+            self.tab_bar.blockSignals(False)
+        self._evict()
+        self.current_file_changed.emit(tab.path)
+
+    def _restore_view(self, tab):
+        if tab.cursor is None:
+            return
+        limit = self.text_edit.document().characterCount() - 1
+        cursor = self.text_edit.textCursor()
+        cursor.setPosition(min(tab.anchor, limit))
+        cursor.setPosition(min(tab.cursor, limit), QTextCursor.MoveMode.KeepAnchor)
+        self.text_edit.setTextCursor(cursor)
+        self.text_edit.verticalScrollBar().setValue(tab.scroll)
+
+    def _unload(self, tab, save=True):
+        """Libère le document d'un onglet (il sera relu à la réactivation)."""
+        doc = tab.document
+        if doc is None:
+            return
+        if save and doc.isModified():
+            content = doc.toPlainText()
+            digest = self._digest(content)
+            if digest != tab.saved_digest:
+                save_markdown_async(tab.path, content)
+            if tab.journal is not None:
+                tab.journal.rotate(digest.hex(), confirmed=digest == tab.saved_digest)
+        if tab.journal is not None:
+            tab.journal.close()
+        tab.document = tab.highlighter = tab.journal = None
+        tab.saved_digest = None
+        if self.text_edit.document() is doc:
+            self.text_edit.setDocument(self._blank_document)
+        doc.deleteLater()
+
+    def _evict(self):
+        """Libère les documents les moins récents tant que le cache dépasse cache_bytes."""
+        total = sum(tab.size() for tab in self._tabs.values())
+        for tab in list(self._tabs.values()):
+            if total <= self.cache_bytes:
+                break
+            if tab.path == self.file_path or tab.document is None:
+                continue
+            total -= tab.size()
+            self._unload(tab)
+
+    def _on_tab_changed(self, index):
+        path = self.tab_bar.tabData(index) if index >= 0 else None
+        if path and path != self.file_path:
+            self.load_file(path)
+
+    def close_tab(self, index):
+        """Ferme un onglet (la note est sauvegardée)."""
+        path = self.tab_bar.tabData(index)
+        if path == self.file_path:
+            self.save_file()
+            self._close_current()
+        else:
+            self._remove_tab(path, save=True)
+
+    def _remove_tab(self, path, save):
+        tab = self._tabs.pop(path, None)
+        if tab is not None:
+            self._unload(tab, save=save)
+        index = self._tab_index(path)
+        if index >= 0:
+            self.tab_bar.blockSignals(True)
+            self.tab_bar.removeTab(index)
+            self.tab_bar.blockSignals(False)
+
+    def _close_current(self):
+        """Retire l'onglet affiché (sans sauvegarde) et affiche le plus récent des autres."""
+        self._stop_timers()
+        self._cancel_chunked_load()
+        path, self.file_path = self.file_path, None
+        self._saved_digest = None
+        self._remove_tab(path, save=False)
+        if self._tabs:
+            self.load_file(next(reversed(self._tabs)))
+            return
+        self.text_edit.setDocument(self._blank_document)
+        self.preview_timer.stop()
+        if self.preview is not None:
+            self.preview.clear()
+        self.current_file_changed.emit("")
+
+    def close_path(self, path, save=False):
+        """Ferme les onglets de `path` et des notes situées sous ce dossier (suppression...)."""
+        prefix = os.path.join(path, "")
+        for open_path in list(self._tabs):
+            if os.path.normpath(open_path) == os.path.normpath(path) or open_path.startswith(prefix):
+                if open_path == self.file_path:
+                    if save:
+                        self.save_file()
+                    self._close_current()
+                else:
+                    self._remove_tab(open_path, save=save)
+
+    def session_state(self):
+        """Onglets (dans l'ordre), note affichée et [curseur, ancre, défilement] de chaque onglet."""
+        current = self._tabs.get(self.file_path) if self.file_path else None
+        if current is not None and not self.is_loading():
+            self._remember_view(current)
+        views = {path: [tab.cursor, tab.anchor, tab.scroll]
+                 for path, tab in self._tabs.items() if tab.cursor is not None}
+        return {"tabs": self.open_paths(), "current": self.file_path, "views": views}
+
+    def restore_session(self, tabs, current=None, views=None):
+        """Rouvre des onglets sans les lire ; seule la note `current` est chargée."""
+        views = views or {}
+        for path in tabs:
+            if path in self._tabs or not exists(path):
+                continue
+            tab = self._add_tab(path)
+            view = views.get(path)
+            if view and len(view) == 3 and all(isinstance(v, int) for v in view):
+                tab.cursor, tab.anchor, tab.scroll = view
+        if current in self._tabs:
+            self.load_file(current)
+
+    def close_missing(self):
+        """Ferme les onglets des notes qui n'existent plus (la note affichée, si elle est propre)."""
+        for path in list(self._tabs):
+            if path == self.file_path and self.is_dirty():
+                continue
+            if not exists(path):
+                self.close_path(path)
+
+    def close_all(self, save=True):
+        for path in list(self._tabs):
+            self.close_path(path, save=save)
+
+    def path_renamed(self, old_path, new_path):
+        """Renommage / déplacement : les onglets concernés suivent (document et annulation conservés)."""
+        prefix = os.path.join(old_path, "")
+        for path in list(self._tabs):
+            if path != old_path and not path.startswith(prefix):
+                continue
+            new = new_path + path[len(old_path):]
+            tab = self._tabs.pop(path)
+            tab.path = new
+            tab.stat = path_stat(new)
+            if tab.journal is not None:
+                tab.journal.moved(new)
+            self._tabs[new] = tab
+            index = self._tab_index(path)
+            self.tab_bar.setTabText(index, os.path.splitext(os.path.basename(new))[0])
+            self.tab_bar.setTabToolTip(index, new)
+            self.tab_bar.setTabData(index, new)
+            if self.file_path == path:
+                self.file_path = new
+                self.current_file_changed.emit(new)
+
+    def _set_content(self, content):
         self.text_edit.blockSignals(True)
+        self._journal_muted = True
         self.text_edit.setPlainText(content)
+        self._journal_muted = False
         self.text_edit.blockSignals(False)
+        self.text_edit.document().setModified(False)
+        self._saved_digest = self._digest(content)
+        self._reset_journal()
+        self._schedule_preview()
 
-    def save_file(self):
-        """Sauvegarde le contenu courant dans le fichier associé."""
+    # ----------------------------- Journal -----------------------------
+
+    def _reset_journal(self):
+        """Le document correspond à la note sur disque : le journal repart de ce contenu."""
+        tab = self._tabs.get(self.file_path) if self.file_path else None
+        if tab is None or tab.document is None:
+            return
+        if self._saved_digest is None:
+            # Contenu inconnu (lecture échouée) : rien à rejouer dessus
+            if tab.journal is not None:
+                tab.journal.close()
+                tab.journal = None
+        elif tab.journal is None:
+            tab.journal = NoteJournal(tab.path, self._saved_digest.hex())
+        else:
+            tab.journal.rotate(self._saved_digest.hex(), confirmed=True)
+
+    def _on_contents_change(self, tab, position, removed, added):
+        """Ajoute la modification au journal de la note (positions en unités UTF-16)."""
+        if tab.journal is None or self._journal_muted or (tab.path == self.file_path and self.is_loading()):
+            return
+        text = ""
+        if added:
+            cursor = QTextCursor(tab.document)
+            end = min(position + added, tab.document.characterCount() - 1)
+            cursor.setPosition(min(position, end))
+            cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+            text = cursor.selectedText().translate(_PLAIN_TEXT)
+        tab.journal.append(position, removed, text)
+
+    # ----------------------------- Grandes notes -----------------------------
+
+    def is_loading(self):
+        return self._loader is not None
+
+    def set_read_only(self, read_only):
+        """Interdit la saisie dans toutes les notes (changement d'onglet compris), par ex. pendant
+        que des notes sont réécrites en arrière-plan ; le tampon reste ainsi propre et rechargeable.
+        """
+        self._read_only = read_only
+        self.text_edit.setReadOnly(read_only or self.is_loading())
+
+    def _start_chunked_load(self, position=None, term=None):
+        self._loader = iter_markdown_chunks(self.file_path)
+        self._load_hash = hashlib.blake2b(digest_size=16)
+        self._pending_goto = (position, term) if position is not None else None
+        self.text_edit.blockSignals(True)
+        self.text_edit.clear()
+        self.text_edit.blockSignals(False)
+        # Lecture seule et sans historique d'annulation pendant le remplissage
+        self.text_edit.setReadOnly(True)
+        self.text_edit.setUndoRedoEnabled(False)
+        self.load_timer.start()
+
+    def _load_next_chunk(self):
+        try:
+            chunk = next(self._loader)
+        except StopIteration:
+            self._finish_chunked_load()
+            return
+        except OSError as e:
+            self.status_label.setText(t("load_error", error=e))
+            self._finish_chunked_load(failed=True)
+            return
+        self._load_hash.update(chunk.encode("utf-8", "surrogatepass"))
+        cursor = QTextCursor(self.text_edit.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        self.text_edit.blockSignals(True)
+        cursor.insertText(chunk)
+        self.text_edit.blockSignals(False)
+
+    def _finish_chunked_load(self, failed=False):
+        self.load_timer.stop()
+        self._loader = None
+        self.text_edit.setUndoRedoEnabled(True)
+        self.text_edit.setReadOnly(self._read_only)
+        self.text_edit.document().setModified(False)
+        # En cas d'échec, aucune empreinte : rien ne sera écrasé sans modification explicite
+        self._saved_digest = None if failed else self._load_hash.digest()
+        self._reset_journal()
+        pending, self._pending_goto = self._pending_goto, None
+        if pending and not failed:
+            self.goto_position(*pending)
+        self._schedule_preview()
+
+    def _cancel_chunked_load(self):
+        if self._loader is not None:
+            self.load_timer.stop()
+            self._loader.close()
+            self._loader = None
+            self._pending_goto = None
+            self.text_edit.setUndoRedoEnabled(True)
+            self.text_edit.setReadOnly(self._read_only)
+
+    def goto_position(self, position, term=None, content=None):
+        """Place le curseur à un offset Python et sélectionne `term` s'il est trouvé à proximité.
+
+        Avec `content`, l'offset est converti en unités Qt (UTF-16) ; sinon il sert de
+        borne basse, toujours inférieure ou égale à la position Qt réelle.
+        """
+        if content is not None:
+            # Qt compte en unités UTF-16 : un emoji occupe deux positions
+            qt_pos = len(content[:position].encode("utf-16-le")) // 2
+        else:
+            qt_pos = position
+        doc = self.text_edit.document()
+        cursor = None
+        if term:
+            # L'offset indexé peut avoir légèrement dérivé (fins de ligne) : on cherche autour
+            found = doc.find(term, max(0, qt_pos - 64))
+            if not found.isNull():
+                cursor = found
+        if cursor is None:
+            cursor = self.text_edit.textCursor()
+            cursor.setPosition(min(qt_pos, doc.characterCount() - 1))
+        self.text_edit.setTextCursor(cursor)
+        self.text_edit.ensureCursorVisible()
+        self.text_edit.setFocus()
+
+    def _disk_digest(self):
+        """Empreinte du contenu sur disque (lecture par morceaux, sans tout charger)."""
+        h = hashlib.blake2b(digest_size=16)
+        for chunk in iter_markdown_chunks(self.file_path):
+            h.update(chunk.encode("utf-8", "surrogatepass"))
+        return h.digest()
+
+    def reload_from_disk(self):
+        """Recharge la note si elle a changé sur disque et que le tampon est propre.
+
+        Le curseur et le défilement sont conservés autant que possible.
+        Renvoie True si le contenu a été remplacé.
+        """
+        if not self.file_path or self.is_dirty() or self.is_loading() or save_queue.has_pending(self.file_path):
+            return False
+        try:
+            if self._disk_digest() == self._saved_digest:
+                return False  # notre propre écriture
+        except OSError:
+            return False
+        position = self.text_edit.textCursor().position()
+        scroll = self.text_edit.verticalScrollBar().value()
+        if file_size(self.file_path) > LARGE_NOTE_BYTES:
+            self._start_chunked_load(position)
+            return True
+        self._set_content(load_markdown(self.file_path))
+        cursor = self.text_edit.textCursor()
+        cursor.setPosition(min(position, self.text_edit.document().characterCount() - 1))
+        self.text_edit.setTextCursor(cursor)
+        self.text_edit.verticalScrollBar().setValue(scroll)
+        return True
+
+    def detach(self, save=False):
+        """Ferme la note courante (sauvegarde optionnelle) ; l'onglet le plus récent prend le relais."""
         if not self.file_path:
             return
+        if save:
+            self.flush()
+        self._close_current()
+
+    @perf.timed("editor.autosave")
+    def save_file(self):
+        """Sauvegarde le contenu courant s'il a changé depuis la dernière écriture."""
+        self._stop_timers()
+        if not self.is_dirty():
+            return
         content = self.text_edit.toPlainText()
-        save_markdown(self.file_path, content)
+        digest = self._digest(content)
+        if digest != self._saved_digest:
+            self.status_label.clear()
+            save_markdown_async(self.file_path, content)
+        tab = self._tabs.get(self.file_path)
+        if tab is not None and tab.journal is not None:
+            # Compaction : le journal repart du contenu écrit (l'ancien segment disparaît
+            # dès que l'écriture est confirmée)
+            tab.journal.rotate(digest.hex(), confirmed=digest == self._saved_digest)
+        self._saved_digest = digest
+        self.text_edit.document().setModified(False)
+
+    def flush(self):
+        """Écrit immédiatement les modifications en attente et attend la fin de l'écriture."""
+        self.save_file()
+        save_queue.flush()
+
+    # ----------------------------- Images -----------------------------
+
+    def _insert_images(self, mime):
+        """Range les images collées / déposées dans les pièces jointes et insère leurs liens Markdown."""
+        if not self.file_path or self.is_loading() or self._read_only:
+            return False
+        links = []
+        try:
+            for url in mime.urls():
+                path = url.toLocalFile() if url.isLocalFile() else ""
+                if path and attachments.is_image(path) and os.path.isfile(path):
+                    stored = attachments.store_file(self.file_path, path)
+                    links.append(attachments.markdown_image(self.file_path, stored,
+                                                            os.path.splitext(os.path.basename(path))[0]))
+            if not links and mime.hasImage():
+                image = mime.imageData()
+                if image is None or image.isNull():
+                    return False
+                buffer = QBuffer()
+                buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+                image.save(buffer, "PNG")
+                stored = attachments.store_bytes(self.file_path, bytes(buffer.data()), ".png")
+                links.append(attachments.markdown_image(self.file_path, stored))
+        except OSError as e:
+            self.status_label.setText(t("attachment_error", error=e))
+            return True
+        if not links:
+            return False
+        self.text_edit.insertPlainText("\n".join(links))
+        return True
+
+    # ----------------------------- Liens wiki -----------------------------
+
+    def eventFilter(self, obj, event):
+        if (obj is self.text_edit.viewport() and event.type() == QEvent.Type.MouseButtonRelease
+                and event.button() == Qt.MouseButton.LeftButton
+                and event.modifiers() & Qt.KeyboardModifier.ControlModifier):
+            cursor = self.text_edit.cursorForPosition(event.position().toPoint())
+            target = link_at(cursor.block().text(), cursor.positionInBlock())
+            if target:
+                self.link_activated.emit(target)
+                return True
+        return super().eventFilter(obj, event)
+
+    # ----------------------------- Aperçu -----------------------------
+
+    def set_preview_visible(self, visible):
+        """Affiche ou masque l'aperçu rendu à droite du texte."""
+        if visible and self.preview is None:
+            from .preview import MarkdownPreview
+            self.preview = MarkdownPreview()
+            self.splitter.addWidget(self.preview)
+        if self.preview is None:
+            return
+        self.preview.setVisible(visible)
+        if visible:
+            self.refresh_preview()
+        else:
+            self.preview_timer.stop()
+
+    def is_preview_visible(self):
+        return self.preview is not None and self.preview.isVisible()
+
+    def _schedule_preview(self):
+        if self.is_preview_visible() and not self.is_loading():
+            self.preview_timer.start()
+
+    def refresh_preview(self):
+        """Rend immédiatement les blocs modifiés depuis le dernier aperçu."""
+        self.preview_timer.stop()
+        if not self.is_preview_visible() or self.is_loading():
+            return
+        if self.file_path:
+            self.preview.set_base_path(os.path.dirname(self.file_path))
+        self.preview.update_text(self.text_edit.toPlainText())
+        self._sync_preview_scroll()
+
+    def _sync_preview_scroll(self, value=None):
+        if not self.is_preview_visible():
+            return
+        bar = self.text_edit.verticalScrollBar()
+        self.preview.scroll_to_ratio(bar.value() / bar.maximum() if bar.maximum() else 0.0)
+
+    def _on_save_failed(self, file_path, message):
+        self.status_label.setText(t("save_error", error=message))
+        if file_path == self.file_path:
+            # Le contenu n'est pas sur disque : la prochaine sauvegarde réessaiera
+            self._saved_digest = None
+            self.text_edit.document().setModified(True)
+        elif file_path in self._tabs and self._tabs[file_path].document is not None:
+            tab = self._tabs[file_path]
+            tab.saved_digest = None
+            tab.document.setModified(True)
 
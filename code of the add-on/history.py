@@ -0,0 +1,389 @@
+# history.py — historique des versions de chaque note
+# - Instantanés pris à la sauvegarde, à une cadence configurable ("history_interval", en secondes)
+# - Contenus adressés par empreinte (dédupliqués), stockés en deltas compressés
+#   contre la version précédente, avec une version complète régulière
+# - Rétention : tout pendant une heure, puis une version par heure, par jour, par semaine
+# - Stockage : <racine>/.ankinote/history/<id de la note>/ (log.json + objets .z)
+#
+# La sauvegarde ne fait qu'ajouter une entrée à une file : le calcul des deltas,
+# la compression et l'écriture ont lieu dans un thread dédié.
+
+import os, json, time, zlib, difflib, hashlib, queue, threading, uuid, atexit
+from . import storage, perf
+from .config import load_config
+
+HISTORY_DIR = os.path.join(".ankinote", "history")
+DEFAULT_INTERVAL = 300      # secondes entre deux instantanés d'une même note
+KEYFRAME_EVERY = 32         # longueur maximale d'une chaîne de deltas
+SHRINK_RATIO = 0.5          # note réduite de moitié : instantané immédiat (avant + après)
+PRUNE_EVERY = 3600          # élagage d'une note au plus une fois par heure
+
+# (âge maximal, pas) : plus récent que l'âge → une version par pas (0 = toutes)
+RETENTION = (
+    (3600, 0),
+    (86400, 3600),
+    (30 * 86400, 86400),
+    (365 * 86400, 7 * 86400),
+)
+
+
+def content_hash(content):
+    return hashlib.blake2b(content.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+# ----------------------------- Deltas -----------------------------
+# Un delta est une liste JSON : [début, fin] copie des lignes de la version de base,
+# une chaîne est insérée telle quelle.
+
+def make_delta(old, new):
+    a = old.splitlines(True)
+    b = new.splitlines(True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=len(a) > 2000)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(b[j1:j2]))
+    return ops
+
+
+def apply_delta(old, ops):
+    a = old.splitlines(True)
+    return "".join(op if isinstance(op, str) else "".join(a[op[0]:op[1]]) for op in ops)
+
+
+def thin_versions(versions, now):
+    """Versions conservées selon RETENTION (la plus récente l'est toujours)."""
+    kept, seen = [], set()
+    for i, version in enumerate(reversed(versions)):
+        age = now - version["time"]
+        for limit, step in RETENTION:
+            if age < limit:
+                break
+        else:
+            if i:
+                continue
+            limit, step = RETENTION[-1]
+        if step:
+            bucket = (limit, int(version["time"] // step))
+            if bucket in seen and i:
+                continue
+            seen.add(bucket)
+        kept.append(version)
+    kept.reverse()
+    return kept
+
+
+# ----------------------------- Stockage par racine -----------------------------
+
+class HistoryStore:
+    """Historique des notes d'une racine. Toutes les méthodes sont protégées par un verrou."""
+
+    def __init__(self, root_path):
+        self.root_path = root_path
+        self.base = os.path.join(root_path, HISTORY_DIR)
+        self.lock = threading.RLock()
+        self._index = None   # chemin relatif -> id de note
+        self._logs = {}      # id -> log chargé
+
+    def _rel(self, path):
+        return os.path.relpath(path, self.root_path).replace(os.sep, "/")
+
+    # --- Index chemin -> id ---
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(os.path.join(self.base, "index.json"), "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self):
+        storage.write_atomic(os.path.join(self.base, "index.json"), json.dumps(self._index))
+
+    def _note_id(self, path, create=False):
+        index = self._load_index()
+        rel = self._rel(path)
+        note_id = index.get(rel)
+        if note_id is None and create:
+            note_id = index[rel] = uuid.uuid4().hex[:16]
+            self._save_index()
+        return note_id
+
+    # --- Log d'une note : {"versions": [{"hash", "time", "size"}], "objects": {hash: [base, profondeur]}} ---
+    def _log(self, note_id):
+        log = self._logs.get(note_id)
+        if log is None:
+            try:
+                with open(os.path.join(self.base, note_id, "log.json"), "r", encoding="utf-8") as f:
+                    log = json.load(f)
+            except (OSError, ValueError):
+                log = {"versions": [], "objects": {}, "pruned": 0}
+            self._logs[note_id] = log
+        return log
+
+    def _save_log(self, note_id, log):
+        storage.write_atomic(os.path.join(self.base, note_id, "log.json"), json.dumps(log))
+
+    # --- Objets ---
+    def _object_path(self, note_id, digest):
+        return os.path.join(self.base, note_id, digest + ".z")
+
+    def _write_object(self, note_id, digest, payload):
+        path = self._object_path(note_id, digest)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(zlib.compress(payload.encode("utf-8", "surrogatepass"), 6))
+        os.replace(tmp_path, path)
+
+    def _read_object(self, note_id, digest):
+        with open(self._object_path(note_id, digest), "rb") as f:
+            return zlib.decompress(f.read()).decode("utf-8", "surrogatepass")
+
+    def _content(self, note_id, log, digest):
+        chain = []
+        while digest is not None:
+            chain.append(digest)
+            digest = log["objects"][digest][0]
+        content = self._read_object(note_id, chain.pop())
+        while chain:
+            content = apply_delta(content, json.loads(self._read_object(note_id, chain.pop())))
+        return content
+
+    def _store(self, note_id, log, digest, content, base):
+        """Écrit `content` en delta contre `base` (ou complet si la chaîne est trop longue)."""
+        if base is not None and log["objects"][base][1] + 1 < KEYFRAME_EVERY:
+            delta = json.dumps(make_delta(self._content(note_id, log, base), content), ensure_ascii=False)
+            if len(delta) < len(content):
+                self._write_object(note_id, digest, delta)
+                log["objects"][digest] = [base, log["objects"][base][1] + 1]
+                return
+        self._write_object(note_id, digest, content)
+        log["objects"][digest] = [None, 0]
+
+    # --- API ---
+    def last_version(self, path):
+        with self.lock:
+            note_id = self._note_id(path)
+            if note_id is None:
+                return None
+            versions = self._log(note_id)["versions"]
+            return versions[-1] if versions else None
+
+    @perf.timed("history.snapshot")
+    def snapshot(self, path, content, when=None):
+        """Enregistre une version (sans effet si identique à la dernière). Renvoie True si ajoutée."""
+        when = time.time() if when is None else when
+        digest = content_hash(content)
+        with self.lock:
+            note_id = self._note_id(path, create=True)
+            log = self._log(note_id)
+            versions = log["versions"]
+            if versions and versions[-1]["hash"] == digest:
+                return False
+            os.makedirs(os.path.join(self.base, note_id), exist_ok=True)
+            if digest not in log["objects"]:
+                self._store(note_id, log, digest, content, versions[-1]["hash"] if versions else None)
+            versions.append({"hash": digest, "time": when, "size": len(content)})
+            if when - log.get("pruned", 0) >= PRUNE_EVERY:
+                self._prune(note_id, log, when)
+            self._save_log(note_id, log)
+            return True
+
+    def versions(self, path):
+        """Versions d'une note, de la plus ancienne à la plus récente."""
+        with self.lock:
+            note_id = self._note_id(path)
+            return list(self._log(note_id)["versions"]) if note_id else []
+
+    def read_version(self, path, digest):
+        with self.lock:
+            note_id = self._note_id(path)
+            if note_id is None:
+                raise KeyError(digest)
+            return self._content(note_id, self._log(note_id), digest)
+
+    def rename(self, old_path, new_path):
+        """Les notes renommées (ou déplacées avec leur dossier) gardent leur historique."""
+        with self.lock:
+            index = self._load_index()
+            old_rel, new_rel = self._rel(old_path), self._rel(new_path)
+            changed = False
+            for rel in list(index):
+                if rel == old_rel or rel.startswith(old_rel + "/"):
+                    index[new_rel + rel[len(old_rel):]] = index.pop(rel)
+                    changed = True
+            if changed:
+                self._save_index()
+
+    def _prune(self, note_id, log, now):
+        """Applique RETENTION puis réécrit les objets dont la base a disparu."""
+        log["pruned"] = now
+        kept = thin_versions(log["versions"], now)
+        if len(kept) == len(log["versions"]):
+            return
+        order = []
+        for version in kept:
+            if version["hash"] not in order:
+                order.append(version["hash"])
+        # Un objet ne garde son encodage que si sa base le précède parmi les conservés
+        rewrite, position = {}, {digest: i for i, digest in enumerate(order)}
+        for i, digest in enumerate(order):
+            base = log["objects"][digest][0]
+            if base is not None and position.get(base, i) >= i:
+                rewrite[digest] = self._content(note_id, log, digest)
+        for i, digest in enumerate(order):
+            if digest in rewrite:
+                self._store(note_id, log, digest, rewrite[digest], order[i - 1] if i else None)
+        for digest in list(log["objects"]):
+            if digest not in position:
+                del log["objects"][digest]
+                try:
+                    os.remove(self._object_path(note_id, digest))
+                except OSError:
+                    pass
+        log["versions"] = kept
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def store_for(path):
+    """HistoryStore de la racine ouverte contenant `path` (None hors notebook)."""
+    root = storage.backend_for(path).root_path
+    if root is None:
+        return None
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = _stores[root] = HistoryStore(root)
+    return store
+
+
+# ----------------------------- Enregistreur en arrière-plan -----------------------------
+
+class HistoryRecorder:
+    """Reçoit les sauvegardes (file sans verrou côté appelant) et décide des instantanés.
+
+    Entre deux instantanés, la dernière version reçue est gardée en mémoire :
+    elle est enregistrée à l'échéance suivante, à la fermeture, ou juste avant
+    une sauvegarde qui vide la note (tout sélectionner + supprimer).
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._held = {}   # chemin -> (contenu, date) pas encore enregistré
+        self._sizes = {}  # chemin -> taille de la dernière version vue
+        self.interval = None
+
+    def _interval(self):
+        if self.interval is None:
+            try:
+                self.interval = float(load_config().get("history_interval", DEFAULT_INTERVAL))
+            except (TypeError, ValueError):
+                self.interval = DEFAULT_INTERVAL
+        return self.interval
+
+    def _put(self, item):
+        self._queue.put(item)
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="NotebookHistory", daemon=True)
+                    self._thread.start()
+
+    def on_storage_event(self, event, path, extra=None):
+        if event == "saved" and self._interval() > 0:
+            self._put(("saved", path, extra, time.time()))
+        elif event == "renamed":
+            self._put(("renamed", path, extra, None))
+
+    def flush(self, commit_held=True):
+        """Traite la file ; avec commit_held, enregistre aussi les versions gardées en mémoire."""
+        if self._thread is None:
+            return
+        if commit_held:
+            self._queue.put(("commit", None, None, None))
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            kind, path, extra, when = self._queue.get()
+            try:
+                if kind == "saved":
+                    self._on_saved(path, extra, when)
+                elif kind == "renamed":
+                    self._on_renamed(path, extra)
+                elif kind == "commit":
+                    for held_path, (content, held_when) in list(self._held.items()):
+                        self._snapshot(held_path, content, held_when)
+                    self._held.clear()
+            except Exception as e:
+                print(f"[Notebook] Erreur d'historique : {e}")
+            finally:
+                self._queue.task_done()
+
+    def _snapshot(self, path, content, when):
+        store = store_for(path)
+        if store is not None:
+            store.snapshot(path, content, when)
+
+    def _on_saved(self, path, content, when):
+        store = store_for(path)
+        if store is None:
+            return
+        last = store.last_version(path)
+        previous_size = self._sizes.get(path, last["size"] if last else None)
+        self._sizes[path] = len(content)
+        held = self._held.pop(path, None)
+        if previous_size is not None and len(content) < previous_size * SHRINK_RATIO:
+            if held is not None:
+                store.snapshot(path, *held)
+            store.snapshot(path, content, when)
+            return
+        if last is None or when - last["time"] >= self._interval():
+            store.snapshot(path, content, when)
+        else:
+            self._held[path] = (content, when)
+
+    def _on_renamed(self, old_path, new_path):
+        store = store_for(old_path)
+        if store is not None and store is store_for(new_path):
+            store.rename(old_path, new_path)
+        prefix = os.path.join(old_path, "")
+        for mapping in (self._held, self._sizes):
+            for path in list(mapping):
+                if path == old_path or path.startswith(prefix):
+                    mapping[new_path + path[len(old_path):]] = mapping.pop(path)
+
+
+recorder = HistoryRecorder()
+storage.add_listener(recorder.on_storage_event)
+atexit.register(recorder.flush)
+
+
+def flush_history():
+    """Enregistre les versions en attente (fermeture du dock)."""
+    recorder.flush()
+
+
+def list_versions(path):
+    recorder.flush(commit_held=False)
+    store = store_for(path)
+    return store.versions(path) if store is not None else []
+
+
+def read_version(path, digest):
+    return store_for(path).read_version(path, digest)
+
+
+def snapshot_now(path, content):
+    """Instantané immédiat (avant une restauration, par exemple)."""
+    recorder.flush(commit_held=False)
+    store = store_for(path)
+    return store is not None and store.snapshot(path, content)
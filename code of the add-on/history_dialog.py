@@ -0,0 +1,120 @@
+# history_dialog.py — navigateur de l'historique d'une note
+# - Liste des versions (la plus récente en haut), différences colorées
+# - Comparaison avec la note actuelle ou avec la version précédente, restauration
+
+import os, html, time, difflib
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem, QTextBrowser,
+    QPushButton, QComboBox, QSplitter, QMessageBox
+)
+from PyQt6.QtCore import Qt
+from . import history, storage
+from .lang import t
+
+DIFF_CONTEXT = 3
+
+
+def diff_html(old, new):
+    """Différences unifiées en HTML (ajouts en vert, suppressions en rouge)."""
+    lines = list(difflib.unified_diff(old.splitlines(), new.splitlines(), lineterm="", n=DIFF_CONTEXT))
+    if not lines:
+        return f"<i>{html.escape(t('history_identical'))}</i>"
+    out = []
+    for line in lines[2:]:
+        text = html.escape(line)
+        if line.startswith("@@"):
+            out.append(f"<span style='color:#888'>{text}</span>")
+        elif line.startswith("+"):
+            out.append(f"<span style='background:#e6ffec'>{text}</span>")
+        elif line.startswith("-"):
+            out.append(f"<span style='background:#ffebe9'>{text}</span>")
+        else:
+            out.append(text)
+    return "<pre style='font-family:monospace'>" + "\n".join(out) + "</pre>"
+
+
+class HistoryDialog(QDialog):
+    """Versions d'une note ; `on_restore(contenu)` est appelé pour restaurer."""
+
+    def __init__(self, parent, file_path, on_restore):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.on_restore = on_restore
+        self.versions = list(reversed(history.list_versions(file_path)))
+        self._cache = {}
+        self.current = storage.load_markdown(file_path)
+        self.setWindowTitle(t("history_title", name=os.path.basename(file_path)))
+        self.resize(820, 520)
+
+        self.list = QListWidget()
+        for version in self.versions:
+            stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(version["time"]))
+            item = QListWidgetItem(t("history_entry", date=stamp, size=version["size"]))
+            self.list.addItem(item)
+        self.list.currentRowChanged.connect(self.refresh_diff)
+
+        self.compare = QComboBox()
+        self.compare.addItems([t("history_vs_current"), t("history_vs_previous")])
+        self.compare.currentIndexChanged.connect(lambda _: self.refresh_diff(self.list.currentRow()))
+
+        self.view = QTextBrowser()
+        self.view.setLineWrapMode(QTextBrowser.LineWrapMode.NoWrap)
+
+        self.btn_restore = QPushButton(t("history_restore"))
+        self.btn_restore.clicked.connect(self.restore)
+        btn_close = QPushButton(t("close"))
+        btn_close.clicked.connect(self.reject)
+
+        split = QSplitter(Qt.Orientation.Horizontal)
+        split.addWidget(self.list)
+        split.addWidget(self.view)
+        split.setSizes([240, 580])
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.compare)
+        buttons.addStretch()
+        buttons.addWidget(self.btn_restore)
+        buttons.addWidget(btn_close)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(split)
+        layout.addLayout(buttons)
+
+        self.btn_restore.setEnabled(bool(self.versions))
+        if self.versions:
+            self.list.setCurrentRow(0)
+        else:
+            self.view.setHtml(f"<i>{html.escape(t('history_empty'))}</i>")
+
+    def _content(self, row):
+        digest = self.versions[row]["hash"]
+        if digest not in self._cache:
+            self._cache[digest] = history.read_version(self.file_path, digest)
+        return self._cache[digest]
+
+    def refresh_diff(self, row):
+        if row < 0:
+            return
+        try:
+            content = self._content(row)
+            if self.compare.currentIndex() == 0:
+                old, new = content, self.current
+            else:
+                old = self._content(row + 1) if row + 1 < len(self.versions) else ""
+                new = content
+        except (OSError, KeyError, ValueError) as e:
+            self.view.setPlainText(f"{t('error')} : {e}")
+            return
+        self.view.setHtml(diff_html(old, new))
+
+    def restore(self):
+        row = self.list.currentRow()
+        if row < 0:
+            return
+        try:
+            content = self._content(row)
+        except (OSError, KeyError, ValueError) as e:
+            QMessageBox.warning(self, t("error"), f"{e}")
+            return
+        self.on_restore(content)
+        self.accept()
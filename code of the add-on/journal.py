@@ -0,0 +1,298 @@
+# journal.py — journal des modifications des notes ouvertes (reprise après un arrêt brutal)
+# - Chaque modification du document (position, longueur retirée, texte inséré) est ajoutée
+#   à la fin d'un fichier : quelques octets par frappe au lieu d'une réécriture de la note
+# - Compaction : à chaque sauvegarde de la note, un nouveau segment commence ; les segments
+#   précédents sont supprimés dès que l'écriture de la note est confirmée (notification "saved")
+# - Au démarrage, un journal resté sur disque est rejoué sur la note : si le résultat
+#   diffère du fichier, la restauration est proposée
+# - Stockage : <racine>/.ankinote/journal/<id>.<n>.log (une ligne JSON par enregistrement)
+#
+# Les positions sont celles de QTextDocument (unités UTF-16) : le rejeu se fait en UTF-16.
+
+import os, json, time, uuid, threading
+from . import storage, perf
+from .history import content_hash
+
+JOURNAL_DIR = os.path.join(".ankinote", "journal")
+# Notes hors de toute racine ouverte
+FALLBACK_DIR = os.path.join(os.path.expanduser("~"), ".anki_notebook_cache", "journal")
+JOURNAL_VERSION = 1
+# Délai maximal entre deux fsync (les données sont confiées au système à chaque ajout)
+FSYNC_SECONDS = 2.0
+
+_journals = {}  # id -> NoteJournal des notes ouvertes dans cette session
+_journals_lock = threading.Lock()
+
+
+def journal_dir(path):
+    root = storage.backend_for(path).root_path
+    return os.path.join(root, JOURNAL_DIR) if root else FALLBACK_DIR
+
+
+def _under(path, prefix):
+    return path == prefix or path.startswith(os.path.join(prefix, ""))
+
+
+class NoteJournal:
+    """Journal d'une note ouverte, en segments successifs.
+
+    Chaque segment commence par l'empreinte du contenu sur lequel il s'applique
+    (`base`). Le fichier d'un segment n'est créé qu'à la première modification.
+    """
+
+    def __init__(self, path, base):
+        self.path = path
+        self.id = uuid.uuid4().hex[:16]
+        self.dir = journal_dir(path)
+        self.ok = True        # False après une erreur d'écriture (l'éditeur sauvegarde alors plus souvent)
+        self.size = 0         # octets du segment courant
+        self._lock = threading.Lock()
+        self._segments = []   # [numéro, empreinte de base, fichier créé ?]
+        self._file = None
+        self._synced = 0.0
+        self._closed = False
+        self._confirmed = base
+        self._new_segment(base)
+        with _journals_lock:
+            _journals[self.id] = self
+
+    def _segment_path(self, seq):
+        return os.path.join(self.dir, f"{self.id}.{seq}.log")
+
+    def _new_segment(self, base):
+        seq = self._segments[-1][0] + 1 if self._segments else 0
+        self._segments.append([seq, base, False])
+        self.size = 0
+
+    def _write(self, record):
+        if not self.ok or self._closed:
+            return
+        try:
+            if self._file is None:
+                segment = self._segments[-1]
+                os.makedirs(self.dir, exist_ok=True)
+                self._file = open(self._segment_path(segment[0]), "a", encoding="utf-8",
+                                  errors="surrogatepass", newline="\n")
+                segment[2] = True
+                header = {"v": JOURNAL_VERSION, "path": self.path, "base": segment[1]}
+                self._file.write(json.dumps(header, ensure_ascii=False) + "\n")
+            line = json.dumps(record, ensure_ascii=False) + "\n"
+            self._file.write(line)
+            self._file.flush()
+            self.size += len(line)
+            now = time.monotonic()
+            if now - self._synced >= FSYNC_SECONDS:
+                os.fsync(self._file.fileno())
+                self._synced = now
+            if perf.ENABLED:
+                perf.count("bytes_written", len(line))
+        except OSError as e:
+            print(f"[Notebook] Erreur d'écriture du journal : {e}")
+            self.ok = False
+
+    def append(self, position, removed, text):
+        """Enregistre une modification : `removed` unités retirées à `position`, puis `text` inséré."""
+        with self._lock:
+            self._write([position, removed, text])
+
+    def moved(self, new_path):
+        """La note a été renommée ou déplacée : les enregistrements suivants la suivent."""
+        with self._lock:
+            self.path = new_path
+            if self._file is not None:
+                self._write({"path": new_path})
+
+    def rotate(self, base, confirmed=False):
+        """La note vient d'être envoyée à l'écriture avec le contenu d'empreinte `base`.
+
+        `confirmed` : ce contenu est déjà sur disque (rien n'a été écrit, ou note rechargée).
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._close_file()
+            self._new_segment(base)
+        if confirmed:
+            self.confirm(base)
+
+    def confirm(self, digest):
+        """Le contenu d'empreinte `digest` est sur disque : les segments antérieurs sont inutiles."""
+        with self._lock:
+            index = next((i for i, s in enumerate(self._segments) if s[1] == digest), None)
+            if index is None:
+                return
+            self._confirmed = digest
+            obsolete, self._segments = self._segments[:index], self._segments[index:]
+            if self._closed and len(self._segments) == 1 and not self._segments[0][2]:
+                obsolete, self._segments = obsolete + self._segments, []
+        self._remove(obsolete)
+        if not self._segments:
+            self._forget()
+
+    def close(self, discard=False):
+        """Note fermée : les segments non confirmés restent sur disque jusqu'à la confirmation."""
+        with self._lock:
+            self._close_file()
+            self._closed = True
+            last = self._segments[-1] if self._segments else None
+            if discard or last is None or (last[1] == self._confirmed and not last[2]):
+                obsolete, self._segments = self._segments, []
+            else:
+                obsolete = []
+        self._remove(obsolete)
+        if not self._segments:
+            self._forget()
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def _remove(self, segments):
+        for seq, _, created in segments:
+            if created:
+                try:
+                    os.remove(self._segment_path(seq))
+                except OSError:
+                    pass
+
+    def _forget(self):
+        with _journals_lock:
+            _journals.pop(self.id, None)
+
+
+def _on_storage_event(event, path, extra):
+    with _journals_lock:
+        journals = list(_journals.values())
+    if event == "saved":
+        digest = None
+        for journal in journals:
+            if journal.path == path:
+                digest = digest or content_hash(extra)
+                journal.confirm(digest)
+    elif event == "deleted":
+        for journal in journals:
+            if _under(journal.path, path):
+                journal.close(discard=True)
+
+
+storage.add_listener(_on_storage_event)
+
+
+# ----------------------------- Reprise -----------------------------
+
+def replay(content, records):
+    """Applique des enregistrements [position, retirés, texte] (positions UTF-16) à `content`."""
+    data = bytearray(content.encode("utf-16-le", "surrogatepass"))
+    for position, removed, text in records:
+        start = min(max(position, 0), len(data) // 2) * 2
+        end = min(start + max(removed, 0) * 2, len(data))
+        data[start:end] = text.encode("utf-16-le", "surrogatepass")
+    return data.decode("utf-16-le", "surrogatepass")
+
+
+def _read_segment(file_path):
+    """(en-tête, enregistrements, dernier chemin) ; une dernière ligne incomplète est ignorée."""
+    header, records, path = None, [], None
+    with open(file_path, "r", encoding="utf-8", errors="surrogatepass", newline="\n") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break  # écriture interrompue par l'arrêt
+            try:
+                item = json.loads(line)
+            except ValueError:
+                break
+            if header is None:
+                if not isinstance(item, dict) or item.get("v") != JOURNAL_VERSION:
+                    return None, [], None
+                header, path = item, item.get("path")
+            elif isinstance(item, dict):
+                path = item.get("path", path)
+            elif isinstance(item, list) and len(item) == 3:
+                records.append(item)
+    return header, records, path
+
+
+class Recovery:
+    """Contenu reconstruit d'une note à partir d'un journal resté sur disque."""
+
+    def __init__(self, path, content, files):
+        self.path = path
+        self.content = content
+        self.files = files
+
+    def discard(self):
+        for file_path in self.files:
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+
+    def apply(self):
+        """Écrit le contenu reconstruit dans la note puis supprime le journal."""
+        if storage.save_markdown(self.path, self.content):
+            self.discard()
+            return True
+        return False
+
+
+@perf.timed("journal.recover")
+def pending_recoveries(root_path):
+    """Journaux laissés par une session interrompue sous cette racine.
+
+    Les journaux sans effet (contenu identique à la note) sont supprimés ; les
+    autres sont renvoyés (Recovery) pour que l'utilisateur choisisse.
+    """
+    base = os.path.join(root_path, JOURNAL_DIR)
+    try:
+        names = os.listdir(base)
+    except OSError:
+        return []
+    with _journals_lock:
+        active = set(_journals)
+    groups = {}
+    for name in names:
+        parts = name.split(".")
+        if len(parts) != 3 or parts[2] != "log" or not parts[1].isdigit() or parts[0] in active:
+            continue
+        groups.setdefault(parts[0], []).append((int(parts[1]), os.path.join(base, name)))
+    result = []
+    for journal_id, segments in groups.items():
+        segments.sort()
+        files = [file_path for _, file_path in segments]
+        recovery = _recover(files)
+        if recovery is None:
+            Recovery(None, None, files).discard()
+        else:
+            result.append(recovery)
+    return result
+
+
+def _recover(files):
+    segments, path = [], None
+    for file_path in files:
+        try:
+            header, records, segment_path = _read_segment(file_path)
+        except OSError:
+            continue
+        if header is not None:
+            segments.append((header.get("base"), records))
+            path = segment_path or path
+    if not path or not storage.exists(path):
+        return None  # note supprimée depuis
+    try:
+        content = storage.load_markdown(path)
+    except OSError:
+        return None
+    digest = on_disk = content_hash(content)
+    for base, records in segments:
+        if base != digest:
+            continue  # segment déjà compacté dans la note (ou chaîne rompue)
+        content = replay(content, records)
+        digest = content_hash(content)
+    if digest == on_disk:
+        return None
+    return Recovery(path, content, files)
@@ -2,10 +2,11 @@
 
 import json, os
 CONFIG_LANG_PATH = os.path.join(os.path.expanduser("~"), ".anki_notebook_lang.json")
-LANG = "fr"
+LANG = None  # lue au premier usage : aucune lecture disque au démarrage d'Anki
 
 def load_language():
     global LANG
+    LANG = "fr"
     if os.path.exists(CONFIG_LANG_PATH):
         try:
             with open(CONFIG_LANG_PATH, "r", encoding="utf-8") as f:
@@ -34,6 +35,19 @@ translations = {
         "rename": "✏️ Renommer",
         "delete": "🗑️ Supprimer",
         "confirm_delete": "Supprimer « {name} » ?",
+        "confirm_delete_count": "Supprimer ces {count} éléments ?",
+        "delete_count": "🗑️ Supprimer ({count})",
+        "move_to": "📁 Déplacer vers…",
+        "move_outside_root": "Choisissez un dossier du notebook.",
+        "move_across_storage": "Impossible de déplacer entre une racine SQLite et une autre racine.",
+        "batch_rename": "✏️ Renommer la sélection…",
+        "batch_rename_label": "Nouveau nom ({{name}} : nom actuel, {{n}} : numéro) :",
+        "invalid_name": "Nom invalide : « {name} »",
+        "moving": "Déplacement…",
+        "renaming": "Renommage…",
+        "deleting": "Suppression…",
+        "job_running": "Une opération est déjà en cours.",
+        "batch_failures": "{count} élément(s) n'ont pas pu être traités :",
         "delete_error": "Impossible de supprimer le fichier",
         "updated_folder": "Dossier mis à jour",
         "choose_folder": "Choisir un dossier",
@@ -41,11 +55,74 @@ translations = {
         "search": "Rechercher",
         "search_placeholder": "Tapez un mot-clé...",
         "search_label": "Rechercher dans toutes les notes :",
+        "search_root_unavailable": "En attente (racine occupée, lente ou illisible) : {names}",
+        "search_syntax": "mot1 mot2 (tous)  ·  a OR b  ·  -mot (exclu)  ·  \"phrase exacte\"  ·  /regex/\n"
+                         "name:titre  ·  content:texte  ·  in:dossier/  ·  -in:dossier/  ·  case:on",
         "save": "💾 Sauvegarder",
+        "preview": "👁 Aperçu",
+        "save_error": "⚠️ Échec de la sauvegarde : {error}",
+        "load_error": "⚠️ Échec du chargement : {error}",
+        "attachment_error": "⚠️ Impossible d'enregistrer l'image : {error}",
         "placeholder_note": "Écris tes notes ici...",
         "new_name": "Nouveau nom :",
         "error": "Erreur",
-        "change_dir": "📁 Changer le dossier"
+        "change_dir": "📁 Changer le dossier",
+        "change_root": "Remplacer par un autre dossier…",
+        "add_root": "➕ Ajouter un dossier racine…",
+        "remove_root": "Retirer « {name} » du notebook",
+        "root_overlap": "Ce dossier est déjà une racine, se trouve dans une racine ou en contient une.",
+        "quick_open": "Ouverture rapide",
+        "quick_open_button": "⚡ Aller à…",
+        "quick_open_placeholder": "Nom ou chemin de la note (recherche floue)...",
+        "quick_open_indexing": "Indexation des chemins en cours…",
+        "menu_perf": "📊 Performances du Notebook",
+        "perf_title": "Performances du Notebook",
+        "perf_enable": "Activer l'instrumentation",
+        "perf_operation": "Opération",
+        "perf_reset": "Remettre à zéro",
+        "perf_bytes": "Octets lus : {read} — écrits : {written}",
+        "perf_profile": "⏺ Profiler (cProfile)",
+        "perf_operations": "prochaines opérations",
+        "perf_profiling": "Profilage des {count} prochaines opérations…",
+        "perf_profile_saved": "Profil enregistré : {path}",
+        "storage": "🗄️ Stockage",
+        "convert_to_sqlite": "Convertir en base SQLite…",
+        "export_to_files": "Exporter en fichiers Markdown…",
+        "folder_not_empty": "Choisissez un dossier vide, différent du notebook actuel.",
+        "copying": "Copie des notes…",
+        "cancel": "Annuler",
+        "copy_done": "{count} notes copiées vers :\n{path}\n\nOuvrir ce notebook maintenant ?",
+        "history": "🕘 Historique…",
+        "history_title": "Historique — {name}",
+        "history_entry": "{date} — {size} caractères",
+        "history_vs_current": "Comparer avec la note actuelle",
+        "history_vs_previous": "Comparer avec la version précédente",
+        "history_restore": "Restaurer cette version",
+        "history_restore_failed": "Impossible de restaurer cette version.",
+        "recovery": "Récupération",
+        "recovery_found": "Des modifications de « {name} » n'avaient pas été enregistrées "
+                          "(fermeture inattendue d'Anki).\nLes restaurer ?",
+        "recovery_failed": "Impossible de restaurer les modifications de « {name} ».",
+        "history_identical": "Aucune différence.",
+        "history_empty": "Aucune version enregistrée pour cette note.",
+        "close": "Fermer",
+        "import_folder": "Importer un dossier…",
+        "import_zip": "Importer une archive zip…",
+        "import_here": "📥 Importer ici…",
+        "export_zip": "📦 Exporter en zip…",
+        "importing": "Import des notes…",
+        "exporting": "Export des notes…",
+        "import_done": "{count} notes importées dans :\n{path}",
+        "import_failures": "{count} fichiers n'ont pas pu être importés :",
+        "export_done": "{count} fichiers exportés vers :\n{path}",
+        "backlinks": "🔗 Rétroliens",
+        "link_create": "La note « {name} » n'existe pas. La créer ?",
+        "link_rewrite": "{count} notes contiennent un lien vers cette note. Mettre ces liens à jour ?",
+        "sync_cards": "🃏 Cartes",
+        "sync_cards_tip": "Créer / mettre à jour les cartes Anki des blocs Q: / A: et {{{{c1::…}}}}",
+        "sync_cards_undo": "Synchroniser les cartes du Notebook",
+        "sync_cards_no_collection": "Aucune collection Anki n'est ouverte.",
+        "sync_cards_done": "Cartes créées : {added}\nMises à jour : {updated}\nInchangées : {unchanged}\nBlocs supprimés (notes marquées notebook::orphan) : {orphans}"
     },
     "en": {
         "dock_title": "Notebook",
@@ -60,6 +137,19 @@ translations = {
         "rename": "✏️ Rename",
         "delete": "🗑️ Delete",
         "confirm_delete": "Delete “{name}”?",
+        "confirm_delete_count": "Delete these {count} items?",
+        "delete_count": "🗑️ Delete ({count})",
+        "move_to": "📁 Move to…",
+        "move_outside_root": "Choose a folder inside the notebook.",
+        "move_across_storage": "Items cannot be moved between a SQLite root and another root.",
+        "batch_rename": "✏️ Rename selection…",
+        "batch_rename_label": "New name ({{name}}: current name, {{n}}: number):",
+        "invalid_name": "Invalid name: “{name}”",
+        "moving": "Moving…",
+        "renaming": "Renaming…",
+        "deleting": "Deleting…",
+        "job_running": "Another operation is already running.",
+        "batch_failures": "{count} item(s) could not be processed:",
         "delete_error": "Failed to delete file",
         "updated_folder": "Folder updated",
         "choose_folder": "Choose Folder",
@@ -67,28 +157,94 @@ translations = {
         "search": "Search",
         "search_placeholder": "Type a keyword...",
         "search_label": "Search across all notes:",
+        "search_root_unavailable": "Waiting for (busy, slow or unreadable root): {names}",
+        "search_syntax": "word1 word2 (all)  ·  a OR b  ·  -word (excluded)  ·  \"exact phrase\"  ·  /regex/\n"
+                         "name:title  ·  content:text  ·  in:folder/  ·  -in:folder/  ·  case:on",
         "save": "💾 Save",
+        "preview": "👁 Preview",
+        "save_error": "⚠️ Save failed: {error}",
+        "load_error": "⚠️ Load failed: {error}",
+        "attachment_error": "⚠️ Could not store the image: {error}",
         "placeholder_note": "Write your notes here...",
         "new_name": "New name:",
         "error": "Error",
-        "change_dir": "📁 Change Folder"
+        "change_dir": "📁 Change Folder",
+        "change_root": "Replace with another folder…",
+        "add_root": "➕ Add a root folder…",
+        "remove_root": "Remove “{name}” from the notebook",
+        "root_overlap": "This folder is already a root, lies inside a root or contains one.",
+        "quick_open": "Quick Open",
+        "quick_open_button": "⚡ Go to…",
+        "quick_open_placeholder": "Note name or path (fuzzy)...",
+        "quick_open_indexing": "Indexing paths…",
+        "menu_perf": "📊 Notebook Performance",
+        "perf_title": "Notebook Performance",
+        "perf_enable": "Enable instrumentation",
+        "perf_operation": "Operation",
+        "perf_reset": "Reset",
+        "perf_bytes": "Bytes read: {read} — written: {written}",
+        "perf_profile": "⏺ Profile (cProfile)",
+        "perf_operations": "next operations",
+        "perf_profiling": "Profiling the next {count} operations…",
+        "perf_profile_saved": "Profile saved: {path}",
+        "storage": "🗄️ Storage",
+        "convert_to_sqlite": "Convert to SQLite database…",
+        "export_to_files": "Export to Markdown files…",
+        "folder_not_empty": "Choose an empty folder other than the current notebook.",
+        "copying": "Copying notes…",
+        "cancel": "Cancel",
+        "copy_done": "{count} notes copied to:\n{path}\n\nOpen this notebook now?",
+        "history": "🕘 History…",
+        "history_title": "History — {name}",
+        "history_entry": "{date} — {size} characters",
+        "history_vs_current": "Compare with current note",
+        "history_vs_previous": "Compare with previous version",
+        "history_restore": "Restore this version",
+        "history_restore_failed": "Could not restore this version.",
+        "recovery": "Recovery",
+        "recovery_found": "Unsaved changes to “{name}” were found (Anki closed unexpectedly).\n"
+                          "Restore them?",
+        "recovery_failed": "Could not restore the changes to “{name}”.",
+        "history_identical": "No differences.",
+        "history_empty": "No saved versions for this note.",
+        "close": "Close",
+        "import_folder": "Import a folder…",
+        "import_zip": "Import a zip archive…",
+        "import_here": "📥 Import here…",
+        "export_zip": "📦 Export to zip…",
+        "importing": "Importing notes…",
+        "exporting": "Exporting notes…",
+        "import_done": "{count} notes imported into:\n{path}",
+        "import_failures": "{count} files could not be imported:",
+        "export_done": "{count} files exported to:\n{path}",
+        "backlinks": "🔗 Backlinks",
+        "link_create": "The note \"{name}\" does not exist. Create it?",
+        "link_rewrite": "{count} notes link to this note. Update those links?",
+        "sync_cards": "🃏 Cards",
+        "sync_cards_tip": "Create / update Anki cards from Q: / A: and {{{{c1::…}}}} blocks",
+        "sync_cards_undo": "Sync Notebook cards",
+        "sync_cards_no_collection": "No Anki collection is open.",
+        "sync_cards_done": "Cards created: {added}\nUpdated: {updated}\nUnchanged: {unchanged}\nRemoved blocks (notes tagged notebook::orphan): {orphans}"
     },
 }
 
+def current_language():
+    if LANG is None:
+        load_language()
+    return LANG
+
 def t(key, **kwargs):
-    value = translations.get(LANG, {}).get(key, key)
+    value = translations.get(current_language(), {}).get(key, key)
     return value.format(**kwargs)
 
 def get_language_label():
-    return "🌐 Langue : Français" if LANG == "fr" else "🌐 Language : English"
+    return "🌐 Langue : Français" if current_language() == "fr" else "🌐 Language : English"
 
 def toggle_language(action=None):
     global LANG
-    LANG = "en" if LANG == "fr" else "fr"
+    LANG = "en" if current_language() == "fr" else "fr"
     save_language()
     if action:
         action.setText(get_language_label())
     print(f"[Notebook] Langue changée : {LANG}")
 
-load_language()
-
@@ -0,0 +1,398 @@
+# links.py — liens wiki [[Note]] et rétroliens
+# - Index persistant des liens sortants de chaque note (<racine>/.ankinote/links.json)
+# - Validation au démarrage par mtime / taille, puis mise à jour à chaque sauvegarde
+# - Rétroliens : index inverse par nom de note, sans relire le notebook
+# - Réécriture des liens entrants quand une note est renommée
+
+import os, re, json, threading
+from . import storage
+
+INDEX_DIRNAME = ".ankinote"
+LINKS_FILENAME = "links.json"
+LINKS_VERSION = 1
+
+# [[cible]], [[cible#titre]], [[cible|alias]], [[dossier/cible]]
+LINK_RE = re.compile(r"\[\[([^\[\]|#\n]+)((?:#[^\[\]|\n]*)?(?:\|[^\[\]\n]*)?)\]\]")
+
+_indexes = {}  # racine normalisée -> LinkIndex
+_ready = {}    # racine normalisée -> threading.Event (validation initiale terminée)
+_stale = {}    # racine normalisée -> dossiers modifiés pendant la validation initiale
+_registry_lock = threading.Lock()
+
+_is_hidden = storage.is_hidden_name
+
+
+def normalize_target(target):
+    """Forme de comparaison d'une cible : minuscules, "/" comme séparateur, sans .md."""
+    target = target.strip().replace("\\", "/").strip("/").lower()
+    return target[:-3] if target.endswith(".md") else target
+
+
+def parse_links(text):
+    """Cibles normalisées (sans doublons, dans l'ordre) des liens d'un texte."""
+    seen = []
+    for match in LINK_RE.finditer(text):
+        target = normalize_target(match.group(1))
+        if target and target not in seen:
+            seen.append(target)
+    return seen
+
+
+def link_at(line, column):
+    """Cible brute du lien [[...]] qui couvre `column` dans `line`, sinon None."""
+    for match in LINK_RE.finditer(line):
+        if match.start() <= column <= match.end():
+            return match.group(1).strip()
+    return None
+
+
+def _stem(rel):
+    return normalize_target(rel).rsplit("/", 1)[-1]
+
+
+class LinkIndex:
+    """Liens sortants de chaque note d'une racine, avec l'index inverse par nom."""
+
+    def __init__(self, root_path):
+        self.root_path = os.path.normpath(root_path)
+        self.index_file = os.path.join(self.root_path, INDEX_DIRNAME, LINKS_FILENAME)
+        self.files = {}     # chemin relatif ("/") -> [mtime_ns, taille]
+        self.links = {}     # chemin relatif -> [cibles normalisées]
+        self._stems = {}    # nom de note -> {chemins relatifs}
+        self._inbound = {}  # nom ciblé -> {chemins relatifs des notes qui le citent}
+        self._lock = threading.RLock()
+        self._dirty = False
+
+    # ----------------------------- Chemins -----------------------------
+
+    def _rel(self, path):
+        rel = os.path.relpath(os.path.normpath(path), self.root_path)
+        if rel == os.curdir or rel.startswith(os.pardir):
+            return None
+        return rel.replace(os.sep, "/")
+
+    def full_path(self, rel):
+        return os.path.join(self.root_path, *rel.split("/"))
+
+    def contains(self, path):
+        return self._rel(path) is not None or os.path.normpath(path) == self.root_path
+
+    # ----------------------------- Persistance -----------------------------
+
+    def load(self):
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != LINKS_VERSION:
+            return
+        with self._lock:
+            for rel, meta in data.get("files", {}).items():
+                self._set(rel, meta, data.get("links", {}).get(rel, []))
+            self._dirty = False
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps({"version": LINKS_VERSION, "files": self.files, "links": self.links},
+                              ensure_ascii=False, separators=(",", ":"))
+            self._dirty = False
+        try:
+            storage.write_atomic(self.index_file, data)
+        except OSError as e:
+            self._dirty = True
+            print(f"[Notebook] Erreur d'écriture de l'index des liens : {e}")
+
+    def refresh(self):
+        """Valide l'index contre le disque et ne relit que les notes modifiées."""
+        found = {}
+        for full, mtime, size in storage.walk_notes(self.root_path):
+            rel = self._rel(full)
+            if rel is not None:
+                found[rel] = (mtime, size)
+        with self._lock:
+            for rel in [r for r in self.files if r not in found]:
+                self._drop(rel)
+        for rel, (mtime, size) in found.items():
+            meta = self.files.get(rel)
+            if not meta or meta[0] != mtime or meta[1] != size:
+                self.update_file(self.full_path(rel))
+
+    # ----------------------------- Mises à jour -----------------------------
+
+    def _set(self, rel, meta, targets):
+        self.files[rel] = meta
+        self.links[rel] = targets
+        self._stems.setdefault(_stem(rel), set()).add(rel)
+        for target in targets:
+            self._inbound.setdefault(target.rsplit("/", 1)[-1], set()).add(rel)
+        self._dirty = True
+
+    def _drop(self, rel):
+        if self.files.pop(rel, None) is None:
+            return
+        for target in self.links.pop(rel, ()):
+            sources = self._inbound.get(target.rsplit("/", 1)[-1])
+            if sources is not None:
+                sources.discard(rel)
+                if not sources:
+                    del self._inbound[target.rsplit("/", 1)[-1]]
+        stems = self._stems.get(_stem(rel))
+        if stems is not None:
+            stems.discard(rel)
+            if not stems:
+                del self._stems[_stem(rel)]
+        self._dirty = True
+
+    def update_file(self, path, content=None):
+        """(Ré)analyse les liens d'une note ; le contenu est relu s'il n'est pas fourni."""
+        rel = self._rel(path)
+        if rel is None or not rel.endswith(".md") or any(_is_hidden(p) for p in rel.split("/")):
+            return
+        st = storage.path_stat(path)
+        if content is None and st is not None and not st[2]:
+            content = storage.load_markdown(path)
+        with self._lock:
+            self._drop(rel)
+            if st is not None and not st[2]:
+                self._set(rel, [st[0], st[1]], parse_links(content))
+
+    def remove_path(self, path):
+        rel = self._rel(path)
+        if rel is None:
+            return
+        with self._lock:
+            for r in [r for r in self.files if r == rel or r.startswith(rel + "/")]:
+                self._drop(r)
+
+    def rename_path(self, old_path, new_path):
+        old_rel, new_rel = self._rel(old_path), self._rel(new_path)
+        if old_rel is None:
+            return
+        with self._lock:
+            moved = [(r, self.files[r], self.links[r]) for r in self.files
+                     if r == old_rel or r.startswith(old_rel + "/")]
+            for r, _, _ in moved:
+                self._drop(r)
+            if new_rel is None:
+                return
+            for r, meta, targets in moved:
+                self._set(new_rel + r[len(old_rel):], meta, targets)
+
+    def sync_dir(self, path):
+        """Changement externe dans un dossier (enfants directs, comme NotebookIndex.sync_dir)."""
+        rel_dir = self._rel(path)
+        if rel_dir is None and os.path.normpath(path) != self.root_path:
+            return
+        prefix = rel_dir + "/" if rel_dir else ""
+        listing = {name: is_dir for name, is_dir, _ in storage.list_dir(path) if not _is_hidden(name)}
+        with self._lock:
+            known = {}
+            for r in self.files:
+                if r.startswith(prefix):
+                    known.setdefault(r[len(prefix):].split("/", 1)[0], []).append(r)
+            for head, rels in known.items():
+                if head not in listing or listing[head] != (rels != [prefix + head]):
+                    for r in rels:
+                        self._drop(r)
+        for name, entry_is_dir in listing.items():
+            full = os.path.join(path, name)
+            if entry_is_dir:
+                if name not in known:
+                    for note, _, _ in storage.walk_notes(full):
+                        self.update_file(note)
+                continue
+            st = storage.path_stat(full) if name.endswith(".md") else None
+            meta = self.files.get(prefix + name)
+            if st is not None and (not meta or meta[0] != st[0] or meta[1] != st[1]):
+                self.update_file(full)
+
+    # ----------------------------- Requêtes -----------------------------
+
+    def resolve(self, target, source_path=None):
+        """Note désignée par une cible de lien (même dossier, puis chemin le plus court)."""
+        best = self._resolve(normalize_target(target), self._rel(source_path) if source_path else None)
+        return self.full_path(best) if best is not None else None
+
+    def _resolve(self, target, source_rel, renamed=None):
+        """Chemin relatif désigné par une cible normalisée, depuis la note `source_rel`.
+
+        `renamed` = (ancien, nouveau) chemin relatif : résolution telle qu'elle était
+        avant ce renommage (l'index, lui, est déjà à jour).
+        """
+        stem = target.rsplit("/", 1)[-1]
+        with self._lock:
+            candidates = set(self._stems.get(stem, ()))
+        if renamed is not None:
+            old_rel, new_rel = renamed
+            candidates.discard(new_rel)
+            if _stem(old_rel) == stem:
+                candidates.add(old_rel)
+        candidates = [r for r in candidates if self._matches(r, target)]
+        if not candidates:
+            return None
+        source_dir = os.path.dirname(source_rel or "")
+        return min(candidates, key=lambda r: (os.path.dirname(r) != source_dir, r.count("/"), r))
+
+    @staticmethod
+    def _matches(rel, target):
+        name = normalize_target(rel)
+        return "/" not in target or name == target or name.endswith("/" + target)
+
+    def backlinks(self, path):
+        """Notes dont au moins un lien désigne `path` (chemins complets, triés)."""
+        rel = self._rel(path)
+        if rel is None:
+            return []
+        stem = _stem(rel)
+        result = []
+        with self._lock:
+            sources = list(self._inbound.get(stem, ()))
+        for source in sources:
+            source_path = self.full_path(source)
+            for target in self.links.get(source, ()):
+                if target.rsplit("/", 1)[-1] == stem and self.resolve(target, source_path) == self.full_path(rel):
+                    result.append(source_path)
+                    break
+        return sorted(result, key=lambda p: p.lower())
+
+
+# ----------------------------- Réécriture après renommage -----------------------------
+
+def rewrite_links(sources, old_path, new_path, root_path):
+    """Remplace dans `sources` les liens vers `old_path` par des liens vers `new_path`.
+
+    Seuls les liens qui, depuis leur note, désignaient bien `old_path` avant le
+    renommage sont touchés ([[Note]] peut viser une autre note du même nom).
+    Les titres (#...) et alias (|...) sont conservés ; un lien qualifié par un
+    chemin garde la forme "dossier/note". Renvoie les notes modifiées.
+    """
+    index = get_link_index(root_path)
+    old_rel = index._rel(old_path)
+    new_rel = index._rel(new_path)
+    new_name = os.path.splitext(new_rel.rsplit("/", 1)[-1])[0]
+    changed = []
+    for source in sources:
+        source_rel = index._rel(source)  # emplacement d'avant le renommage
+        if os.path.normpath(source) == os.path.normpath(old_path):
+            source = new_path  # lien de la note vers elle-même
+        content = storage.load_markdown(source)
+
+        def replace(match):
+            target = normalize_target(match.group(1))
+            if index._resolve(target, source_rel, (old_rel, new_rel)) != old_rel:
+                return match.group(0)
+            name = os.path.splitext(new_rel)[0] if "/" in target else new_name
+            return f"[[{name}{match.group(2)}]]"
+
+        updated = LINK_RE.sub(replace, content)
+        if updated != content and storage.save_markdown(source, updated):
+            changed.append(source)
+    return changed
+
+
+# ----------------------------- Registre des index -----------------------------
+
+def get_link_index(root_path):
+    """Index des liens d'une racine (chargé et validé au premier appel, sûr entre threads)."""
+    key = os.path.normpath(root_path)
+    with _registry_lock:
+        index = _indexes.get(key)
+        created = index is None
+        if created:
+            index = _indexes[key] = LinkIndex(key)
+            _ready[key] = threading.Event()
+        ready = _ready[key]
+    if not created:
+        ready.wait()
+        return index
+    try:
+        index.load()
+        index.refresh()
+        _catch_up(key, index)
+        index.save()
+    finally:
+        with _registry_lock:
+            _stale.pop(key, None)
+            ready.set()
+    return index
+
+
+def _catch_up(key, index):
+    """Relit les dossiers modifiés pendant la validation, puis marque l'index prêt (cf. search_index)."""
+    while True:
+        with _registry_lock:
+            dirs = _stale.pop(key, None)
+            if not dirs:
+                _ready[key].set()
+                return
+        for path in sorted(dirs):
+            index.sync_dir(path)
+
+
+def peek_link_index(root_path):
+    """Index des liens s'il est prêt, sinon None (sans bloquer le thread GUI)."""
+    key = os.path.normpath(root_path)
+    with _registry_lock:
+        ready = _ready.get(key)
+        return _indexes[key] if ready is not None and ready.is_set() else None
+
+
+def prewarm(root_path):
+    """Charge et valide l'index des liens en arrière-plan."""
+    threading.Thread(target=get_link_index, args=(root_path,), daemon=True).start()
+
+
+def save_link_indexes():
+    with _registry_lock:
+        loaded = [i for key, i in _indexes.items() if _ready[key].is_set()]
+    for index in loaded:
+        index.save()
+
+
+def _index_for(path, stale_dir=None):
+    """Index prêt qui contient `path` ; en validation, `stale_dir` (ou le parent) sera relu."""
+    path = os.path.normpath(path)
+    with _registry_lock:
+        candidates = [(key, i) for key, i in _indexes.items() if i.contains(path)]
+        if not candidates:
+            return None
+        key, index = max(candidates, key=lambda c: len(c[0]))
+        if _ready[key].is_set():
+            return index
+        stale_dir = os.path.normpath(stale_dir) if stale_dir else os.path.dirname(path)
+        _stale.setdefault(key, set()).add(stale_dir if index.contains(stale_dir) else key)
+    return None
+
+
+def sync_directory(path):
+    index = _index_for(path, stale_dir=path)
+    if index is not None:
+        index.sync_dir(path)
+
+
+def _on_storage_event(event, path, extra=None):
+    index = _index_for(path)
+    if event == "renamed":
+        target = _index_for(extra)
+        if index is not None and index is target:
+            index.rename_path(path, extra)
+            return
+        if index is not None:
+            index.remove_path(path)
+        if target is not None:
+            target.sync_dir(os.path.dirname(extra))
+        return
+    if index is None:
+        return
+    if event == "saved":
+        index.update_file(path, extra)
+    elif event == "created":
+        index.update_file(path)
+    elif event == "deleted":
+        index.remove_path(path)
+
+
+storage.add_listener(_on_storage_event)
@@ -3,15 +3,22 @@
 # Raccourci : ⇧ + N
 # Langue : dynamique FR/EN
 
+# Import léger : l'interface (ui_main, éditeur, index...) n'est chargée
+# qu'à la première ouverture du Notebook, pas au démarrage d'Anki.
+
 from aqt import mw
 from aqt.qt import QAction, QDockWidget
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QKeySequence
 from aqt import gui_hooks
-from .ui_main import NotebookMain
 from .lang import toggle_language, get_language_label, t
 
+# Pré-construction optionnelle du panneau ("prewarm_dock": true dans la config)
+PREWARM_DELAY_MS = 3000
+
 notebook_dock = None  # référence globale
+_prebuilt_widget = None  # NotebookMain construit à l'avance (pré-chauffage)
+perf_panel = None     # fenêtre des performances (créée à la demande)
 
 
 # ---------------------------------------------------------------------------
@@ -24,6 +31,47 @@ def _apply_language_to_dock():
         widget = notebook_dock.widget()
         if hasattr(widget, "retranslate_ui"):
             widget.retranslate_ui()
+    if _prebuilt_widget is not None:
+        _prebuilt_widget.retranslate_ui()
+
+
+# ---------------------------------------------------------------------------
+# Sauvegarde à la fermeture du dock / du profil
+# ---------------------------------------------------------------------------
+def _flush_dock():
+    if notebook_dock:
+        widget = notebook_dock.widget()
+        if hasattr(widget, "flush"):
+            widget.flush()
+    if _prebuilt_widget is not None:
+        _prebuilt_widget.flush()
+
+
+def _on_dock_visibility_changed(visible):
+    if not visible:
+        _flush_dock()
+
+
+# ---------------------------------------------------------------------------
+# Construction différée du panneau
+# ---------------------------------------------------------------------------
+def _build_notebook_widget():
+    global _prebuilt_widget
+    if _prebuilt_widget is not None:
+        widget, _prebuilt_widget = _prebuilt_widget, None
+        return widget
+    from .ui_main import NotebookMain  # import coûteux : seulement à la première ouverture
+    return NotebookMain()
+
+
+def _prewarm_notebook():
+    """Construit le panneau en tâche de fond (boucle inactive) si la config le demande."""
+    global _prebuilt_widget
+    if notebook_dock or _prebuilt_widget is not None:
+        return
+    from .config import load_config
+    if load_config().get("prewarm_dock"):
+        _prebuilt_widget = _build_notebook_widget()
 
 
 # ---------------------------------------------------------------------------
@@ -45,8 +93,10 @@ def toggle_notebook():
             Qt.DockWidgetArea.LeftDockWidgetArea | Qt.DockWidgetArea.RightDockWidgetArea
         )
 
-        notebook_widget = NotebookMain()
+        notebook_widget = _build_notebook_widget()
         notebook_dock.setWidget(notebook_widget)
+        # Fermeture / masquage du dock : écrire les modifications en attente
+        notebook_dock.visibilityChanged.connect(_on_dock_visibility_changed)
         notebook_dock.setFeatures(
             QDockWidget.DockWidgetFeature.DockWidgetClosable
             | QDockWidget.DockWidgetFeature.DockWidgetMovable
@@ -58,6 +108,18 @@ def toggle_notebook():
     notebook_dock.raise_()
 
 
+# ---------------------------------------------------------------------------
+# Panneau des performances (instrumentation, cProfile)
+# ---------------------------------------------------------------------------
+def open_perf_panel():
+    global perf_panel
+    if perf_panel is None:
+        from .perf_panel import PerfPanel
+        perf_panel = PerfPanel(mw)
+    perf_panel.show()
+    perf_panel.raise_()
+
+
 # ---------------------------------------------------------------------------
 # Changement de langue (FR <-> EN)
 # ---------------------------------------------------------------------------
@@ -81,6 +143,11 @@ def setup_menu():
     action_lang.triggered.connect(lambda: _on_change_language(action_lang))
     mw.form.menuTools.addAction(action_lang)
 
+    # Performances (latences, octets lus / écrits, profilage)
+    action_perf = QAction(t("menu_perf"), mw)
+    action_perf.triggered.connect(open_perf_panel)
+    mw.form.menuTools.addAction(action_perf)
+
 
 # ---------------------------------------------------------------------------
 # Hook principal
@@ -90,7 +157,9 @@ def on_main_window_init():
     if not hasattr(mw, "_notebook_menu_setup_done"):
         setup_menu()
         mw._notebook_menu_setup_done = True
+        QTimer.singleShot(PREWARM_DELAY_MS, _prewarm_notebook)
 
 
 gui_hooks.main_window_did_init.append(on_main_window_init)
+gui_hooks.profile_will_close.append(_flush_dock)
 
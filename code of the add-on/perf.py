@@ -0,0 +1,160 @@
+# perf.py — instrumentation légère des chemins critiques
+# - Chronomètres (p50 / p95) et compteurs (octets lus / écrits) par opération
+# - Désactivée par défaut : un seul test de booléen par appel instrumenté
+# - Capture cProfile des N prochaines opérations (thread principal) vers un fichier .prof
+
+import os, time, threading, functools, cProfile
+from collections import deque
+
+MAX_SAMPLES = 2000  # durées conservées par opération (fenêtre glissante)
+
+ENABLED = os.environ.get("ANKINOTE_PERF") == "1"
+
+_lock = threading.Lock()
+_samples = {}   # opération -> deque des durées (secondes)
+_counters = {}  # compteur -> valeur
+
+_profiler = None
+_profile_remaining = 0
+_profile_path = None
+_profile_callbacks = []
+_profile_depth = 0
+
+
+def enable(on=True):
+    global ENABLED
+    ENABLED = bool(on)
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _counters.clear()
+
+
+# ----------------------------- Mesures -----------------------------
+
+def record(name, seconds):
+    with _lock:
+        samples = _samples.get(name)
+        if samples is None:
+            samples = _samples[name] = deque(maxlen=MAX_SAMPLES)
+        samples.append(seconds)
+
+
+def count(name, amount=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def timed(name):
+    """Décorateur : chronomètre chaque appel sous `name` (coût négligeable si désactivé)."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            profiling = _profile_enter()
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+                if profiling:
+                    _profile_exit()
+        return wrapper
+    return decorate
+
+
+class span:
+    """Bloc chronométré : `with perf.span("search.query"): ...`."""
+    __slots__ = ("name", "start", "profiling")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        if ENABLED:
+            self.profiling = _profile_enter()
+            self.start = time.perf_counter()
+        else:
+            self.start = None
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            record(self.name, time.perf_counter() - self.start)
+            if self.profiling:
+                _profile_exit()
+        return False
+
+
+def _percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(round(p * (len(sorted_values) - 1))))]
+
+
+def snapshot():
+    """Statistiques courantes : ({opération: dict(count, p50, p95, max, total) en ms}, compteurs)."""
+    with _lock:
+        samples = {name: sorted(values) for name, values in _samples.items() if values}
+        counters = dict(_counters)
+    stats = {}
+    for name, values in samples.items():
+        stats[name] = {
+            "count": len(values),
+            "p50": _percentile(values, 0.50) * 1000,
+            "p95": _percentile(values, 0.95) * 1000,
+            "max": values[-1] * 1000,
+            "total": sum(values) * 1000,
+        }
+    return stats, counters
+
+
+# ----------------------------- Capture cProfile -----------------------------
+
+def start_profile(operations, path, callback=None):
+    """Profile les `operations` prochaines opérations instrumentées du thread principal.
+
+    Le résultat est écrit dans `path` (format pstats / snakeviz) ; `callback(path)`
+    est appelé une fois la capture terminée. Active l'instrumentation si besoin.
+    """
+    global _profiler, _profile_remaining, _profile_path, _profile_callbacks
+    enable(True)
+    _profiler = cProfile.Profile()
+    _profile_remaining = max(1, int(operations))
+    _profile_path = path
+    _profile_callbacks = [callback] if callback else []
+
+
+def is_profiling():
+    return _profiler is not None
+
+
+def _profile_enter():
+    """Démarre le profileur pour une opération de premier niveau (thread principal uniquement)."""
+    global _profile_depth
+    if _profiler is None or threading.current_thread() is not threading.main_thread():
+        return False
+    _profile_depth += 1
+    if _profile_depth == 1:
+        _profiler.enable()
+    return True
+
+
+def _profile_exit():
+    global _profile_depth, _profiler, _profile_remaining
+    _profile_depth -= 1
+    if _profile_depth or _profiler is None:
+        return
+    _profiler.disable()
+    _profile_remaining -= 1
+    if _profile_remaining > 0:
+        return
+    profiler, _profiler = _profiler, None
+    try:
+        profiler.dump_stats(_profile_path)
+    except OSError as e:
+        print(f"[Notebook] Échec de l'écriture du profil : {e}")
+        return
+    for callback in _profile_callbacks:
+        callback(_profile_path)
@@ -0,0 +1,122 @@
+# perf_panel.py — panneau des performances du Notebook (menu Outils)
+# - Latences p50 / p95 / max par opération instrumentée (voir perf.py)
+# - Octets lus / écrits, remise à zéro, capture cProfile des N prochaines opérations
+
+import os, time
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QCheckBox, QTableWidget, QTableWidgetItem,
+    QHeaderView, QLabel, QPushButton, QSpinBox
+)
+from PyQt6.QtCore import Qt, QTimer
+from . import perf
+from .lang import t
+
+REFRESH_MS = 1000
+
+
+def _format_bytes(n):
+    for unit in ("o", "Ko", "Mo", "Go"):
+        if n < 1024 or unit == "Go":
+            return f"{n:.0f} {unit}" if unit == "o" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+class PerfPanel(QDialog):
+    """Fenêtre non modale : statistiques en direct et capture de profil."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(t("perf_title"))
+        self.resize(560, 380)
+
+        self.enable_box = QCheckBox(t("perf_enable"))
+        self.enable_box.setChecked(perf.ENABLED)
+        self.enable_box.toggled.connect(perf.enable)
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels([t("perf_operation"), "n", "p50 (ms)", "p95 (ms)", "max (ms)"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+
+        self.counters_label = QLabel()
+
+        self.btn_reset = QPushButton(t("perf_reset"))
+        self.btn_reset.clicked.connect(self._reset)
+
+        # --- Capture cProfile ---
+        self.profile_ops = QSpinBox()
+        self.profile_ops.setRange(1, 1000)
+        self.profile_ops.setValue(20)
+        self.btn_profile = QPushButton(t("perf_profile"))
+        self.btn_profile.clicked.connect(self._start_profile)
+        self.profile_label = QLabel()
+        self.profile_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+
+        top = QHBoxLayout()
+        top.addWidget(self.enable_box)
+        top.addStretch()
+        top.addWidget(self.btn_reset)
+
+        profile_row = QHBoxLayout()
+        profile_row.addWidget(self.btn_profile)
+        profile_row.addWidget(self.profile_ops)
+        profile_row.addWidget(QLabel(t("perf_operations")))
+        profile_row.addStretch()
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(top)
+        layout.addWidget(self.table)
+        layout.addWidget(self.counters_label)
+        layout.addLayout(profile_row)
+        layout.addWidget(self.profile_label)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    # Rafraîchissement seulement quand le panneau est visible
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        stats, counters = perf.snapshot()
+        self.table.setRowCount(len(stats))
+        for row, name in enumerate(sorted(stats)):
+            s = stats[name]
+            values = [name, str(s["count"]), f"{s['p50']:.2f}", f"{s['p95']:.2f}", f"{s['max']:.2f}"]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if col:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(row, col, item)
+        self.counters_label.setText(t(
+            "perf_bytes",
+            read=_format_bytes(counters.get("bytes_read", 0)),
+            written=_format_bytes(counters.get("bytes_written", 0)),
+        ))
+        self.btn_profile.setEnabled(not perf.is_profiling())
+
+    def _reset(self):
+        perf.reset()
+        self.refresh()
+
+    def _start_profile(self):
+        path = os.path.join(os.path.expanduser("~"), f"ankinote-profile-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        perf.start_profile(self.profile_ops.value(), path, self._on_profile_done)
+        self.enable_box.setChecked(True)
+        self.profile_label.setText(t("perf_profiling", count=self.profile_ops.value()))
+        self.btn_profile.setEnabled(False)
+
+    def _on_profile_done(self, path):
+        try:
+            self.profile_label.setText(t("perf_profile_saved", path=path))
+            self.btn_profile.setEnabled(True)
+        except RuntimeError:
+            pass  # panneau fermé entre-temps
@@ -0,0 +1,319 @@
+# preview.py — aperçu Markdown rendu, incrémental par blocs
+# - Le texte est découpé en blocs de premier niveau (paragraphes, titres, blocs de code...)
+# - Le HTML de chaque bloc est mis en cache par empreinte : seuls les blocs modifiés sont rendus
+# - Avec QtWebEngine (fourni par Anki), seuls les blocs modifiés sont remplacés dans la page
+# - Images locales affichées par leur miniature (thumbnails.py) : une image pas encore réduite
+#   est remplacée par un emplacement vide, complété dès que sa miniature est prête
+
+import os, re, json, html, hashlib
+from collections import OrderedDict
+from urllib.parse import unquote
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTextBrowser
+from PyQt6.QtCore import QUrl, QTimer
+from PyQt6.QtGui import QTextDocument, QImage
+from . import thumbnails
+
+try:
+    import markdown as _markdown  # dépendance d'Anki (aqt)
+except ImportError:
+    _markdown = None
+
+try:
+    from PyQt6.QtWebEngineWidgets import QWebEngineView
+except ImportError:
+    QWebEngineView = None
+
+CACHE_MAX_BLOCKS = 4000
+
+_FENCE_RE = re.compile(r"^(```|~~~)")
+_BODY_RE = re.compile(r"<body[^>]*>(.*)</body>", re.DOTALL)
+_IMG_SRC_RE = re.compile(r"""(<img\b[^>]*?\bsrc=)(["'])([^"']*)\2""", re.I)
+_URL_SCHEME_RE = re.compile(r"^[a-z][a-z0-9+.-]*:", re.I)
+# Emplacement d'une image dont la miniature n'est pas prête (GIF transparent 1x1)
+PLACEHOLDER_SRC = "data:image/gif;base64,R0lGODlhAQABAAAAACH5BAEKAAEALAAAAAABAAEAAAICTAEAOw=="
+THUMB_REFRESH_MS = 150
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8">
+<style>
+  body { font-family: 'Inter','Helvetica Neue',sans-serif; font-size: 14px; color: #222;
+         background: #ffffff; margin: 0; padding: 10px 14px; line-height: 1.5; }
+  pre { background: #f5f5f5; border-radius: 6px; padding: 8px; overflow-x: auto; }
+  code { background: #f5f5f5; border-radius: 3px; padding: 0 3px; }
+  blockquote { border-left: 3px solid #d0d0d0; margin-left: 0; padding-left: 10px; color: #555; }
+  img { max-width: 100%; }
+  table { border-collapse: collapse; } td, th { border: 1px solid #dcdcdc; padding: 3px 6px; }
+</style>
+<script>
+function applyPatch(start, removeCount, blocks) {
+  const root = document.getElementById("root");
+  for (let i = 0; i < removeCount; i++) {
+    const node = root.children[start];
+    if (node) root.removeChild(node);
+  }
+  const ref = root.children[start] || null;
+  for (const h of blocks) {
+    const div = document.createElement("div");
+    div.className = "blk";
+    div.innerHTML = h;
+    root.insertBefore(div, ref);
+  }
+}
+function setThumb(src, thumb) {
+  for (const img of document.querySelectorAll("img[data-src]")) {
+    if (img.dataset.src === src) { img.src = thumb; img.removeAttribute("data-src"); }
+  }
+}
+function scrollToRatio(r) {
+  window.scrollTo(0, r * (document.documentElement.scrollHeight - window.innerHeight));
+}
+</script></head>
+<body><div id="root">{body}</div></body></html>"""
+
+
+def render_page(body):
+    """Page complète pour QtWebEngine (le gabarit contient du CSS : pas de formatage %)."""
+    return PAGE_TEMPLATE.replace("{body}", body, 1)
+
+
+# ----------------------------- Découpage / rendu -----------------------------
+
+def split_blocks(text):
+    """Découpe le Markdown en blocs de premier niveau (séparés par des lignes vides).
+
+    Un bloc de code délimité (``` ou ~~~) reste entier, lignes vides comprises.
+    """
+    blocks, current, fence = [], [], None
+    for line in text.split("\n"):
+        stripped = line.lstrip()
+        if fence:
+            current.append(line)
+            if stripped.startswith(fence):
+                blocks.append("\n".join(current))
+                current, fence = [], None
+            continue
+        m = _FENCE_RE.match(stripped)
+        if m:
+            if current:
+                blocks.append("\n".join(current))
+            current, fence = [line], m.group(1)
+            continue
+        if not line.strip():
+            if current:
+                blocks.append("\n".join(current))
+                current = []
+            continue
+        current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+
+def render_markdown(block):
+    """Rend un bloc Markdown en HTML (module markdown d'Anki, sinon moteur Qt)."""
+    if _markdown is not None:
+        return _markdown.markdown(block, extensions=["fenced_code", "tables"])
+    doc = QTextDocument()
+    doc.setMarkdown(block)
+    m = _BODY_RE.search(doc.toHtml())
+    return m.group(1) if m else html.escape(block)
+
+
+class BlockRenderer:
+    """Rendu par blocs avec cache LRU (empreinte du bloc -> HTML)."""
+
+    def __init__(self, render=render_markdown, max_blocks=CACHE_MAX_BLOCKS):
+        self._render = render
+        self._cache = OrderedDict()
+        self._max_blocks = max_blocks
+        self.rendered = 0  # nombre de blocs réellement rendus (hors cache)
+
+    @staticmethod
+    def key(block):
+        return hashlib.blake2b(block.encode("utf-8", "surrogatepass"), digest_size=12).digest()
+
+    def render(self, block, key=None):
+        key = key or self.key(block)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+        result = self._render(block)
+        self.rendered += 1
+        self._cache[key] = result
+        if len(self._cache) > self._max_blocks:
+            self._cache.popitem(last=False)
+        return result
+
+
+def diff_blocks(old_keys, new_keys):
+    """Plus petit intervalle modifié : (début, nb d'anciens blocs retirés, fin dans la nouvelle liste)."""
+    start = 0
+    limit = min(len(old_keys), len(new_keys))
+    while start < limit and old_keys[start] == new_keys[start]:
+        start += 1
+    old_end, new_end = len(old_keys), len(new_keys)
+    while old_end > start and new_end > start and old_keys[old_end - 1] == new_keys[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+    return start, old_end - start, new_end
+
+
+class _ThumbBrowser(QTextBrowser):
+    """Repli sans QtWebEngine : miniatures servies depuis le cache mémoire."""
+
+    def loadResource(self, kind, url):
+        if kind == QTextDocument.ResourceType.ImageResource.value and url.isLocalFile():
+            cache = thumbnails.get_cache()
+            path = os.path.normpath(url.toLocalFile())
+            image = cache.image(path)
+            if image is not None:
+                return image
+            result = super().loadResource(kind, url)
+            if isinstance(result, QImage):
+                cache.remember(path, result)
+            return result
+        return super().loadResource(kind, url)
+
+
+# -------------------------------- Widget --------------------------------
+
+class MarkdownPreview(QWidget):
+    """Panneau d'aperçu : ne rend et ne remplace que les blocs modifiés."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.renderer = BlockRenderer()
+        self._keys = []        # empreintes des blocs affichés
+        self._html = []        # HTML des blocs affichés (sans les miniatures)
+        self._base_url = QUrl()
+        self._base_dir = None
+        self._page_ready = False
+        self._pending_js = []
+        self._ratio = 0.0
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        if QWebEngineView is not None:
+            self.view = QWebEngineView(self)
+            self.view.loadFinished.connect(self._on_load_finished)
+        else:
+            self.view = _ThumbBrowser(self)
+            self.view.setOpenExternalLinks(True)
+        layout.addWidget(self.view)
+
+        self._thumbs = thumbnails.get_cache()
+        self._thumbs.ready.connect(self._on_thumb_ready)
+        self._waiting = set()  # images affichées par un emplacement vide
+        self._refresh_timer = QTimer(self)  # repli : une seule reconstruction pour plusieurs miniatures
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(THUMB_REFRESH_MS)
+        self._refresh_timer.timeout.connect(self._show_full_page)
+
+    def clear(self):
+        self._keys, self._html = [], []
+        self._show_full_page()
+
+    def set_base_path(self, directory):
+        """Dossier de la note : résolution des liens et images relatifs."""
+        url = QUrl.fromLocalFile(directory.rstrip("/\\") + "/")
+        if url != self._base_url:
+            self._base_url = url
+            self._base_dir = directory
+            self._keys, self._html = [], []  # nouvelle base : la page sera reconstruite
+
+    def update_text(self, text):
+        """Met l'aperçu à jour : rend les blocs inconnus, remplace l'intervalle modifié."""
+        blocks = split_blocks(text)
+        keys = [self.renderer.key(b) for b in blocks]
+        if keys == self._keys:
+            return
+        start, removed, new_end = diff_blocks(self._keys, keys)
+        inserted = [self.renderer.render(blocks[i], keys[i]) for i in range(start, new_end)]
+        first_render = not self._keys
+        self._html[start:start + removed] = inserted
+        self._keys = keys
+        if first_render or QWebEngineView is None:
+            self._show_full_page()
+        else:
+            inserted = [self._decorate(h) for h in inserted]
+            self._run_js(f"applyPatch({start}, {removed}, {json.dumps(inserted)});")
+
+    def scroll_to_ratio(self, ratio):
+        """Synchronise le défilement (proportion 0..1 de la hauteur du document)."""
+        self._ratio = ratio
+        if QWebEngineView is not None:
+            self._run_js(f"scrollToRatio({ratio:.5f});")
+        else:
+            bar = self.view.verticalScrollBar()
+            bar.setValue(int(ratio * bar.maximum()))
+
+    # ----------------------------- Interne -----------------------------
+
+    def _image_path(self, src):
+        """Fichier local désigné par un src relatif ou file://, ou None."""
+        if not src or self._base_dir is None:
+            return None
+        if src.lower().startswith("file:"):
+            path = QUrl(src).toLocalFile()
+        elif _URL_SCHEME_RE.match(src) or src.startswith("//"):
+            return None
+        else:
+            path = os.path.join(self._base_dir, unquote(src.split("#")[0].split("?")[0]))
+        path = os.path.normpath(path)
+        return path if thumbnails.is_raster(path) else None
+
+    def _decorate(self, block_html):
+        """Remplace les images locales par leur miniature (ou un emplacement vide en attendant)."""
+        if "<img" not in block_html:
+            return block_html
+
+        def replace(m):
+            path = self._image_path(html.unescape(m.group(3)))
+            if path is None:
+                return m.group(0)
+            shown = self._thumbs.lookup(path)
+            if shown is None:
+                self._waiting.add(path)
+                key = html.escape(QUrl.fromLocalFile(path).toString(), quote=True)
+                return f'{m.group(1)}"{PLACEHOLDER_SRC}" data-src="{key}"'
+            url = html.escape(QUrl.fromLocalFile(shown).toString(), quote=True)
+            return f'{m.group(1)}"{url}"'
+        return _IMG_SRC_RE.sub(replace, block_html)
+
+    def _on_thumb_ready(self, source):
+        if source not in self._waiting:
+            return
+        self._waiting.discard(source)
+        if QWebEngineView is None:
+            self._refresh_timer.start()
+            return
+        shown = self._thumbs.lookup(source) or source
+        self._run_js(f"setThumb({json.dumps(QUrl.fromLocalFile(source).toString())}, "
+                     f"{json.dumps(QUrl.fromLocalFile(shown).toString())});")
+
+    def _show_full_page(self):
+        self._refresh_timer.stop()
+        self._waiting.clear()
+        body = "".join(f"<div class='blk'>{self._decorate(h)}</div>" for h in self._html)
+        if QWebEngineView is not None:
+            self._page_ready = False
+            self._pending_js = []
+            self.view.setHtml(render_page(body), self._base_url)
+        else:
+            self.view.document().setBaseUrl(self._base_url)
+            self.view.setHtml(body)
+            self.scroll_to_ratio(self._ratio)
+
+    def _run_js(self, script):
+        if self._page_ready:
+            self.view.page().runJavaScript(script)
+        else:
+            self._pending_js.append(script)
+
+    def _on_load_finished(self, ok):
+        self._page_ready = True
+        pending, self._pending_js = self._pending_js, []
+        for script in pending:
+            self.view.page().runJavaScript(script)
+        self.view.page().runJavaScript(f"scrollToRatio({self._ratio:.5f});")
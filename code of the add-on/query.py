@@ -0,0 +1,303 @@
+# query.py — langage de requête de la recherche globale
+# - Mots (ET implicite), OR / |, NOT / -, parenthèses, "phrases exactes", /regex/
+# - Champs : name: (nom de la note seulement), content: (contenu seulement)
+# - Options : in:dossier/ (portée, plusieurs = l'un ou l'autre ; -in: exclut un dossier),
+#   case:on (respect de la casse)
+# - Un seul Matcher compilé par requête, appliqué aux notes lues par morceaux,
+#   avec arrêt dès que le résultat de l'expression est connu
+#
+# Une requête n'échoue jamais : regex invalide = texte littéral, guillemet ou
+# parenthèse non fermés = fermés en fin de requête.
+
+import os, re
+from . import storage
+
+# Contexte relu au début de la fenêtre suivante : une occurrence à cheval entre
+# deux morceaux est trouvée si elle fait moins de MATCH_OVERLAP caractères
+MATCH_OVERLAP = 4096
+# Ligne plus longue que cela : analysée sans attendre sa fin
+MAX_LINE = 1024 * 1024
+EXCERPT_CHARS = 180
+
+_TOKEN_RE = re.compile(r"""
+    (?P<lpar>\() | (?P<rpar>\)) |
+    (?P<neg>-)?(?:(?P<field>name|content|in|case):)?
+    (?: "(?P<phrase>[^"]*)"?
+      | /(?P<regex>(?:\\.|[^/\\\n])+)/(?=[\s()]|$)
+      | (?P<word>[^\s()"]+) )
+""", re.X | re.I)
+_WORD_RE = re.compile(r"\w+")
+_TRUE_WORDS = {"on", "yes", "oui", "true", "1"}
+
+
+class Term:
+    """Feuille de la requête : mot, phrase ou regex, cherché dans le nom et/ou le contenu."""
+
+    __slots__ = ("kind", "field", "text", "pattern")
+
+    def __init__(self, kind, field, text):
+        self.kind = kind    # "word" | "phrase" | "regex"
+        self.field = field  # "any" | "name" | "content"
+        self.text = text
+        self.pattern = None
+
+    def compile(self, flags):
+        if self.kind == "regex":
+            try:
+                self.pattern = re.compile(self.text, flags | re.M)
+                return
+            except re.error:
+                pass
+        if self.kind == "phrase":
+            # Espaces quelconques (y compris fins de ligne) entre les mots d'une phrase
+            source = r"\s+".join(re.escape(part) for part in self.text.split())
+        else:
+            source = re.escape(self.text)
+        self.pattern = re.compile(source, flags)
+
+    def tokens(self):
+        """Jetons que toute occurrence contient forcément (pour restreindre les candidats), ou None."""
+        if self.kind == "regex":
+            return None
+        return [w.lower() for w in _WORD_RE.findall(self.text)] or None
+
+
+def _under(rel, folders):
+    """`rel` (chemin relatif, "/") est-il dans l'un des dossiers donnés (casse ignorée) ?"""
+    rel = rel.lower()
+    return any(rel.startswith(folder.lower() + "/") for folder in folders)
+
+
+class Query:
+    """Requête analysée : expression booléenne sur des Term, portées et sensibilité à la casse."""
+
+    def __init__(self, text):
+        self.text = text
+        self.terms = []
+        self.scopes = []
+        self.excluded = []
+        self.case_sensitive = False
+        self._tokens = [m for m in _TOKEN_RE.finditer(text) if m.group().strip()]
+        self._pos = 0
+        parts = []
+        while self._pos < len(self._tokens):
+            node = self._parse_or()
+            if node is not None:
+                parts.append(node)
+            self._pos += 1  # parenthèse fermante orpheline
+        self.expr = parts[0] if len(parts) == 1 else (("and", parts) if parts else None)
+        flags = 0 if self.case_sensitive else re.I
+        for term in self.terms:
+            term.compile(flags)
+
+    # ----------------------------- Analyse -----------------------------
+
+    def _peek(self):
+        return self._tokens[self._pos] if self._pos < len(self._tokens) else None
+
+    @staticmethod
+    def _keyword(token, *words):
+        return token is not None and token.group("word") in words and not token.group("field") \
+            and not token.group("neg")
+
+    def _parse_or(self):
+        items = [self._parse_and()]
+        while self._keyword(self._peek(), "OR", "|"):
+            self._pos += 1
+            items.append(self._parse_and())
+        items = [i for i in items if i is not None]
+        if len(items) <= 1:
+            return items[0] if items else None
+        return ("or", items)
+
+    def _parse_and(self):
+        items = []
+        while True:
+            token = self._peek()
+            if token is None or token.group("rpar") or self._keyword(token, "OR", "|"):
+                break
+            if self._keyword(token, "AND"):
+                self._pos += 1
+                continue
+            node = self._parse_unary()
+            if node is not None:
+                items.append(node)
+        if len(items) <= 1:
+            return items[0] if items else None
+        return ("and", items)
+
+    def _parse_unary(self):
+        token = self._peek()
+        if self._keyword(token, "NOT", "-"):
+            self._pos += 1
+            node = self._parse_unary()
+            return ("not", node) if node is not None else None
+        if token is None or token.group("rpar"):
+            return None
+        self._pos += 1
+        if token.group("lpar"):
+            node = self._parse_or()
+            if self._peek() is not None and self._peek().group("rpar"):
+                self._pos += 1
+            return node
+        return self._leaf(token)
+
+    def _leaf(self, token):
+        field = (token.group("field") or "").lower()
+        value = next(v for v in (token.group("phrase"), token.group("regex"), token.group("word")) if v is not None)
+        if field == "in":
+            scope = value.replace("\\", "/").strip("/")
+            if scope and ".." not in scope.split("/"):
+                (self.excluded if token.group("neg") else self.scopes).append(scope)
+            return None
+        if field == "case":
+            self.case_sensitive = value.lower() in _TRUE_WORDS
+            return None
+        if token.group("phrase") is not None:
+            kind = "phrase"
+            if not value.split():
+                return None
+        elif token.group("regex") is not None:
+            kind = "regex"
+        else:
+            kind = "word"
+        self.terms.append(Term(kind, field or "any", value))
+        node = ("term", len(self.terms) - 1)
+        return ("not", node) if token.group("neg") else node
+
+    # ----------------------------- Propriétés -----------------------------
+
+    def is_simple(self):
+        """Uniquement des mots liés par ET, sans option : le classement de l'index s'applique."""
+        if self.scopes or self.excluded or self.case_sensitive or not self.terms:
+            return False
+        if any(t.kind != "word" or t.field != "any" for t in self.terms):
+            return False
+        expr = self.expr
+        nodes = expr[1] if expr[0] == "and" else [expr]
+        return all(node[0] == "term" for node in nodes)
+
+    def in_scope(self, rel):
+        """Filtre de portée pour un chemin relatif à la racine ("/" comme séparateur)."""
+        return (not self.scopes or _under(rel, self.scopes)) and not _under(rel, self.excluded)
+
+    def positive_terms(self):
+        """Indices des termes cherchés (hors négations) : surlignage et position du résultat."""
+        found = []
+
+        def visit(node, negated):
+            if node is None:
+                return
+            if node[0] == "term":
+                if not negated:
+                    found.append(node[1])
+            elif node[0] == "not":
+                visit(node[1], not negated)
+            else:
+                for child in node[1]:
+                    visit(child, negated)
+        visit(self.expr, False)
+        return found
+
+    def highlight_words(self):
+        """Textes à surligner dans les extraits (termes cherchés, hors regex)."""
+        return [self.terms[i].text for i in self.positive_terms() if self.terms[i].kind != "regex"]
+
+
+def parse(text):
+    return Query(text)
+
+
+# ----------------------------- Évaluation -----------------------------
+
+def _evaluate(node, values):
+    """Logique à trois valeurs : True, False ou None (pas encore connu)."""
+    if node is None:
+        return True
+    kind = node[0]
+    if kind == "term":
+        return values[node[1]]
+    if kind == "not":
+        value = _evaluate(node[1], values)
+        return None if value is None else not value
+    results = [_evaluate(child, values) for child in node[1]]
+    if kind == "and":
+        if False in results:
+            return False
+        return None if None in results else True
+    if True in results:
+        return True
+    return None if None in results else False
+
+
+def _windows(chunks):
+    """(offset, texte) : fenêtres commençant en début de ligne et finissant en fin de ligne.
+
+    Deux fenêtres consécutives se recouvrent d'au plus MATCH_OVERLAP caractères.
+    """
+    pending, scanned, base = "", 0, 0  # scanned : début de `pending` déjà analysé
+    for chunk in chunks:
+        buffer = pending + chunk
+        cut = buffer.rfind("\n") + 1
+        if cut <= scanned:
+            if len(buffer) - scanned < MAX_LINE:
+                pending = buffer
+                continue
+            cut = len(buffer)
+        text = buffer[:cut]
+        yield base, text
+        tail = max(0, len(text) - MATCH_OVERLAP)
+        newline = text.find("\n", tail, len(text) - 1)
+        tail = newline + 1 if newline != -1 else tail
+        pending, scanned = text[tail:] + buffer[cut:], cut - tail
+        base += tail
+    if len(pending) > scanned:
+        yield base, pending
+
+
+class Matcher:
+    """Applique une requête à des notes ; `match(chemin)` -> (offset, texte trouvé, extrait) ou None."""
+
+    def __init__(self, query):
+        self.query = query
+        self.content_terms = [i for i, t in enumerate(query.terms) if t.field in ("any", "content")]
+        self.positive = set(query.positive_terms())
+
+    def match(self, path, cancelled=None):
+        terms = self.query.terms
+        values = [None] * len(terms)
+        name = os.path.splitext(os.path.basename(path))[0]
+        for i, term in enumerate(terms):
+            if term.field != "content" and term.pattern.search(name):
+                values[i] = True
+            elif term.field == "name":
+                values[i] = False
+        first = None
+        if _evaluate(self.query.expr, values) is None:
+            pending = [i for i in self.content_terms if values[i] is None]
+            try:
+                for offset, text in _windows(storage.iter_markdown_chunks(path)):
+                    if cancelled is not None and cancelled():
+                        return None
+                    for i in list(pending):
+                        m = terms[i].pattern.search(text)
+                        if m is None:
+                            continue
+                        values[i] = True
+                        pending.remove(i)
+                        if first is None and i in self.positive:
+                            first = (offset + m.start(), m.group(), text, m.start(), m.end())
+                    if _evaluate(self.query.expr, values) is not None:
+                        break  # résultat connu : inutile de lire la suite
+            except OSError:
+                return None
+            for i in pending:
+                values[i] = False
+        if not _evaluate(self.query.expr, values):
+            return None
+        if first is None:
+            return 0, None, ""
+        position, found, text, start, end = first
+        lo = max(0, start - EXCERPT_CHARS // 3)
+        excerpt = text[lo:lo + EXCERPT_CHARS]
+        return position, found, ("…" if lo else "") + " ".join(excerpt.split()) + ("…" if lo + EXCERPT_CHARS < len(text) else "")
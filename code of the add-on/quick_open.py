@@ -0,0 +1,466 @@
+# quick_open.py — ouverture rapide d'une note (Ctrl+P)
+# - Index en mémoire des chemins de notes : trigrammes + correspondance floue (sous-séquence)
+# - Construit une fois (parcours en arrière-plan), tenu à jour par storage.py et le watcher
+# - Fournit au watcher les dossiers qui contiennent des notes (dépliés ou non dans l'arbre)
+
+import os, re, bisect, heapq, threading
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem, QLabel
+from PyQt6.QtCore import Qt, QEvent, QObject, pyqtSignal
+from . import storage
+from .lang import t
+
+MAX_RESULTS = 50
+COMMON_GRAM_RATIO = 0.25  # trigrammes présents dans plus de 25 % des chemins : ignorés au filtrage
+SUBSTRING_BONUS = 1000    # une sous-chaîne exacte passe devant toute correspondance floue
+FUZZY_THRESHOLD = 10      # complément en sous-séquence seulement si peu de sous-chaînes exactes
+
+_indexes = {}  # racine normalisée -> PathIndex
+_ready = {}
+_stale = {}  # racine normalisée -> dossiers modifiés pendant la construction
+_registry_lock = threading.Lock()
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+_is_hidden = storage.is_hidden_name
+
+
+def fuzzy_score(query, path):
+    """Score d'une correspondance en sous-séquence (None si `query` n'est pas une sous-séquence).
+
+    Favorise les caractères consécutifs, les débuts de mot et le nom du fichier.
+    """
+    lower = path.lower()
+    name_start = lower.rfind(os.sep) + 1
+    score, pos, prev = 0, 0, -2
+    for ch in query:
+        found = lower.find(ch, pos)
+        if found < 0:
+            return None
+        score += 1
+        if found == prev + 1:
+            score += 5  # suite contiguë
+        if found == 0 or not lower[found - 1].isalnum():
+            score += 3  # début de mot
+        if found >= name_start:
+            score += 2  # dans le nom du fichier
+        prev, pos = found, found + 1
+    return score - len(path) * 0.01
+
+
+class PathIndex:
+    """Index des chemins relatifs des notes d'une racine."""
+
+    def __init__(self, root_path):
+        self.root_path = os.path.normpath(root_path)
+        self._paths = []       # id -> chemin relatif (None si supprimé)
+        self._ids = {}         # chemin relatif -> id
+        self._grams = {}       # trigramme -> ensemble d'ids
+        self._blob = None      # chemins minuscules joints par "\n" (repli en sous-séquence)
+        self._offsets = []     # offset de début de chaque ligne du blob
+        self._dirs = None      # dossiers contenant des notes (calculés à la demande)
+        self._lock = threading.RLock()
+
+    # ----------------------------- Construction -----------------------------
+
+    def _rel(self, path):
+        rel = os.path.relpath(os.path.normpath(path), self.root_path)
+        if rel == os.curdir or rel.startswith(os.pardir):
+            return None
+        return rel
+
+    def build(self):
+        """Parcours complet de la racine (une seule fois, hors thread GUI)."""
+        for path, _, _ in storage.walk_notes(self.root_path):
+            self.add(path)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def dirs(self):
+        """Dossiers complets contenant au moins une note, avec leurs parents jusqu'à la racine."""
+        with self._lock:
+            if self._dirs is None:
+                found = {""}
+                for rel in self._ids:
+                    head = os.path.dirname(rel)
+                    while head not in found:
+                        found.add(head)
+                        head = os.path.dirname(head)
+                self._dirs = [os.path.join(self.root_path, d) if d else self.root_path for d in found]
+            return self._dirs
+
+    # ----------------------------- Mises à jour -----------------------------
+
+    def add(self, path):
+        rel = self._rel(path)
+        if rel is None or not rel.endswith(".md") or any(_is_hidden(p) for p in rel.split(os.sep)):
+            return
+        with self._lock:
+            if rel in self._ids:
+                return
+            pid = len(self._paths)
+            self._paths.append(rel)
+            self._ids[rel] = pid
+            for gram in _trigrams(rel.lower()):
+                self._grams.setdefault(gram, set()).add(pid)
+            self._blob = None
+            self._dirs = None
+
+    def remove(self, path):
+        """Retire une note, ou toutes les notes d'un dossier."""
+        rel = self._rel(path)
+        if rel is None:
+            return
+        prefix = os.path.join(rel, "")
+        with self._lock:
+            for r in [r for r in self._ids if r == rel or r.startswith(prefix)]:
+                pid = self._ids.pop(r)
+                self._paths[pid] = None
+                for gram in _trigrams(r.lower()):
+                    ids = self._grams.get(gram)
+                    if ids is not None:
+                        ids.discard(pid)
+                        if not ids:
+                            del self._grams[gram]
+            self._blob = None
+            self._dirs = None
+
+    def rename(self, old_path, new_path):
+        old_rel, new_rel = self._rel(old_path), self._rel(new_path)
+        if old_rel is None:
+            return
+        prefix = os.path.join(old_rel, "")
+        with self._lock:
+            moved = [r for r in self._ids if r == old_rel or r.startswith(prefix)]
+        self.remove(old_path)
+        if new_rel is None:
+            return
+        for r in moved:
+            self.add(os.path.join(self.root_path, new_rel + r[len(old_rel):]))
+
+    def sync_dir(self, path):
+        """Aligne l'index sur un dossier modifié hors du Notebook."""
+        rel_dir = self._rel(path)
+        if rel_dir is None and os.path.normpath(path) != self.root_path:
+            return
+        prefix = os.path.join(rel_dir, "") if rel_dir else ""
+        listing = {name: is_dir for name, is_dir, _ in storage.list_dir(path) if not _is_hidden(name)}
+        with self._lock:
+            heads = {r[len(prefix):].split(os.sep, 1)[0] for r in self._ids if r.startswith(prefix)}
+        for head in heads - set(listing):
+            self.remove(os.path.join(path, head))
+        for name, is_dir in listing.items():
+            full = os.path.join(path, name)
+            if is_dir and name not in heads:
+                for note, _, _ in storage.walk_notes(full):
+                    self.add(note)
+            elif not is_dir:
+                self.add(full)
+
+    # -------------------------------- Requêtes --------------------------------
+
+    def _ensure_blob(self):
+        if self._blob is None:
+            lines, offsets, pos = [], [], 0
+            for rel in self._paths:
+                line = rel.lower() if rel else ""
+                offsets.append(pos)
+                lines.append(line)
+                pos += len(line) + 1
+            self._blob = "\n".join(lines)
+            self._offsets = offsets
+
+    def _substring_candidates(self, query):
+        """Ids contenant tous les trigrammes sélectifs de `query` (None si aucun ne l'est)."""
+        limit = max(1, int(len(self._ids) * COMMON_GRAM_RATIO))
+        sets = []
+        for gram in _trigrams(query):
+            ids = self._grams.get(gram)
+            if not ids:
+                return []
+            if len(ids) <= limit:
+                sets.append(ids)
+        if not sets:
+            return None
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def _subsequence_candidates(self, query, wanted, skip):
+        """Balayage regex (en C) du blob, arrêté après `wanted` lignes retenues (hors `skip`)."""
+        self._ensure_blob()
+        # c0[^\nc1]*c1... : préfixe littéral (recherche rapide) puis classes niées ; chaque
+        # classe exclut le caractère suivant, donc aucun retour arrière coûteux (et pas de
+        # quantificateur possessif, absent avant Python 3.11) ; chaque ligne n'est retenue qu'une fois
+        first, rest = query[0], query[1:]
+        pattern = re.compile(
+            re.escape(first) + "".join(f"[^\\n{re.escape(ch)}]*{re.escape(ch)}" for ch in rest)
+        )
+        found, last = [], -1
+        for m in pattern.finditer(self._blob):
+            pid = bisect.bisect_right(self._offsets, m.start()) - 1
+            if pid != last and pid not in skip:
+                found.append(pid)
+                if len(found) >= wanted:
+                    break
+            last = pid
+        return found
+
+    def query(self, text, limit=MAX_RESULTS):
+        """Chemins complets des meilleures correspondances floues pour `text`."""
+        return [path for _, path in self.scored_query(text, limit)]
+
+    def scored_query(self, text, limit=MAX_RESULTS):
+        """[(score, chemin complet)] des meilleures correspondances floues pour `text`.
+
+        1. sous-chaîne exacte, filtrée par l'index de trigrammes ;
+        2. complément en sous-séquence (« lecnot » -> « lecture/notes.md ») si la
+           première étape donne moins de FUZZY_THRESHOLD résultats.
+        """
+        query = "".join(text.lower().split())
+        with self._lock:
+            if not query:
+                ordered = sorted(self._ids)[:limit]
+                return [(0, os.path.join(self.root_path, r)) for r in ordered]
+            scored = {}
+            candidates = self._substring_candidates(query) if len(query) >= 3 else None
+            for pid in candidates or ():
+                rel = self._paths[pid]
+                if rel is None:
+                    continue
+                lower = rel.lower()
+                pos = lower.find(query)
+                if pos < 0:
+                    continue
+                score = SUBSTRING_BONUS - len(rel) * 0.01
+                if pos >= lower.rfind(os.sep) + 1:
+                    score += 20  # dans le nom du fichier
+                if pos == 0 or not lower[pos - 1].isalnum():
+                    score += 10  # début de mot
+                scored[pid] = score
+            if len(scored) < min(limit, FUZZY_THRESHOLD):
+                for pid in self._subsequence_candidates(query, limit * 4, scored):
+                    score = fuzzy_score(query, self._paths[pid])
+                    if score is not None:
+                        scored[pid] = score
+            best = heapq.nlargest(limit, scored.items(), key=lambda item: (item[1], -item[0]))
+            return [(score, os.path.join(self.root_path, self._paths[pid])) for pid, score in best]
+
+
+# ----------------------------- Registre des index -----------------------------
+
+def get_path_index(root_path):
+    """Index des chemins d'une racine (construit au premier appel, sûr entre threads)."""
+    key = os.path.normpath(root_path)
+    with _registry_lock:
+        index = _indexes.get(key)
+        created = index is None
+        if created:
+            index = PathIndex(key)
+            _indexes[key] = index
+            _ready[key] = threading.Event()
+        ready = _ready[key]
+    if not created:
+        ready.wait()
+        return index
+    try:
+        index.build()
+        _catch_up(key, index)
+    finally:
+        with _registry_lock:
+            _stale.pop(key, None)
+            ready.set()
+    return index
+
+
+def _catch_up(key, index):
+    """Relit les dossiers modifiés pendant la construction, puis marque l'index prêt."""
+    while True:
+        with _registry_lock:
+            dirs = _stale.pop(key, None)
+            if not dirs:
+                _ready[key].set()
+                return
+        for path in sorted(dirs):
+            index.sync_dir(path)
+
+
+def prewarm(root_path, on_ready=None):
+    """Construit l'index des chemins en arrière-plan ; `on_ready(racine)` ensuite (dans ce thread)."""
+    def run():
+        get_path_index(root_path)
+        if on_ready is not None:
+            on_ready(root_path)
+    threading.Thread(target=run, daemon=True).start()
+
+
+def peek_path_index(root_path):
+    """Index des chemins s'il est prêt, sinon None (sans bloquer le thread GUI)."""
+    key = os.path.normpath(root_path)
+    with _registry_lock:
+        index = _indexes.get(key)
+        return index if index is not None and _ready[key].is_set() else None
+
+
+def known_dirs(root_path):
+    """Dossiers de la racine qui contiennent des notes ([] tant que l'index n'est pas prêt)."""
+    key = os.path.normpath(root_path)
+    with _registry_lock:
+        index = _indexes.get(key)
+        ready = index is not None and _ready[key].is_set()
+    return index.dirs() if ready else []
+
+
+def _covers(index, path):
+    return index._rel(path) is not None or path == index.root_path
+
+
+def _index_for(path, stale_dir=None):
+    """Index prêt qui contient `path` ; en construction, `stale_dir` (ou le parent) sera relu."""
+    path = os.path.normpath(path)
+    with _registry_lock:
+        candidates = [(key, i) for key, i in _indexes.items() if _covers(i, path)]
+        if not candidates:
+            return None
+        key, index = max(candidates, key=lambda c: len(c[0]))
+        if _ready[key].is_set():
+            return index
+        stale_dir = os.path.normpath(stale_dir) if stale_dir else os.path.dirname(path)
+        _stale.setdefault(key, set()).add(stale_dir if _covers(index, stale_dir) else key)
+    return None
+
+
+def sync_directory(path):
+    """Reporte un changement externe dans un dossier (appelé par le watcher)."""
+    index = _index_for(path, stale_dir=path)
+    if index is not None:
+        index.sync_dir(path)
+
+
+def _on_storage_event(event, path, extra=None):
+    if event == "renamed":
+        index, target = _index_for(path), _index_for(extra)
+        if index is not None and index is target:
+            index.rename(path, extra)
+            return
+        if index is not None:
+            index.remove(path)
+        if target is not None:
+            target.sync_dir(os.path.dirname(extra))
+        return
+    index = _index_for(path)
+    if index is None:
+        return
+    if event == "created" and storage.is_file(path):
+        index.add(path)
+    elif event == "deleted":
+        index.remove(path)
+
+
+storage.add_listener(_on_storage_event)
+
+
+# -------------------------------- Fenêtre --------------------------------
+
+class _IndexSignals(QObject):
+    """Index d'une racine prêt (émis depuis le thread de construction)."""
+    ready = pyqtSignal(str)
+
+
+class QuickOpenDialog(QDialog):
+    """Sélecteur de note façon Ctrl+P : saisie floue, Entrée pour ouvrir."""
+
+    def __init__(self, parent, root_paths, open_note_callback):
+        super().__init__(parent)
+        self.root_paths = [root_paths] if isinstance(root_paths, str) else list(root_paths)
+        self.open_note_callback = open_note_callback
+        # Plusieurs racines : un index par racine, résultats fusionnés par score.
+        # La fenêtre s'ouvre tout de suite ; les index encore en construction s'ajoutent à leur fin.
+        self.indexes = []
+        self.pending = set()
+        self._signals = _IndexSignals(self)
+        self._signals.ready.connect(self.on_index_ready)
+        for root in self.root_paths:
+            if peek_path_index(root) is None:
+                self.pending.add(os.path.normpath(root))
+                prewarm(root, self._index_ready)
+        self._collect_indexes()
+
+        self.setWindowTitle(t("quick_open"))
+        self.resize(560, 380)
+
+        self.input = QLineEdit()
+        self.input.setPlaceholderText(t("quick_open_placeholder"))
+        self.input.textChanged.connect(self.on_text_changed)
+        self.input.returnPressed.connect(self.open_current)
+        self.input.installEventFilter(self)
+
+        self.results = QListWidget()
+        self.results.setUniformItemSizes(True)
+        self.results.itemActivated.connect(self.open_item)
+
+        self.status = QLabel(t("quick_open_indexing"))
+        self.status.setVisible(bool(self.pending))
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.input)
+        layout.addWidget(self.results)
+        layout.addWidget(self.status)
+
+        self.on_text_changed("")
+
+    def _collect_indexes(self):
+        indexes = (peek_path_index(root) for root in self.root_paths)
+        self.indexes = [index for index in indexes if index is not None]
+
+    def _index_ready(self, root):
+        """Appelé depuis le thread de construction : relais vers le thread GUI."""
+        try:
+            self._signals.ready.emit(root)
+        except RuntimeError:
+            pass  # fenêtre détruite entre-temps
+
+    def on_index_ready(self, root):
+        self.pending.discard(os.path.normpath(root))
+        self._collect_indexes()
+        self.status.setVisible(bool(self.pending))
+        self.on_text_changed(self.input.text())
+
+    def on_text_changed(self, text):
+        self.results.clear()
+        scored = [(score, path, index) for index in self.indexes for score, path in index.scored_query(text)]
+        if text.strip():
+            scored = heapq.nlargest(MAX_RESULTS, scored, key=lambda hit: hit[0])
+        for _, path, index in scored[:MAX_RESULTS]:
+            rel = os.path.relpath(path, index.root_path)
+            folder = os.path.dirname(rel) or "."
+            if len(self.indexes) > 1:
+                folder = os.path.join(os.path.basename(index.root_path), os.path.dirname(rel))
+            item = QListWidgetItem(f"{os.path.basename(rel)}    —    {folder}")
+            item.setData(Qt.ItemDataRole.UserRole, path)
+            self.results.addItem(item)
+        if self.results.count():
+            self.results.setCurrentRow(0)
+
+    def eventFilter(self, obj, event):
+        # Flèches haut / bas : navigation dans la liste sans quitter la saisie
+        if obj is self.input and event.type() == QEvent.Type.KeyPress:
+            if event.key() in (Qt.Key.Key_Down, Qt.Key.Key_Up):
+                step = 1 if event.key() == Qt.Key.Key_Down else -1
+                row = max(0, min(self.results.count() - 1, self.results.currentRow() + step))
+                self.results.setCurrentRow(row)
+                return True
+        return super().eventFilter(obj, event)
+
+    def open_current(self):
+        item = self.results.currentItem()
+        if item:
+            self.open_item(item)
+
+    def open_item(self, item):
+        path = item.data(Qt.ItemDataRole.UserRole)
+        if storage.is_file(path):
+            self.open_note_callback(path)
+            self.accept()
@@ -0,0 +1,764 @@
+# search_index.py — index inversé persistant pour la recherche globale
+# - Jeton -> notes (postings) stocké dans <racine>/.ankinote/index.json
+# - Validation au démarrage par mtime / taille
+# - Mise à jour incrémentale via les événements de storage.py
+# - Requêtes structurées (query.py) : notes candidates tirées de l'index, puis lues par morceaux
+# - Plusieurs racines : un index (shard) par racine, interrogés en parallèle (iter_search_shards)
+
+import os, re, json, math, html, time, queue, threading
+from collections import namedtuple
+from . import storage
+from .query import parse as parse_query, Matcher
+
+INDEX_DIRNAME = ".ankinote"
+INDEX_FILENAME = "index.json"
+INDEX_VERSION = 1
+MAX_TOKEN_LEN = 64
+
+# --- Classement BM25 ---
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_BOOST = 2.0      # mot présent dans le nom de la note
+PARTIAL_WEIGHT = 0.5   # mot trouvé seulement comme sous-chaîne d'un jeton
+SNIPPET_BYTES = 180
+# Requêtes structurées : un lot partiel est transmis au moins à cet intervalle
+STREAM_BATCH_SECONDS = 0.1
+# Plusieurs racines : une racine encore occupée (requête précédente) ou muette depuis ce délai,
+# alors qu'une autre a terminé, est signalée indisponible ; ses résultats suivent dès qu'elle répond
+SHARD_WAIT_SECONDS = 5.0
+_SHARD_BUSY = "busy"
+
+# Résultat de recherche : position = offset (caractères) de la meilleure occurrence
+SearchHit = namedtuple("SearchHit", "title path score position term snippet")
+
+_TOKEN_RE = re.compile(r"\w+")
+
+_indexes = {}  # racine normalisée -> NotebookIndex
+_ready = {}    # racine normalisée -> threading.Event (validation initiale terminée)
+_stale = {}    # racine normalisée -> dossiers modifiés pendant la validation initiale
+_registry_lock = threading.Lock()
+_shard_locks = {}  # racine -> verrou tenu par la requête en cours sur cette racine
+
+
+# ----------------------------- Analyse du texte -----------------------------
+
+def tokenize(text):
+    """Renvoie la liste des jetons (minuscules) d'un texte."""
+    return [m.group().lower() for m in _TOKEN_RE.finditer(text) if len(m.group()) <= MAX_TOKEN_LEN]
+
+
+def analyze(text):
+    """Analyse une note : {jeton: [tf, offset caractère, offset octet]} et nombre de jetons.
+
+    Les offsets sont ceux de la première occurrence ; l'offset en octets est
+    calculé de proche en proche, uniquement pour les nouvelles occurrences.
+    """
+    terms = {}
+    length = 0
+    last_char, last_byte = 0, 0
+    for m in _TOKEN_RE.finditer(text):
+        word = m.group()
+        if len(word) > MAX_TOKEN_LEN:
+            continue
+        length += 1
+        tok = word.lower()
+        entry = terms.get(tok)
+        if entry is not None:
+            entry[0] += 1
+            continue
+        start = m.start()
+        last_byte += len(text[last_char:start].encode("utf-8", "surrogatepass"))
+        last_char = start
+        terms[tok] = [1, start, last_byte]
+    return terms, length
+
+
+def highlight(text, words):
+    """Échappe `text` en HTML et met en évidence les mots recherchés."""
+    words = sorted((w for w in words if w), key=len, reverse=True)
+    if not words:
+        return html.escape(text)
+    pattern = re.compile("|".join(re.escape(w) for w in words), re.IGNORECASE)
+    out, last = [], 0
+    for m in pattern.finditer(text):
+        out.append(html.escape(text[last:m.start()]))
+        out.append(f"<b style='background:#fff3a0'>{html.escape(m.group())}</b>")
+        last = m.end()
+    out.append(html.escape(text[last:]))
+    return "".join(out)
+
+
+_is_hidden = storage.is_hidden_name
+
+
+def iter_query(query, paths, limit=500, batch_size=50, cancelled=None):
+    """SearchHit par lots pour une requête structurée appliquée aux notes `paths`, dans l'ordre.
+
+    Les résultats sont transmis au fil de la lecture (score nul : pas de classement).
+    """
+    cancelled = cancelled or (lambda: False)
+    matcher = Matcher(query)
+    words = query.highlight_words()
+    batch, found, last = [], 0, time.monotonic()
+    for path in paths:
+        if cancelled():
+            return
+        match = matcher.match(path, cancelled)
+        if match is None:
+            continue
+        position, term, excerpt = match
+        snippet = highlight(excerpt, words + [term] if term else words)
+        batch.append(SearchHit(os.path.basename(path), path, 0.0, position, term, snippet))
+        found += 1
+        if found >= limit or len(batch) >= batch_size or time.monotonic() - last >= STREAM_BATCH_SECONDS:
+            yield batch
+            batch, last = [], time.monotonic()
+            if found >= limit:
+                return
+    if batch:
+        yield batch
+
+
+# -------------------------------- Index par racine --------------------------------
+
+class NotebookIndex:
+    """Index inversé d'un dossier racine du Notebook (notes .md uniquement)."""
+
+    def __init__(self, root_path):
+        self.root_path = os.path.normpath(root_path)
+        self.index_dir = os.path.join(self.root_path, INDEX_DIRNAME)
+        self.index_file = os.path.join(self.index_dir, INDEX_FILENAME)
+        self.files = {}       # chemin relatif -> [mtime_ns, taille, nb de jetons]
+        self.postings = {}    # jeton -> {chemin relatif: [tf, offset car., offset octet]}
+        self._note_terms = {}  # chemin relatif -> ensemble des jetons (pour les suppressions)
+        self._lock = threading.RLock()
+        self._dirty = False
+
+    # ----------------------------- Chemins -----------------------------
+
+    def _rel(self, path):
+        rel = os.path.relpath(os.path.normpath(path), self.root_path)
+        if rel == os.curdir or rel.startswith(os.pardir):
+            return None
+        return rel
+
+    def full_path(self, rel):
+        return os.path.join(self.root_path, rel)
+
+    def contains(self, path):
+        return self._rel(path) is not None or os.path.normpath(path) == self.root_path
+
+    # ----------------------------- Persistance -----------------------------
+
+    def load(self):
+        """Charge l'index depuis le disque (silencieusement vide si absent ou invalide)."""
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        with self._lock:
+            self.files = data.get("files", {})
+            self.postings = data.get("postings", {})
+            self._note_terms = {rel: set() for rel in self.files}
+            for tok, posting in self.postings.items():
+                for rel in posting:
+                    self._note_terms.setdefault(rel, set()).add(tok)
+            self._dirty = False
+
+    def save(self):
+        """Écrit l'index sur disque s'il a changé (écriture atomique)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(
+                {"version": INDEX_VERSION, "files": self.files, "postings": self.postings},
+                ensure_ascii=False, separators=(",", ":"),
+            )
+            self._dirty = False
+        try:
+            os.makedirs(self.index_dir, exist_ok=True)
+            tmp = self.index_file + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, self.index_file)
+        except OSError as e:
+            self._dirty = True
+            print(f"[Notebook] Erreur d'écriture de l'index : {e}")
+
+    # ----------------------------- Validation -----------------------------
+
+    def _scan(self):
+        """Parcourt la racine (stat uniquement) : {chemin relatif: (mtime_ns, taille)}."""
+        return {
+            os.path.relpath(full, self.root_path): (mtime, size)
+            for full, mtime, size in storage.walk_notes(self.root_path)
+        }
+
+    def refresh(self):
+        """Valide l'index contre le disque et ne relit que les notes modifiées."""
+        found = self._scan()
+        changed = 0
+        with self._lock:
+            for rel in [r for r in self.files if r not in found]:
+                self._drop(rel)
+                changed += 1
+        for rel, (mtime, size) in found.items():
+            meta = self.files.get(rel)
+            if meta and meta[0] == mtime and meta[1] == size:
+                continue
+            self.update_file(self.full_path(rel))
+            changed += 1
+        return changed
+
+    # ----------------------------- Mises à jour -----------------------------
+
+    def _drop(self, rel):
+        for tok in self._note_terms.pop(rel, ()):
+            posting = self.postings.get(tok)
+            if posting is not None:
+                posting.pop(rel, None)
+                if not posting:
+                    del self.postings[tok]
+        if self.files.pop(rel, None) is not None:
+            self._dirty = True
+
+    def update_file(self, path, content=None):
+        """(Ré)indexe une note ; le contenu est relu sur disque s'il n'est pas fourni."""
+        rel = self._rel(path)
+        if rel is None or not rel.endswith(".md") or any(_is_hidden(p) for p in rel.split(os.sep)):
+            return
+        st = storage.path_stat(path)
+        if st is None or st[2]:
+            with self._lock:
+                self._drop(rel)
+            return
+        if content is None:
+            content = storage.load_markdown(path)
+        terms, length = analyze(content)
+        with self._lock:
+            self._drop(rel)
+            for tok, entry in terms.items():
+                self.postings.setdefault(tok, {})[rel] = entry
+            self._note_terms[rel] = set(terms)
+            self.files[rel] = [st[0], st[1], length]
+            self._dirty = True
+
+    def sync_dir(self, path):
+        """Aligne l'index sur un dossier modifié hors du Notebook (stat des enfants directs).
+
+        Les notes disparues sont retirées, les notes nouvelles ou modifiées
+        (mtime / taille) réindexées ; un sous-dossier apparu est indexé en entier.
+        """
+        rel_dir = self._rel(path)
+        if rel_dir is None and os.path.normpath(path) != self.root_path:
+            return
+        if rel_dir is not None and any(_is_hidden(p) for p in rel_dir.split(os.sep)):
+            return
+        prefix = os.path.join(rel_dir, "") if rel_dir else ""
+        listing = {name: is_dir for name, is_dir, _ in storage.list_dir(path) if not _is_hidden(name)}
+
+        known = {}  # premier composant sous le dossier -> notes indexées
+        with self._lock:
+            for r in self.files:
+                if r.startswith(prefix):
+                    known.setdefault(r[len(prefix):].split(os.sep, 1)[0], []).append(r)
+            for head, rels in known.items():
+                entry_is_dir = listing.get(head)
+                if entry_is_dir is None or (len(rels) == 1 and rels[0] == prefix + head and entry_is_dir):
+                    for r in rels:
+                        self._drop(r)
+
+        for name, entry_is_dir in listing.items():
+            full = os.path.join(path, name)
+            if entry_is_dir:
+                if name not in known:
+                    # Nouveau sous-dossier (copie, git pull...) : indexation complète
+                    for note, _, _ in storage.walk_notes(full):
+                        self.update_file(note)
+                continue
+            if not name.endswith(".md"):
+                continue
+            st = storage.path_stat(full)
+            if st is None:
+                continue
+            meta = self.files.get(prefix + name)
+            if not meta or meta[0] != st[0] or meta[1] != st[1]:
+                self.update_file(full)
+
+    def remove_path(self, path):
+        """Retire une note, ou toutes les notes d'un dossier."""
+        rel = self._rel(path)
+        if rel is None:
+            return
+        prefix = os.path.join(rel, "")
+        with self._lock:
+            for r in [r for r in self.files if r == rel or r.startswith(prefix)]:
+                self._drop(r)
+
+    def rename_path(self, old_path, new_path):
+        """Reporte un renommage (fichier ou dossier) sans relire les notes."""
+        old_rel, new_rel = self._rel(old_path), self._rel(new_path)
+        if old_rel is None:
+            return
+        if new_rel is None:
+            self.remove_path(old_path)
+            return
+        prefix = os.path.join(old_rel, "")
+        with self._lock:
+            moved = [r for r in self.files if r == old_rel or r.startswith(prefix)]
+            for r in moved:
+                target = new_rel + r[len(old_rel):]
+                if not target.endswith(".md"):
+                    # Une note renommée sans extension .md sort de l'index
+                    self._drop(r)
+                    continue
+                toks = self._note_terms.pop(r, set())
+                for tok in toks:
+                    posting = self.postings[tok]
+                    posting[target] = posting.pop(r)
+                self._note_terms[target] = toks
+                self.files[target] = self.files.pop(r)
+                self._dirty = True
+
+    # -------------------------------- Requêtes --------------------------------
+
+    def _matching_terms(self, words, cancelled):
+        """{mot: [(jeton, poids)]} : correspondance exacte (1.0) ou partielle (PARTIAL_WEIGHT).
+
+        Le vocabulaire est parcouru hors verrou : les sauvegardes ne sont pas bloquées.
+        Renvoie None en cas d'annulation.
+        """
+        with self._lock:
+            vocabulary = list(self.postings)
+        matching = {word: [] for word in words}
+        for n, tok in enumerate(vocabulary):
+            if n % 4096 == 0 and cancelled():
+                return None
+            for word in words:
+                if word in tok:
+                    matching[word].append((tok, 1.0 if tok == word else PARTIAL_WEIGHT))
+        return matching
+
+    def rank(self, text, limit=500, cancelled=None):
+        """Classement BM25 (avec bonus de titre) calculé depuis les statistiques stockées.
+
+        Renvoie [(score, chemin relatif, jeton, offset car., offset octet)] trié
+        par score décroissant. Chaque mot doit apparaître dans le contenu ou
+        le nom de la note ; la requête entière trouvée dans le nom suffit.
+        """
+        text = text.strip().lower()
+        if not text:
+            return []
+        cancelled = cancelled or (lambda: False)
+        words = set(tokenize(text))
+        matching = self._matching_terms(words, cancelled)
+        if matching is None:
+            return []
+
+        with self._lock:
+            n_docs = len(self.files) or 1
+            avgdl = (sum(meta[2] for meta in self.files.values()) / n_docs) or 1.0
+            scores, best = {}, {}
+            required = None
+            for word, terms in matching.items():
+                word_scores = {}
+                word_best = {}
+                for tok, weight in terms:
+                    posting = self.postings.get(tok, {})
+                    idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                    for rel, (tf, char_off, byte_off) in posting.items():
+                        dl = self.files[rel][2]
+                        score = weight * idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * dl / avgdl))
+                        if score > word_scores.get(rel, 0.0):
+                            word_scores[rel] = score
+                            word_best[rel] = (score, tok, char_off, byte_off)
+                # Bonus de titre : le mot apparaît dans le nom du fichier
+                title_idf = math.log(1 + n_docs)
+                for rel in self.files:
+                    if word in os.path.basename(rel).lower():
+                        word_scores[rel] = word_scores.get(rel, 0.0) + TITLE_BOOST * title_idf
+                required = set(word_scores) if required is None else required & set(word_scores)
+                for rel, score in word_scores.items():
+                    scores[rel] = scores.get(rel, 0.0) + score
+                    hit = word_best.get(rel)
+                    if hit and hit[0] > best.get(rel, (0.0,))[0]:
+                        best[rel] = hit
+                if cancelled():
+                    return []
+            required = required or set()
+            # Requête entière dans le nom de fichier (ex. « cours.md ») : toujours retenue
+            for rel in self.files:
+                if text in os.path.basename(rel).lower():
+                    if rel not in required:
+                        required.add(rel)
+                        scores[rel] = scores.get(rel, 0.0)
+                    scores[rel] += TITLE_BOOST * math.log(1 + n_docs)
+
+        ranked = sorted(required, key=lambda r: (-scores[r], r))[:limit]
+        results = []
+        for rel in ranked:
+            _, tok, char_off, byte_off = best.get(rel, (0.0, None, None, None))
+            results.append((scores[rel], rel, tok, char_off, byte_off))
+        return results
+
+    def candidates(self, query, cancelled=None):
+        """Notes (chemins complets, triés) pouvant satisfaire une requête structurée.
+
+        La portée (in:) et les jetons que chaque terme impose sont résolus par
+        l'index : seules ces notes seront lues.
+        """
+        cancelled = cancelled or (lambda: False)
+        with self._lock:
+            rels = list(self.files)
+            vocabulary = list(self.postings)
+        if query.scopes or query.excluded:
+            rels = [rel for rel in rels if query.in_scope(rel.replace(os.sep, "/"))]
+        stems = {rel: os.path.splitext(os.path.basename(rel))[0] for rel in rels}
+        cache = {}
+
+        def with_token(token):
+            if token not in cache:
+                toks = [tok for tok in vocabulary if token in tok]
+                found = set()
+                with self._lock:
+                    for tok in toks:
+                        found.update(self.postings.get(tok, ()))
+                cache[token] = found
+            return cache[token]
+
+        def allowed(node):
+            # Ensemble de notes possibles, ou None si le nœud ne restreint rien
+            if node is None or cancelled():
+                return None
+            kind = node[0]
+            if kind == "term":
+                term = query.terms[node[1]]
+                tokens = term.tokens() if term.field != "name" else None
+                if tokens is None:
+                    return None
+                found = set.intersection(*(with_token(tok) for tok in tokens))
+                if term.field == "any":
+                    found |= {rel for rel, stem in stems.items() if term.pattern.search(stem)}
+                return found
+            if kind == "not":
+                return None
+            parts = [allowed(child) for child in node[1]]
+            if kind == "or":
+                return None if any(p is None for p in parts) else set().union(*parts)
+            known = [p for p in parts if p is not None]
+            return set.intersection(*known) if known else None
+
+        keep = allowed(query.expr)
+        if cancelled():
+            return []
+        return [self.full_path(rel) for rel in sorted(rels) if keep is None or rel in keep]
+
+    def snippet(self, rel, byte_off, words, width=SNIPPET_BYTES):
+        """Extrait HTML surligné autour d'un offset stocké (lecture d'une petite fenêtre seulement)."""
+        if byte_off is None:
+            return ""
+        start = max(0, byte_off - width // 3)
+        try:
+            raw = storage.read_bytes(self.full_path(rel), start, width)
+        except (OSError, ValueError):
+            return ""
+        excerpt = " ".join(raw.decode("utf-8", "ignore").split())
+        if not excerpt:
+            return ""
+        return ("…" if start else "") + highlight(excerpt, words) + ("…" if len(raw) == width else "")
+
+    def iter_search(self, text, limit=500, batch_size=50, cancelled=None):
+        """Produit les résultats classés (SearchHit) par lots, avec extrait surligné.
+
+        `cancelled()` est consulté régulièrement pour abandonner la requête.
+        Une requête structurée (phrase, regex, OR, in:...) est évaluée note par note.
+        """
+        cancelled = cancelled or (lambda: False)
+        query = parse_query(text)
+        if not query.is_simple():
+            yield from iter_query(query, self.candidates(query, cancelled), limit, batch_size, cancelled)
+            return
+        ranked = self.rank(text, limit, cancelled)
+        words = set(tokenize(text.lower()))
+        for i in range(0, len(ranked), batch_size):
+            if cancelled():
+                return
+            batch = []
+            for score, rel, tok, char_off, byte_off in ranked[i:i + batch_size]:
+                batch.append(SearchHit(
+                    os.path.basename(rel), self.full_path(rel), score,
+                    char_off, tok, self.snippet(rel, byte_off, words),
+                ))
+            yield batch
+
+    def search(self, text, limit=500):
+        """Version bloquante de iter_search : liste complète des résultats."""
+        return [hit for batch in self.iter_search(text, limit) for hit in batch]
+
+
+# -------------------------------- Index SQLite (FTS5) --------------------------------
+
+class FtsIndex:
+    """Recherche d'un notebook SQLite : déléguée à sa table FTS5.
+
+    La table est maintenue par les déclencheurs de la base : les méthodes de
+    mise à jour appelées par les événements de stockage n'ont rien à faire.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.root_path = backend.root_path
+
+    def contains(self, path):
+        rel = os.path.relpath(os.path.normpath(path), self.root_path)
+        return not rel.startswith(os.pardir)
+
+    def load(self):
+        pass
+
+    def refresh(self):
+        return 0
+
+    def save(self):
+        pass
+
+    def update_file(self, path, content=None):
+        pass
+
+    def sync_dir(self, path):
+        pass
+
+    def remove_path(self, path):
+        pass
+
+    def rename_path(self, old_path, new_path):
+        pass
+
+    def iter_search(self, text, limit=500, batch_size=50, cancelled=None):
+        """Mêmes lots de SearchHit que NotebookIndex.iter_search (classement BM25 de FTS5).
+
+        La position est 0 : l'éditeur sélectionne la première occurrence de `term`.
+        Une requête structurée parcourt les seuls dossiers de sa portée (in:).
+        """
+        cancelled = cancelled or (lambda: False)
+        query = parse_query(text)
+        if not query.is_simple():
+            yield from iter_query(query, self.candidates(query), limit, batch_size, cancelled)
+            return
+        words = tokenize(text.lower())
+        rows = self.backend.search(words, limit)
+        term = words[0] if words else None
+        for i in range(0, len(rows), batch_size):
+            if cancelled():
+                return
+            yield [SearchHit(os.path.basename(path), path, score, 0, term, snippet)
+                   for path, score, snippet in rows[i:i + batch_size]]
+
+    def candidates(self, query, cancelled=None):
+        """Notes des dossiers de la portée (parcours limité à ces dossiers), triées."""
+        tops = [os.path.join(self.root_path, *scope.split("/")) for scope in query.scopes] or [self.root_path]
+        paths = set()
+        for top in tops:
+            for path, _, _ in storage.walk_notes(top):
+                rel = os.path.relpath(path, self.root_path).replace(os.sep, "/")
+                if query.in_scope(rel):
+                    paths.add(path)
+        return sorted(paths)
+
+    def search(self, text, limit=500):
+        return [hit for batch in self.iter_search(text, limit) for hit in batch]
+
+
+# ----------------------------- Registre des index -----------------------------
+
+def get_index(root_path):
+    """Renvoie l'index (chargé et validé) associé à une racine.
+
+    Sûr depuis plusieurs threads : un seul appelant effectue la validation
+    initiale, les autres attendent qu'elle soit terminée.
+    """
+    key = os.path.normpath(root_path)
+    with _registry_lock:
+        index = _indexes.get(key)
+        created = index is None
+        if created:
+            backend = storage.open_notebook(key)
+            index = FtsIndex(backend) if backend.name == "sqlite" else NotebookIndex(key)
+            _indexes[key] = index
+            _ready[key] = threading.Event()
+        ready = _ready[key]
+    if not created:
+        ready.wait()
+        return index
+    try:
+        index.load()
+        index.refresh()
+        _catch_up(key, index)
+        index.save()
+    finally:
+        with _registry_lock:
+            _stale.pop(key, None)
+            ready.set()
+    return index
+
+
+def _catch_up(key, index):
+    """Relit les dossiers modifiés pendant la validation, puis marque l'index prêt.
+
+    L'index devient prêt sous le verrou du registre, une fois la liste vide :
+    chaque modification est soit relue ici, soit appliquée directement ensuite.
+    """
+    while True:
+        with _registry_lock:
+            dirs = _stale.pop(key, None)
+            if not dirs:
+                _ready[key].set()
+                return
+        for path in sorted(dirs):
+            index.sync_dir(path)
+
+
+def _shard_lock(root_path):
+    with _registry_lock:
+        return _shard_locks.setdefault(root_path, threading.Lock())
+
+
+def _search_shard(root_path, text, limit, batch_size, cancelled, results, wait):
+    """Thread d'une racine : ses lots de résultats vont dans `results`, puis (racine, True) à la fin.
+
+    Attend d'abord la fin de la requête précédente sur la même racine ; (racine, _SHARD_BUSY)
+    signale une attente de plus de `wait` secondes (la requête part quand même ensuite).
+    """
+    lock = _shard_lock(root_path)
+    deadline = time.monotonic() + wait
+    while not lock.acquire(timeout=0.05):
+        if cancelled():
+            results.put((root_path, True))
+            return
+        if deadline is not None and time.monotonic() > deadline:
+            deadline = None
+            results.put((root_path, _SHARD_BUSY))
+    failed = False
+    try:
+        index = get_index(root_path)
+        for batch in index.iter_search(text, limit, batch_size, cancelled):
+            if cancelled():
+                break
+            results.put((root_path, batch))
+    except OSError as e:
+        print(f"[Notebook] Recherche impossible dans {root_path} : {e}")
+        failed = True
+    finally:
+        lock.release()
+        results.put((root_path, None if failed else True))
+
+
+def iter_search_shards(root_paths, text, limit=500, batch_size=50, cancelled=None, wait=SHARD_WAIT_SECONDS):
+    """(racine, lot de SearchHit) pour toutes les racines, interrogées en parallèle.
+
+    Les lots arrivent dans l'ordre où les racines répondent (chacun est classé ;
+    la fusion revient à l'appelant). Une racine lente ne retient pas les autres :
+    (racine, None) la signale indisponible (encore occupée par une requête
+    précédente après `wait` secondes, ou muette depuis `wait` secondes alors
+    qu'une autre racine a terminé). Ses lots suivent quand même dès qu'elle
+    répond ; seule une racine en erreur n'envoie plus rien.
+    """
+    cancelled = cancelled or (lambda: False)
+    results = queue.Queue()
+    pending = {os.path.normpath(r) for r in root_paths}
+    for root in pending:
+        threading.Thread(target=_search_shard, args=(root, text, limit, batch_size, cancelled, results, wait),
+                         name="NotebookSearchShard", daemon=True).start()
+    last_seen = dict.fromkeys(pending, time.monotonic())
+    reported = set()  # racines déjà signalées indisponibles
+    finished_one = False
+    while pending:
+        if cancelled():
+            return
+        try:
+            root, item = results.get(timeout=0.05)
+        except queue.Empty:
+            if finished_one:
+                now = time.monotonic()
+                for root in sorted(r for r in pending - reported if now - last_seen[r] > wait):
+                    reported.add(root)
+                    yield root, None
+            continue
+        last_seen[root] = time.monotonic()
+        if item is _SHARD_BUSY:
+            if root not in reported:
+                reported.add(root)
+                yield root, None
+            continue
+        if isinstance(item, list):
+            yield root, item
+            continue
+        pending.discard(root)
+        finished_one = True
+        if item is None and root not in reported:
+            yield root, None
+
+
+def save_indexes():
+    """Écrit sur disque tous les index chargés qui ont changé."""
+    with _registry_lock:
+        loaded = [i for key, i in _indexes.items() if _ready[key].is_set()]
+    for index in loaded:
+        index.save()
+
+
+def _index_for(path, stale_dir=None):
+    """Index prêt de la racine qui contient `path`, sinon None.
+
+    Si cette racine est encore en validation, `stale_dir` (par défaut le dossier
+    parent) sera relu à la fin : la modification n'est pas perdue.
+    """
+    path = os.path.normpath(path)
+    with _registry_lock:
+        candidates = [(key, i) for key, i in _indexes.items() if i.contains(path)]
+        if not candidates:
+            return None
+        # La racine la plus profonde l'emporte (racines imbriquées)
+        key, index = max(candidates, key=lambda c: len(c[0]))
+        if _ready[key].is_set():
+            return index
+        stale_dir = os.path.normpath(stale_dir) if stale_dir else os.path.dirname(path)
+        _stale.setdefault(key, set()).add(stale_dir if index.contains(stale_dir) else key)
+    return None
+
+
+def sync_directory(path):
+    """Reporte dans l'index concerné un changement externe dans un dossier."""
+    index = _index_for(path, stale_dir=path)
+    if index is not None:
+        index.sync_dir(path)
+
+
+def _on_storage_event(event, path, extra=None):
+    index = _index_for(path)
+    if event == "renamed":
+        target = _index_for(extra)
+        if index is not None and index is target:
+            index.rename_path(path, extra)
+            return
+        if index is not None:
+            index.remove_path(path)
+        if target is not None:
+            # Note ou dossier venu d'une autre racine : relu depuis son nouveau dossier parent
+            target.sync_dir(os.path.dirname(extra))
+        return
+    if index is None:
+        return
+    if event == "saved":
+        index.update_file(path, extra)
+    elif event == "created":
+        if storage.is_file(path):
+            index.update_file(path)
+    elif event == "deleted":
+        index.remove_path(path)
+
+
+storage.add_listener(_on_storage_event)
@@ -0,0 +1,48 @@
+# session.py — état de l'interface conservé d'une ouverture du Notebook à la suivante
+# - Dossiers dépliés (avec leur contenu), élément sélectionné, onglets ouverts et positions
+# - Fichier <racine>/.ankinote/session.json, écrit à la fermeture du panneau
+# - Chemins relatifs à la racine ("/" comme séparateur)
+
+import os, json
+from . import storage
+
+INDEX_DIRNAME = ".ankinote"
+SESSION_FILENAME = "session.json"
+SESSION_VERSION = 1
+
+
+def session_file(root_path):
+    return os.path.join(os.path.normpath(root_path), INDEX_DIRNAME, SESSION_FILENAME)
+
+
+def to_rel(root_path, path):
+    """Chemin relatif à la racine, ou None s'il est en dehors."""
+    rel = os.path.relpath(os.path.normpath(path), os.path.normpath(root_path))
+    if rel.startswith(os.pardir):
+        return None
+    return "" if rel == os.curdir else rel.replace(os.sep, "/")
+
+
+def to_abs(root_path, rel):
+    return os.path.join(os.path.normpath(root_path), *rel.split("/")) if rel else os.path.normpath(root_path)
+
+
+def load_session(root_path):
+    """Dernière session enregistrée pour cette racine ({} si absente, illisible ou d'une autre version)."""
+    try:
+        with open(session_file(root_path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != SESSION_VERSION:
+        return {}
+    return data
+
+
+def save_session(root_path, state):
+    state = dict(state, version=SESSION_VERSION)
+    try:
+        storage.write_atomic(session_file(root_path),
+                             json.dumps(state, ensure_ascii=False, separators=(",", ":")))
+    except OSError as e:
+        print(f"[Notebook] Erreur d'écriture de la session : {e}")
@@ -0,0 +1,355 @@
+# sqlite_backend.py — stockage du Notebook dans une base SQLite unique
+# - Une ligne par note / dossier, chemins relatifs (séparateur "/")
+# - Table FTS5 tenue à jour par déclencheurs : la recherche ne relit aucun fichier
+# - Mode WAL (lectures pendant l'écriture), écritures groupées en une transaction
+
+import os, html, sqlite3, threading, time
+
+DB_DIRNAME = ".ankinote"
+DB_FILENAME = "notebook.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    content TEXT NOT NULL DEFAULT '',
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_parent ON entries(parent, name);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    name, content, content='entries', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries WHEN new.is_dir = 0 BEGIN
+    INSERT INTO entries_fts(rowid, name, content) VALUES (new.id, new.name, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries WHEN old.is_dir = 0 BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, name, content) VALUES ('delete', old.id, old.name, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_au AFTER UPDATE OF name, content ON entries WHEN old.is_dir = 0 BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, name, content) VALUES ('delete', old.id, old.name, old.content);
+    INSERT INTO entries_fts(rowid, name, content) VALUES (new.id, new.name, new.content);
+END;
+"""
+
+# Marqueurs d'extrait FTS5 (remplacés par du HTML après échappement)
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+HIGHLIGHT_OPEN = "<b style='background:#fff3a0'>"
+
+
+def db_path(root_path):
+    return os.path.join(root_path, DB_DIRNAME, DB_FILENAME)
+
+
+def is_sqlite_notebook(root_path):
+    return os.path.isfile(db_path(root_path))
+
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _fts_query(words):
+    """Requête FTS5 : chaque mot comme préfixe, tous requis."""
+    return " ".join('"' + w.replace('"', '""') + '"*' for w in words)
+
+
+class SQLiteBackend:
+    """Notebook stocké dans `<racine>/.ankinote/notebook.sqlite`.
+
+    Les chemins manipulés restent des chemins complets sous la racine
+    (comme pour les fichiers) : l'arbre, l'éditeur et l'index n'y voient
+    aucune différence. Une connexion par thread ; WAL autorise les lectures
+    pendant que l'écrivain en arrière-plan valide ses transactions.
+    """
+
+    name = "sqlite"
+    watchable = False  # aucune modification externe possible : pas de surveillance disque
+
+    def __init__(self, root_path):
+        self.root_path = os.path.abspath(root_path)
+        self.db_file = db_path(self.root_path)
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        try:
+            conn.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False  # SQLite compilé sans FTS5 : recherche par LIKE
+
+    # ----------------------------- Connexions -----------------------------
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+    # ----------------------------- Chemins -----------------------------
+
+    def _rel(self, path):
+        rel = os.path.relpath(os.path.normpath(path), self.root_path)
+        if rel == os.curdir:
+            return ""
+        if rel.startswith(os.pardir):
+            raise ValueError(f"{path} est hors du Notebook {self.root_path}")
+        return rel.replace(os.sep, "/")
+
+    def _full(self, rel):
+        return os.path.join(self.root_path, *rel.split("/")) if rel else self.root_path
+
+    @staticmethod
+    def _split(rel):
+        parent, _, name = rel.rpartition("/")
+        return parent, name
+
+    def _ensure_parents(self, conn, rel):
+        parent = self._split(rel)[0]
+        missing = []
+        while parent:
+            row = conn.execute("SELECT is_dir FROM entries WHERE path = ?", (parent,)).fetchone()
+            if row is not None:
+                if not row[0]:
+                    raise NotADirectoryError(self._full(parent))
+                break
+            missing.append(parent)
+            parent = self._split(parent)[0]
+        now = time.time_ns()
+        for rel_dir in reversed(missing):
+            p, n = self._split(rel_dir)
+            conn.execute(
+                "INSERT INTO entries(path, parent, name, is_dir, mtime_ns) VALUES (?, ?, ?, 1, ?)",
+                (rel_dir, p, n, now),
+            )
+
+    # ----------------------------- Lecture -----------------------------
+
+    def list_dir(self, path):
+        rel = self._rel(path)
+        rows = self._conn().execute(
+            "SELECT name, is_dir, id FROM entries WHERE parent = ? ORDER BY name", (rel,)
+        ).fetchall()
+        return [(name, bool(is_dir), ino) for name, is_dir, ino in rows]
+
+    def stat(self, path):
+        """(mtime_ns, taille, est_dossier, identifiant) ou None."""
+        try:
+            rel = self._rel(path)
+        except ValueError:
+            return None
+        if not rel:
+            return (0, 0, True, 0)
+        row = self._conn().execute(
+            "SELECT mtime_ns, size, is_dir, id FROM entries WHERE path = ?", (rel,)
+        ).fetchone()
+        if row is None:
+            return None
+        return (row[0], row[1], bool(row[2]), row[3])
+
+    def read(self, path):
+        row = self._conn().execute(
+            "SELECT content FROM entries WHERE path = ? AND is_dir = 0", (self._rel(path),)
+        ).fetchone()
+        if row is None:
+            raise FileNotFoundError(path)
+        return row[0]
+
+    def iter_chunks(self, path, chunk_size):
+        content = self.read(path)
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+
+    def read_bytes(self, path, offset, size):
+        return self.read(path).encode("utf-8")[offset:offset + size]
+
+    def walk_notes(self, path):
+        """(chemin complet, mtime_ns, taille) de chaque note sous `path`."""
+        rel = self._rel(path)
+        if rel:
+            prefix = rel + "/"
+            rows = self._conn().execute(
+                "SELECT path, mtime_ns, size FROM entries WHERE is_dir = 0 AND substr(path, 1, ?) = ?",
+                (len(prefix), prefix),
+            ).fetchall()
+        else:
+            rows = self._conn().execute("SELECT path, mtime_ns, size FROM entries WHERE is_dir = 0").fetchall()
+        for rel, mtime, size in rows:
+            yield self._full(rel), mtime, size
+
+    # ----------------------------- Écriture -----------------------------
+
+    def _write(self, conn, path, content):
+        rel = self._rel(path)
+        if not rel:
+            raise IsADirectoryError(path)
+        self._ensure_parents(conn, rel)
+        parent, name = self._split(rel)
+        conn.execute(
+            "INSERT INTO entries(path, parent, name, is_dir, content, mtime_ns, size) VALUES (?, ?, ?, 0, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET content = excluded.content, mtime_ns = excluded.mtime_ns, "
+            "size = excluded.size WHERE entries.is_dir = 0",
+            (rel, parent, name, content, time.time_ns(), len(content.encode("utf-8", "surrogatepass"))),
+        )
+
+    def write(self, path, content):
+        self._write_batch([(path, content)])
+
+    def write_many(self, items):
+        """Écrit plusieurs notes dans une seule transaction (tout ou rien).
+
+        Renvoie [(chemin, message)] des échecs, comme FileSystemBackend.write_many.
+        """
+        try:
+            self._write_batch(items)
+        except Exception as e:
+            return [(path, str(e)) for path, _ in items]
+        return []
+
+    def _write_batch(self, items):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for path, content in items:
+                self._write(conn, path, content)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def make_dir(self, path):
+        rel = self._rel(path)
+        if not rel:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._ensure_parents(conn, rel)
+            parent, name = self._split(rel)
+            conn.execute(
+                "INSERT OR IGNORE INTO entries(path, parent, name, is_dir, mtime_ns) VALUES (?, ?, ?, 1, ?)",
+                (rel, parent, name, time.time_ns()),
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def make_note(self, path):
+        """Crée une note vide ; renvoie False si le chemin existe déjà."""
+        rel = self._rel(path)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._ensure_parents(conn, rel)
+            parent, name = self._split(rel)
+            created = conn.execute(
+                "INSERT OR IGNORE INTO entries(path, parent, name, is_dir, mtime_ns) VALUES (?, ?, ?, 0, ?)",
+                (rel, parent, name, time.time_ns()),
+            ).rowcount == 1
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return created
+
+    def rename(self, old_path, new_path):
+        """Renomme une note ou un dossier (et tout son contenu) en une transaction."""
+        old_rel, new_rel = self._rel(old_path), self._rel(new_path)
+        if not old_rel or not new_rel:
+            raise PermissionError(old_path)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM entries WHERE path = ?", (old_rel,)).fetchone() is None:
+                raise FileNotFoundError(old_path)
+            if conn.execute("SELECT 1 FROM entries WHERE path = ?", (new_rel,)).fetchone() is not None:
+                raise FileExistsError(new_path)
+            self._ensure_parents(conn, new_rel)
+            parent, name = self._split(new_rel)
+            conn.execute("UPDATE entries SET path = ?, parent = ?, name = ? WHERE path = ?",
+                         (new_rel, parent, name, old_rel))
+            # Sous-arbre : préfixe exact (LIKE ignore la casse : "Foo" toucherait "foo/")
+            prefix = old_rel + "/"
+            cut = len(old_rel) + 1
+            conn.execute(
+                "UPDATE entries SET path = ? || substr(path, ?) WHERE substr(path, 1, ?) = ?",
+                (new_rel, cut, len(prefix), prefix),
+            )
+            conn.execute(
+                "UPDATE entries SET parent = ? || substr(parent, ?) WHERE parent = ? OR substr(parent, 1, ?) = ?",
+                (new_rel, cut, old_rel, len(prefix), prefix),
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def delete(self, path):
+        rel = self._rel(path)
+        if not rel:
+            raise PermissionError(path)
+        prefix = rel + "/"
+        self._conn().execute(
+            "DELETE FROM entries WHERE path = ? OR substr(path, 1, ?) = ?",
+            (rel, len(prefix), prefix),
+        )
+
+    # ----------------------------- Recherche -----------------------------
+
+    def search(self, words, limit=500):
+        """[(chemin complet, score, extrait HTML)] classés par pertinence (BM25 de FTS5).
+
+        Le nom de la note pèse deux fois plus que son contenu.
+        """
+        if not words:
+            return []
+        conn = self._conn()
+        if not self.has_fts:
+            where = " AND ".join("(name LIKE ? ESCAPE '\\' OR content LIKE ? ESCAPE '\\')" for _ in words)
+            params = []
+            for w in words:
+                params += ["%" + _escape_like(w) + "%"] * 2
+            rows = conn.execute(
+                f"SELECT path, 0.0, '' FROM entries WHERE is_dir = 0 AND {where} ORDER BY path LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT e.path, -bm25(entries_fts, 2.0, 1.0), "
+                "snippet(entries_fts, 1, ?, ?, '…', 24) "
+                "FROM entries_fts JOIN entries e ON e.id = entries_fts.rowid "
+                "WHERE entries_fts MATCH ? ORDER BY bm25(entries_fts, 2.0, 1.0) LIMIT ?",
+                (_MARK_OPEN, _MARK_CLOSE, _fts_query(words), limit),
+            ).fetchall()
+        results = []
+        for rel, score, snippet in rows:
+            snippet = " ".join(html.escape(snippet or "").split())
+            snippet = snippet.replace(_MARK_OPEN, HIGHLIGHT_OPEN).replace(_MARK_CLOSE, "</b>")
+            results.append((self._full(rel), score, snippet))
+        return results
@@ -1,11 +1,38 @@
 # storage.py — gestion des fichiers et dossiers du Notebook
 
-import os
+import os, shutil, threading, atexit, mmap, codecs, errno
+import stat as stat_module
+from collections import OrderedDict
+from . import perf
 
 # --- Définition du dossier de base ---
 # Par défaut : dans le dossier de l'utilisateur, sous /Documents/AnkiNotebook
 DEFAULT_BASE = os.path.join(os.path.expanduser("~"), "Documents", "AnkiNotebook")
 
+# --- Abonnés aux modifications (index de recherche, etc.) ---
+# callback(event, path, extra) avec event dans "saved", "created", "renamed", "deleted"
+_listeners = []
+
+
+def add_listener(callback):
+    """Enregistre un callback appelé après chaque modification du Notebook."""
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+def remove_listener(callback):
+    """Désinscrit un callback précédemment enregistré."""
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+
+def _notify(event, path, extra=None):
+    for callback in list(_listeners):
+        try:
+            callback(event, path, extra)
+        except Exception as e:
+            print(f"[Notebook] Erreur de notification ({event}) : {e}")
+
 
 def ensure_base_path():
     """Crée le dossier de base s'il n'existe pas et le renvoie."""
@@ -36,6 +63,7 @@ def create_folder(name):
     """Crée un dossier dans le répertoire principal."""
     path = os.path.join(DEFAULT_BASE, name)
     os.makedirs(path, exist_ok=True)
+    _notify("created", path)
     return path
 
 
@@ -47,26 +75,488 @@ def create_note(folder, name):
     if not os.path.exists(file_path):
         with open(file_path, "w", encoding="utf-8") as f:
             f.write("")
+        _notify("created", file_path)
     return file_path
 
 
-def load_markdown(file_path):
-    """Charge le contenu texte d'un fichier Markdown."""
-    if os.path.exists(file_path):
+# ----------------------------- Backends de stockage -----------------------------
+# L'arbre, l'éditeur et la recherche passent par les fonctions de ce module, qui
+# délèguent au backend de la racine concernée : fichiers .md (historique) ou
+# base SQLite unique (voir sqlite_backend.py). Les chemins restent des chemins
+# complets sous la racine dans les deux cas.
+
+HIDDEN_NAMES = {"thumbs.db", "desktop.ini"}
+
+
+def is_hidden_name(name):
+    """Entrées ignorées par le Notebook (fichiers cachés, système, dossier .ankinote)."""
+    return name.startswith(".") or name.lower() in HIDDEN_NAMES
+
+
+def _iter_file_chunks(file_path, chunk_size):
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        if perf.ENABLED:
+            perf.count("bytes_read", size)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            carry = ""
+            for start in range(0, size, chunk_size):
+                text = carry + decoder.decode(mm[start:start + chunk_size])
+                # Un "\r" final peut être la moitié d'un "\r\n" coupé entre deux morceaux
+                carry = "\r" if text.endswith("\r") else ""
+                if carry:
+                    text = text[:-1]
+                if text:
+                    yield text.replace("\r\n", "\n").replace("\r", "\n")
+            tail = carry + decoder.decode(b"", final=True)
+            if tail:
+                yield tail.replace("\r\n", "\n").replace("\r", "\n")
+
+
+@perf.timed("storage.write_atomic")
+def write_atomic(file_path, content):
+    """Écrit un fichier texte de façon atomique (fichier temporaire + fsync + rename).
+
+    En cas de crash, le fichier contient soit l'ancienne, soit la nouvelle version.
+    """
+    directory = os.path.dirname(file_path)
+    os.makedirs(directory, exist_ok=True)
+    # Nom caché : ignoré par l'arborescence et l'index si un crash le laisse traîner
+    tmp_path = os.path.join(directory, f".{os.path.basename(file_path)}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+            if perf.ENABLED:
+                perf.count("bytes_written", os.fstat(f.fileno()).st_size)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class FileSystemBackend:
+    """Disposition historique : un dossier du disque par dossier, un fichier .md par note."""
+
+    name = "files"
+    watchable = True  # modifications externes possibles : surveillance du disque
+
+    def __init__(self, root_path=None):
+        self.root_path = os.path.abspath(root_path) if root_path else None
+
+    def list_dir(self, path):
+        """[(nom, est_dossier, inode)] triés (entrées cachées comprises)."""
+        entries = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        entries.append((entry.name, entry.is_dir(), entry.inode()))
+                    except OSError:
+                        entries.append((entry.name, False, 0))
+        except OSError:
+            return []
+        entries.sort()
+        return entries
+
+    def stat(self, path):
+        """(mtime_ns, taille, est_dossier, inode) ou None."""
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
-        except Exception:
-            return ""
-    return ""
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, stat_module.S_ISDIR(st.st_mode), st.st_ino)
 
+    def read(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            if perf.ENABLED:
+                perf.count("bytes_read", os.fstat(f.fileno()).st_size)
+            return f.read()
+
+    def iter_chunks(self, path, chunk_size):
+        return _iter_file_chunks(path, chunk_size)
+
+    def read_bytes(self, path, offset, size):
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def walk_notes(self, path):
+        """(chemin complet, mtime_ns, taille) de chaque note .md non cachée sous `path`."""
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [d for d in dirs if not is_hidden_name(d)]
+            for f in files:
+                if is_hidden_name(f) or not f.endswith(".md"):
+                    continue
+                full = os.path.join(root, f)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                yield full, st.st_mtime_ns, st.st_size
+
+    def write(self, path, content):
+        write_atomic(path, content)
+
+    def write_many(self, items):
+        """Écrit chaque note ; renvoie [(chemin, message)] des échecs."""
+        failures = []
+        for path, content in items:
+            try:
+                write_atomic(path, content)
+            except Exception as e:
+                failures.append((path, str(e)))
+        return failures
+
+    def make_dir(self, path):
+        os.makedirs(path, exist_ok=True)
+
+    def make_note(self, path):
+        """Crée une note vide ; renvoie False si le fichier existe déjà."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            with open(path, "x", encoding="utf-8"):
+                pass
+        except FileExistsError:
+            return False
+        return True
+
+    def rename(self, old_path, new_path):
+        try:
+            os.rename(old_path, new_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # Autre volume (deux racines sur des disques différents) : copie puis suppression
+            if os.path.lexists(new_path):
+                raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), new_path)
+            try:
+                if os.path.isdir(old_path) and not os.path.islink(old_path):
+                    shutil.copytree(old_path, new_path, symlinks=True)
+                else:
+                    shutil.copy2(old_path, new_path, follow_symlinks=False)
+            except OSError:
+                # Pas de copie partielle sur le volume cible : la source est restée intacte
+                self.delete(new_path)
+                raise
+            self.delete(old_path)
+
+    def delete(self, path):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+_filesystem = FileSystemBackend()
+_backends = {}  # racine normalisée -> backend (racines ouvertes par open_notebook)
+_backends_lock = threading.Lock()
+
+
+def open_notebook(root_path):
+    """Ouvre une racine : backend SQLite si elle contient une base, fichiers sinon."""
+    key = os.path.abspath(root_path)
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            from . import sqlite_backend
+            if sqlite_backend.is_sqlite_notebook(key):
+                backend = sqlite_backend.SQLiteBackend(key)
+            else:
+                backend = FileSystemBackend(key)
+            _backends[key] = backend
+    return backend
+
+
+def backend_for(path):
+    """Backend responsable d'un chemin (racine ouverte la plus profonde, sinon fichiers)."""
+    path = os.path.abspath(path)
+    best = None
+    with _backends_lock:
+        for root, backend in _backends.items():
+            if path == root or path.startswith(os.path.join(root, "")):
+                if best is None or len(root) > len(best.root_path):
+                    best = backend
+    return best or _filesystem
+
+
+def copy_notebook(src_root, dst_root, kind, progress=None, batch_size=200):
+    """Copie un notebook (dossiers et notes .md) vers une nouvelle racine au format `kind`.
+
+    `kind` vaut "files" ou "sqlite". Les notes sont écrites par lots (une
+    transaction SQLite par lot). `progress(faites, total)` peut renvoyer False
+    pour interrompre la copie. Renvoie le nombre de notes copiées.
+
+    Copie interrompue ou en erreur : tout ce qui a été créé dans la cible est
+    supprimé et son backend oublié (pas de notebook à moitié rempli).
+    """
+    src = open_notebook(src_root)
+    dst_root = os.path.abspath(dst_root)
+    created_root = not os.path.exists(dst_root)
+    os.makedirs(dst_root, exist_ok=True)
+    before = set(os.listdir(dst_root))
+    dst = None
+    complete = False
+    try:
+        if kind == "sqlite":
+            from .sqlite_backend import SQLiteBackend
+            dst = SQLiteBackend(dst_root)
+        else:
+            dst = FileSystemBackend(dst_root)
+        with _backends_lock:
+            _backends[dst_root] = dst
+
+        notes, stack = [], [src.root_path]
+        while stack:
+            folder = stack.pop()
+            for name, entry_is_dir, _ in src.list_dir(folder):
+                if is_hidden_name(name):
+                    continue
+                path = os.path.join(folder, name)
+                target = os.path.join(dst_root, os.path.relpath(path, src.root_path))
+                if entry_is_dir:
+                    dst.make_dir(target)
+                    stack.append(path)
+                elif name.endswith(".md"):
+                    notes.append((path, target))
+
+        done = 0
+        for i in range(0, len(notes), batch_size):
+            batch = [(target, "".join(src.iter_chunks(path, 1024 * 1024))) for path, target in notes[i:i + batch_size]]
+            failures = dst.write_many(batch)
+            if failures:
+                raise OSError(f"{failures[0][0]} : {failures[0][1]}")
+            done += len(batch)
+            if progress is not None and progress(done, len(notes)) is False:
+                return done
+        complete = True
+        return done
+    finally:
+        if not complete:
+            _discard_copy(dst_root, dst, before, created_root)
+
+
+def _discard_copy(dst_root, dst, before, created_root):
+    """Annule une copie incomplète : backend oublié et fermé, entrées créées supprimées."""
+    with _backends_lock:
+        if _backends.get(dst_root) is dst:
+            del _backends[dst_root]
+    if dst is not None and hasattr(dst, "close"):
+        dst.close()
+    if created_root:
+        shutil.rmtree(dst_root, ignore_errors=True)
+        return
+    try:
+        names = os.listdir(dst_root)
+    except OSError:
+        return
+    for name in names:
+        if name in before:
+            continue
+        path = os.path.join(dst_root, name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
 
+
+def list_dir(path):
+    return backend_for(path).list_dir(path)
+
+
+def path_stat(path):
+    """(mtime_ns, taille, est_dossier, identifiant) ou None si le chemin n'existe pas."""
+    return backend_for(path).stat(path)
+
+
+def exists(path):
+    return path_stat(path) is not None
+
+
+def is_dir(path):
+    st = path_stat(path)
+    return st is not None and st[2]
+
+
+def is_file(path):
+    st = path_stat(path)
+    return st is not None and not st[2]
+
+
+def walk_notes(path):
+    """Toutes les notes sous `path` : (chemin complet, mtime_ns, taille)."""
+    return backend_for(path).walk_notes(path)
+
+
+def read_bytes(path, offset, size):
+    """Fenêtre d'octets (UTF-8) d'une note, pour les extraits de recherche."""
+    return backend_for(path).read_bytes(path, offset, size)
+
+
+def create_folder_at(path):
+    """Crée un dossier à un chemin complet (arborescence du Notebook)."""
+    backend_for(path).make_dir(path)
+    _notify("created", path)
+    return path
+
+
+def create_note_at(file_path):
+    """Crée une note vide à un chemin complet, sans écraser l'existant."""
+    if backend_for(file_path).make_note(file_path):
+        _notify("created", file_path)
+    return file_path
+
+
+def rename_path(old_path, new_path):
+    """Renomme un fichier ou un dossier (après écriture des sauvegardes en attente)."""
+    save_queue.flush()
+    backend_for(old_path).rename(old_path, new_path)
+    _notify("renamed", old_path, new_path)
+    return new_path
+
+
+def delete_path(path):
+    """Supprime un fichier ou un dossier (récursivement, après les sauvegardes en attente)."""
+    save_queue.flush()
+    backend_for(path).delete(path)
+    _notify("deleted", path)
+
+
+@perf.timed("storage.load_markdown")
+def load_markdown(file_path):
+    """Charge le contenu texte d'une note ("" si elle est absente ou illisible)."""
+    try:
+        return backend_for(file_path).read(file_path)
+    except Exception:
+        return ""
+
+
+def file_size(file_path):
+    """Taille d'une note en octets (0 si elle est absente)."""
+    st = path_stat(file_path)
+    return st[1] if st else 0
+
+
+def iter_markdown_chunks(file_path, chunk_size=256 * 1024):
+    """Lit une note par morceaux de texte décodé (mmap pour les fichiers : pas de copie complète).
+
+    Les fins de ligne sont normalisées en "\n", comme pour load_markdown.
+    """
+    return backend_for(file_path).iter_chunks(file_path, chunk_size)
+
+
+@perf.timed("storage.save_markdown")
 def save_markdown(file_path, content):
-    """Sauvegarde le texte brut dans un fichier Markdown."""
+    """Sauvegarde le texte brut d'une note. Renvoie True si l'écriture a réussi."""
     try:
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(content)
+        backend_for(file_path).write(file_path, content)
     except Exception as e:
         print(f"[Notebook] Erreur de sauvegarde : {e}")
+        return False
+    _notify("saved", file_path, content)
+    return True
+
+
+# ----------------------------- Écriture différée -----------------------------
+
+class SaveQueue:
+    """Écrivain unique en arrière-plan (write-behind).
+
+    Les sauvegardes successives d'un même fichier sont fusionnées : seul le
+    dernier contenu est écrit ; les notes en attente sont écrites par lots. Les échecs sont transmis aux callbacks
+    d'erreur (path, message) depuis le thread d'écriture.
+    """
+
+    def __init__(self):
+        self._pending = OrderedDict()  # chemin -> dernier contenu demandé
+        self._cond = threading.Condition()
+        self._writing = False
+        self._thread = None
+        self._error_callbacks = []
+
+    def add_error_callback(self, callback):
+        if callback not in self._error_callbacks:
+            self._error_callbacks.append(callback)
+
+    def remove_error_callback(self, callback):
+        if callback in self._error_callbacks:
+            self._error_callbacks.remove(callback)
+
+    def enqueue(self, file_path, content):
+        """Programme l'écriture de `content` (remplace une écriture en attente du même fichier)."""
+        with self._cond:
+            self._pending.pop(file_path, None)
+            self._pending[file_path] = content
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="NotebookSaveQueue", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def has_pending(self, file_path=None):
+        with self._cond:
+            if file_path is None:
+                return bool(self._pending) or self._writing
+            return file_path in self._pending
+
+    @perf.timed("storage.flush_wait")
+    def flush(self, timeout=None):
+        """Bloque jusqu'à ce que toutes les écritures en attente soient terminées."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._writing, timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                items = list(self._pending.items())
+                self._pending.clear()
+                self._writing = True
+            try:
+                # Tout ce qui est en attente part en un lot par backend (une transaction SQLite)
+                groups = OrderedDict()
+                for file_path, content in items:
+                    groups.setdefault(backend_for(file_path), []).append((file_path, content))
+                for backend, group in groups.items():
+                    failures = dict(backend.write_many(group))
+                    for file_path, content in group:
+                        if file_path in failures:
+                            self._report(file_path, failures[file_path])
+                        else:
+                            _notify("saved", file_path, content)
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+    def _report(self, file_path, message):
+        for callback in list(self._error_callbacks):
+            try:
+                callback(file_path, message)
+            except Exception:
+                pass  # destinataire détruit (éditeur fermé)
+        if not self._error_callbacks:
+            print(f"[Notebook] Erreur de sauvegarde : {message}")
+
+
+save_queue = SaveQueue()
+atexit.register(save_queue.flush, 10)
+
+
+def save_markdown_async(file_path, content):
+    """Programme la sauvegarde d'une note sans bloquer l'appelant (voir SaveQueue)."""
+    save_queue.enqueue(file_path, content)
+
 
+def flush_saves(timeout=None):
+    """Attend la fin des sauvegardes en attente (fermeture, changement de note...)."""
+    return save_queue.flush(timeout)
@@ -0,0 +1,179 @@
+# thumbnails.py — miniatures des images affichées dans l'aperçu
+# - Décodage réduit (QImageReader.setScaledSize) sur un pool de threads dédié, jamais dans le thread GUI
+# - Cache disque borné, partagé entre notebooks (les miniatures les plus anciennes sont supprimées)
+# - Cache mémoire LRU borné en octets (images prêtes pour QTextBrowser)
+# - Clé : chemin + mtime + taille de l'image source : une image modifiée est refaite
+
+import os, hashlib, threading
+from collections import OrderedDict
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, QSize, pyqtSignal
+from PyQt6.QtGui import QImageReader
+from . import perf
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".anki_notebook_cache", "thumbs")
+THUMB_MAX_WIDTH = 800
+DISK_CACHE_BYTES = 256 * 1024 * 1024
+MEMORY_CACHE_BYTES = 64 * 1024 * 1024
+RASTER_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+WORKERS = 2
+
+_cache = None
+
+
+def get_cache():
+    """Cache de miniatures partagé (créé au premier appel, dans le thread GUI)."""
+    global _cache
+    if _cache is None:
+        _cache = ThumbnailCache()
+    return _cache
+
+
+def is_raster(path):
+    return os.path.splitext(path)[1].lower() in RASTER_EXTENSIONS
+
+
+class _ThumbTask(QRunnable):
+    def __init__(self, cache, source, key, target):
+        super().__init__()
+        self.cache = cache
+        self.source = source
+        self.key = key
+        self.target = target
+
+    def run(self):
+        with perf.span("thumbnails.decode"):
+            image = self.cache._produce(self.source, self.target)
+        self.cache._finished(self.source, self.key, image)
+
+
+class ThumbnailCache(QObject):
+    """Miniatures sur disque et en mémoire ; `ready(chemin source)` quand l'une d'elles est prête."""
+
+    ready = pyqtSignal(str)
+
+    def __init__(self, cache_dir=CACHE_DIR, max_width=THUMB_MAX_WIDTH,
+                 disk_bytes=DISK_CACHE_BYTES, memory_bytes=MEMORY_CACHE_BYTES):
+        super().__init__()
+        self.cache_dir = cache_dir
+        self.max_width = max_width
+        self.disk_bytes = disk_bytes
+        self.memory_bytes = memory_bytes
+        self._memory = OrderedDict()  # clé -> QImage
+        self._memory_used = 0
+        self._pending = set()         # clés en cours de production
+        self._failed = set()          # sources illisibles (pas de nouvel essai)
+        self._disk_used = None        # estimation, calculée à la première écriture
+        self._lock = threading.Lock()
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(WORKERS)
+
+    # ----------------------------- Accès (thread GUI) -----------------------------
+
+    def _key(self, source):
+        try:
+            st = os.stat(source)
+        except OSError:
+            return None
+        raw = f"{os.path.abspath(source)}|{st.st_mtime_ns}|{st.st_size}|{self.max_width}"
+        return hashlib.blake2b(raw.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+    def _target(self, source, key):
+        ext = ".jpg" if source.lower().endswith((".jpg", ".jpeg")) else ".png"
+        return os.path.join(self.cache_dir, key + ext)
+
+    def lookup(self, source):
+        """Chemin à afficher pour `source` : sa miniature si elle est prête, None si elle est en cours
+        de production (lancée en arrière-plan), `source` elle-même si elle ne peut pas être réduite.
+        """
+        key = self._key(source)
+        if key is None or key in self._failed:
+            return source
+        target = self._target(source, key)
+        if os.path.exists(target):
+            return target
+        with self._lock:
+            if key in self._pending:
+                return None
+            self._pending.add(key)
+        self._pool.start(_ThumbTask(self, source, key, target))
+        return None
+
+    def image(self, thumb_path):
+        """Miniature déjà décodée (cache mémoire) d'après le chemin renvoyé par lookup(), ou None."""
+        key = os.path.splitext(os.path.basename(thumb_path))[0]
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+            return image
+
+    def remember(self, thumb_path, image):
+        """Garde en mémoire une miniature lue depuis le disque par l'appelant."""
+        if os.path.dirname(thumb_path) == self.cache_dir and not image.isNull():
+            self._remember(os.path.splitext(os.path.basename(thumb_path))[0], image)
+
+    # ----------------------------- Production (pool) -----------------------------
+
+    def _produce(self, source, target):
+        reader = QImageReader(source)
+        reader.setAutoTransform(True)
+        size = reader.size()
+        if size.isValid() and size.width() > self.max_width:
+            reader.setScaledSize(size.scaled(QSize(self.max_width, 1 << 20), Qt.AspectRatioMode.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            return None
+        tmp_path = f"{target}.{threading.get_ident()}.tmp"
+        fmt = "JPG" if target.endswith(".jpg") else "PNG"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if not image.save(tmp_path, fmt):
+                return None
+            os.replace(tmp_path, target)
+            self._account(os.path.getsize(target))
+        except OSError:
+            return None
+        return image
+
+    def _finished(self, source, key, image):
+        with self._lock:
+            self._pending.discard(key)
+            if image is None:
+                self._failed.add(key)  # l'original sera affiché tel quel
+        if image is not None:
+            self._remember(key, image)
+        try:
+            self.ready.emit(source)
+        except RuntimeError:
+            pass
+
+    def _remember(self, key, image):
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = image
+            self._memory_used += image.sizeInBytes()
+            while self._memory_used > self.memory_bytes and len(self._memory) > 1:
+                _, old = self._memory.popitem(last=False)
+                self._memory_used -= old.sizeInBytes()
+
+    def _account(self, size):
+        """Tient le compte de l'espace disque ; au-delà de la limite, supprime les plus anciennes."""
+        with self._lock:
+            if self._disk_used is None:
+                self._disk_used = sum(e.stat().st_size for e in os.scandir(self.cache_dir) if e.is_file())
+            else:
+                self._disk_used += size
+            if self._disk_used <= self.disk_bytes:
+                return
+            entries = sorted((e for e in os.scandir(self.cache_dir) if e.is_file()),
+                             key=lambda e: e.stat().st_mtime)
+            for entry in entries:
+                if self._disk_used <= self.disk_bytes * 0.8:
+                    break
+                try:
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                    self._disk_used -= size
+                except OSError:
+                    pass
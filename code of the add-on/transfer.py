@@ -0,0 +1,313 @@
+# transfer.py — import / export en masse (dossiers, archives zip, coffres Obsidian)
+# - Import : notes .md / .markdown / .txt (converties en .md), pièces jointes en option
+# - Export : un dossier ou tout le notebook vers une archive zip
+# - Lectures et écritures réparties sur un pool de threads, contenus lus par morceaux
+# - Aucune notification par fichier : l'appelant met à jour l'arbre et les index une fois à la fin
+#
+# `progress(faits, total)` peut renvoyer False pour interrompre (comme storage.copy_notebook).
+
+import os, codecs, zipfile, threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from . import storage, perf
+
+NOTE_EXTENSIONS = (".md", ".markdown", ".txt")
+ATTACHMENT_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".bmp", ".pdf")
+SKIPPED_DIRS = {"__MACOSX", "node_modules"}
+DEFAULT_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+CHUNK_SIZE = 256 * 1024
+PREFETCH_MAX = 1024 * 1024      # export : notes plus petites lues à l'avance par le pool
+SQLITE_BATCH_BYTES = 8 * 1024 * 1024
+
+
+def _skipped(parts):
+    return any(storage.is_hidden_name(p) or p in SKIPPED_DIRS for p in parts)
+
+
+def _kind(name):
+    ext = os.path.splitext(name)[1].lower()
+    if ext in NOTE_EXTENSIONS:
+        return "note"
+    if ext in ATTACHMENT_EXTENSIONS:
+        return "file"
+    return None
+
+
+def unique_path(path):
+    """`path`, ou `nom (2)`, `nom (3)`... si le chemin est déjà pris."""
+    if not storage.exists(path):
+        return path
+    stem, ext = os.path.splitext(path)
+    n = 2
+    while storage.exists(f"{stem} ({n}){ext}"):
+        n += 1
+    return f"{stem} ({n}){ext}"
+
+
+# ----------------------------- Import -----------------------------
+
+def plan_import(source, attachments=True):
+    """[(référence source, chemin relatif cible, "note" | "file")] pour un dossier ou un zip."""
+    items, taken = [], set()
+
+    def add(ref, rel_parts, kind):
+        if kind == "note":
+            rel_parts[-1] = os.path.splitext(rel_parts[-1])[0] + ".md"
+        rel = os.path.join(*rel_parts)
+        stem, ext = os.path.splitext(rel)
+        n = 2
+        while rel.lower() in taken:  # a.md + a.txt, casse différente...
+            rel = f"{stem} ({n}){ext}"
+            n += 1
+        taken.add(rel.lower())
+        items.append((ref, rel, kind))
+
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            for info in zf.infolist():
+                parts = [p for p in info.filename.replace("\\", "/").split("/") if p]
+                if info.is_dir() or not parts or ".." in parts or _skipped(parts):
+                    continue
+                kind = _kind(parts[-1])
+                if kind == "note" or (kind == "file" and attachments):
+                    add(info.filename, parts, kind)
+        return items
+
+    for root, dirs, files in os.walk(source):
+        dirs[:] = sorted(d for d in dirs if not _skipped([d]))
+        rel_root = os.path.relpath(root, source)
+        prefix = [] if rel_root == os.curdir else rel_root.split(os.sep)
+        for name in sorted(files):
+            kind = _kind(name)
+            if storage.is_hidden_name(name) or kind is None or (kind == "file" and not attachments):
+                continue
+            add(os.path.join(root, name), prefix + [name], kind)
+    return items
+
+
+class _Reader:
+    """Ouvre les entrées d'un dossier ou d'un zip (un ZipFile par thread)."""
+
+    def __init__(self, source):
+        self.source = source
+        self.is_zip = zipfile.is_zipfile(source)
+        self._local = threading.local()
+
+    def open(self, ref):
+        if not self.is_zip:
+            return open(ref, "rb")
+        zf = getattr(self._local, "zf", None)
+        if zf is None:
+            zf = self._local.zf = zipfile.ZipFile(self.source)
+        return zf.open(ref)
+
+
+def _iter_text(stream):
+    """Décode un flux binaire par morceaux (UTF-8, BOM retiré, fins de ligne normalisées)."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    carry = ""
+    while True:
+        data = stream.read(CHUNK_SIZE)
+        text = carry + decoder.decode(data, final=not data)
+        carry = "\r" if text.endswith("\r") and data else ""
+        if carry:
+            text = text[:-1]
+        if text:
+            yield text.replace("\r\n", "\n").replace("\r", "\n")
+        if not data:
+            return
+
+
+def _stream_to_file(reader, ref, target, kind):
+    """Copie une entrée vers un fichier (fichier temporaire caché puis rename)."""
+    directory = os.path.dirname(target)
+    tmp_path = os.path.join(directory, f".{os.path.basename(target)}.{threading.get_ident()}.tmp")
+    written = 0
+    try:
+        with reader.open(ref) as src:
+            if kind == "note":
+                with open(tmp_path, "w", encoding="utf-8", newline="") as out:
+                    for text in _iter_text(src):
+                        written += out.write(text)
+            else:
+                with open(tmp_path, "wb") as out:
+                    for data in iter(lambda: src.read(CHUNK_SIZE), b""):
+                        written += out.write(data)
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if perf.ENABLED:
+        perf.count("bytes_written", written)
+
+
+def _read_note(reader, ref):
+    with reader.open(ref) as src:
+        return "".join(_iter_text(src))
+
+
+@perf.timed("transfer.import")
+def import_notes(source, dest_folder, progress=None, attachments=True, workers=DEFAULT_WORKERS):
+    """Importe `source` (dossier ou .zip) dans un nouveau sous-dossier de `dest_folder`.
+
+    Renvoie (dossier créé, notes importées, [(chemin, message)] des échecs).
+    Les pièces jointes ne sont copiées que vers un notebook en fichiers ; en cas
+    d'interruption, les notes déjà écrites sont conservées.
+    """
+    backend = storage.backend_for(dest_folder)
+    streaming = backend.name == "files"
+    items = plan_import(source, attachments and streaming)
+    name = os.path.splitext(os.path.basename(os.path.normpath(source)))[0] or "import"
+    target_root = unique_path(os.path.join(dest_folder, name))
+    backend.make_dir(target_root)
+    for rel_dir in sorted({os.path.dirname(rel) for _, rel, _ in items} - {""}):
+        backend.make_dir(os.path.join(target_root, rel_dir))
+
+    reader = _Reader(source)
+    failures, done, notes = [], 0, 0
+    pending, batch, batch_bytes = deque(), [], 0
+    total = len(items)
+
+    def flush_batch():
+        nonlocal batch, batch_bytes
+        failures.extend(backend.write_many(batch))
+        batch, batch_bytes = [], 0
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="NotebookImport") as pool:
+        queue_items = iter(items)
+        window = max(1, workers) * 4  # tâches en vol : mémoire bornée même pour un gros import
+
+        def submit_next():
+            item = next(queue_items, None)
+            if item is None:
+                return False
+            ref, rel, kind = item
+            target = os.path.join(target_root, rel)
+            if streaming:
+                future = pool.submit(_stream_to_file, reader, ref, target, kind)
+            else:
+                future = pool.submit(_read_note, reader, ref)
+            pending.append((future, target, kind))
+            return True
+
+        while len(pending) < window and submit_next():
+            pass
+        cancelled = False
+        while pending:
+            future, target, kind = pending.popleft()
+            try:
+                content = future.result()
+            except Exception as e:
+                failures.append((target, str(e)))
+            else:
+                if kind == "note":
+                    notes += 1
+                if not streaming:
+                    batch.append((target, content))
+                    batch_bytes += len(content)
+                    if batch_bytes >= SQLITE_BATCH_BYTES:
+                        flush_batch()
+            done += 1
+            if progress is not None and progress(done, total) is False:
+                cancelled = True
+                for future, _, _ in pending:
+                    future.cancel()
+                pending.clear()
+                break
+            submit_next()
+        if batch and not cancelled:
+            flush_batch()
+    return target_root, notes, failures
+
+
+# ----------------------------- Export -----------------------------
+
+def plan_export(folder, attachments=True):
+    """[(chemin complet, taille)] des notes (et pièces jointes) sous `folder`."""
+    entries = [(path, size) for path, _, size in storage.walk_notes(folder)]
+    if attachments and storage.backend_for(folder).name == "files":
+        for root, dirs, files in os.walk(folder):
+            dirs[:] = [d for d in dirs if not storage.is_hidden_name(d)]
+            for name in files:
+                if not storage.is_hidden_name(name) and _kind(name) == "file":
+                    path = os.path.join(root, name)
+                    try:
+                        entries.append((path, os.path.getsize(path)))
+                    except OSError:
+                        pass
+    return entries
+
+
+def _read_entry(path):
+    if path.endswith(".md"):
+        return "".join(storage.iter_markdown_chunks(path)).encode("utf-8")
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@perf.timed("transfer.export")
+def export_zip(folder, zip_path, progress=None, attachments=True, workers=DEFAULT_WORKERS):
+    """Exporte `folder` dans une archive zip (écrite à côté puis renommée).
+
+    Les petites entrées sont lues en parallèle par le pool pendant que l'archive
+    est compressée ; les grosses sont recopiées par morceaux. Renvoie le
+    nombre d'entrées exportées (0 si interrompu).
+    """
+    entries = plan_export(folder, attachments)
+    base = os.path.dirname(os.path.normpath(folder))
+    part_path = zip_path + ".part"
+    done, total = 0, len(entries)
+    try:
+        with zipfile.ZipFile(part_path, "w", zipfile.ZIP_DEFLATED, compresslevel=6) as zf, \
+                ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="NotebookExport") as pool:
+            pending, queue_entries = deque(), iter(entries)
+            window = max(1, workers) * 4
+
+            def submit_next():
+                entry = next(queue_entries, None)
+                if entry is None:
+                    return False
+                path, size = entry
+                future = pool.submit(_read_entry, path) if size <= PREFETCH_MAX else None
+                pending.append((path, future))
+                return True
+
+            while len(pending) < window and submit_next():
+                pass
+            while pending:
+                path, future = pending.popleft()
+                arcname = os.path.relpath(path, base).replace(os.sep, "/")
+                if future is not None:
+                    zf.writestr(arcname, future.result())
+                else:
+                    with zf.open(arcname, "w", force_zip64=True) as out:
+                        if path.endswith(".md"):
+                            for chunk in storage.iter_markdown_chunks(path, CHUNK_SIZE):
+                                out.write(chunk.encode("utf-8"))
+                        else:
+                            with open(path, "rb") as src:
+                                for data in iter(lambda: src.read(CHUNK_SIZE), b""):
+                                    out.write(data)
+                done += 1
+                if progress is not None and progress(done, total) is False:
+                    for _, future in pending:
+                        if future is not None:
+                            future.cancel()
+                    raise InterruptedError
+                submit_next()
+        os.replace(part_path, zip_path)
+    except InterruptedError:
+        os.remove(part_path)
+        return 0
+    except BaseException:
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
+        raise
+    if perf.ENABLED:
+        perf.count("bytes_written", os.path.getsize(zip_path))
+    return done
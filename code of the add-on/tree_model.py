@@ -0,0 +1,471 @@
+# tree_model.py — modèle d'arborescence paresseux du Notebook
+# - Enfants d'un dossier lus (storage.list_dir) seulement quand il est déplié
+# - Nœuds compacts : nom + parent (le chemin complet est reconstruit à la demande)
+# - Instantané des dossiers dépliés : affichage immédiat à l'ouverture, réconcilié ensuite
+# - Glisser-déposer : le modèle ne déplace rien lui-même, il émet move_requested
+# - Plusieurs racines : chacune devient un nœud de premier niveau (une seule : son contenu
+#   est affiché directement, comme avant)
+
+import os, bisect
+from PyQt6.QtCore import Qt, QAbstractItemModel, QModelIndex, QMimeData, QUrl, pyqtSignal
+from . import perf, storage
+
+# Entrées jamais affichées dans l'arborescence (fichiers cachés, système)
+is_hidden_entry = storage.is_hidden_name
+
+
+class _Node:
+    """Nœud de l'arbre : un fichier ou un dossier (inode gardé pour reconnaître les renommages)."""
+    __slots__ = ("name", "parent", "is_dir", "children", "fetched", "row", "ino")
+
+    def __init__(self, name, parent, is_dir, ino=0):
+        self.name = name
+        self.parent = parent
+        self.is_dir = is_dir
+        self.children = []
+        self.fetched = False
+        self.row = 0
+        self.ino = ino
+
+    def path(self):
+        parts = []
+        node = self
+        while node is not None:
+            parts.append(node.name)
+            node = node.parent
+        return os.path.join(*reversed(parts))
+
+
+def _scan_dir(path):
+    """Liste triée (nom, est_dossier, inode) d'un dossier, sans les entrées cachées."""
+    return [e for e in storage.list_dir(path) if not is_hidden_entry(e[0])]
+
+
+def scan_dirs(paths):
+    """[(dossier, entrées)] du moins profond au plus profond (sans Qt : utilisable hors thread GUI)."""
+    return [(path, _scan_dir(path)) for path in sorted(paths, key=lambda p: p.count(os.sep))]
+
+
+class NotebookTreeModel(QAbstractItemModel):
+    """Modèle Qt des dossiers / notes d'une ou plusieurs racines, chargé à la demande."""
+
+    move_requested = pyqtSignal(list, str)  # (chemins déplacés, dossier de destination)
+
+    def __init__(self, root_paths, parent=None):
+        super().__init__(parent)
+        self._root = self._build_top(root_paths)
+
+    # ----------------------------- Racines -----------------------------
+
+    @staticmethod
+    def _build_top(root_paths):
+        """Nœud invisible : la racine elle-même, ou un nœud virtuel dont les enfants sont les racines."""
+        if isinstance(root_paths, str):
+            root_paths = [root_paths]
+        roots = [os.path.normpath(p) for p in root_paths]
+        if len(roots) == 1:
+            return _Node(roots[0], None, True)
+        top = _Node("", None, True)
+        top.fetched = True
+        top.children = [_Node(path, top, True) for path in roots]
+        NotebookTreeModel._renumber(top)
+        return top
+
+    @property
+    def multi_root(self):
+        return not self._root.name
+
+    @property
+    def root_paths(self):
+        return [c.name for c in self._root.children] if self.multi_root else [self._root.name]
+
+    @property
+    def root_path(self):
+        """Première racine."""
+        return self.root_paths[0]
+
+    def set_roots(self, root_paths):
+        """Change de racines (réinitialise entièrement le modèle)."""
+        self.beginResetModel()
+        self._root = self._build_top(root_paths)
+        self.endResetModel()
+
+    def set_root(self, root_path):
+        self.set_roots([root_path])
+
+    def reload(self):
+        """Oublie tout le contenu chargé ; il sera relu à la demande."""
+        self.set_roots(self.root_paths)
+
+    def _root_node(self, path):
+        """Nœud de la racine contenant `path` (la plus profonde), ou None."""
+        path = os.path.normpath(path)
+        best = None
+        for node in (self._root.children if self.multi_root else [self._root]):
+            if (path == node.name or path.startswith(os.path.join(node.name, ""))) \
+                    and (best is None or len(node.name) > len(best.name)):
+                best = node
+        return best
+
+    def is_root(self, index):
+        """L'élément est-il une racine (nœud de premier niveau avec plusieurs racines) ?"""
+        return index.isValid() and index.internalPointer().parent is self._root and self.multi_root
+
+    # ----------------------------- Accès aux nœuds -----------------------------
+
+    def _node(self, index):
+        if index.isValid():
+            return index.internalPointer()
+        return self._root
+
+    def _index_of(self, node):
+        if node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def _is_top(self, node):
+        """Racine (jamais retirée ni renommée par les mises à jour incrémentales)."""
+        return node is self._root or (node.parent is self._root and self.multi_root)
+
+    def file_path(self, index):
+        """Chemin complet de l'élément désigné par `index`."""
+        return self._node(index).path()
+
+    def is_dir(self, index):
+        return self._node(index).is_dir
+
+    def index_for_path(self, path, fetch=True):
+        """Index Qt d'un chemin (charge les dossiers intermédiaires si `fetch`)."""
+        node = self._root_node(path)
+        if node is None:
+            return None
+        rel = os.path.relpath(os.path.normpath(path), node.name)
+        if rel == os.curdir:
+            return self._index_of(node)
+        for part in rel.split(os.sep):
+            if not node.fetched:
+                if not fetch:
+                    return None
+                self.fetchMore(self._index_of(node))
+            node = next((c for c in node.children if c.name == part), None)
+            if node is None:
+                return None
+        return self._index_of(node)
+
+    # ----------------------------- API QAbstractItemModel -----------------------------
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self._node(parent)
+        if column != 0 or row < 0 or row >= len(node.children):
+            return QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid():
+            return QModelIndex()
+        return self._index_of(index.internalPointer().parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self._node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self._node(parent)
+        if not node.is_dir:
+            return False
+        # Dossier non encore lu : on affiche la flèche sans lister son contenu
+        return bool(node.children) or not node.fetched
+
+    def canFetchMore(self, parent):
+        node = self._node(parent)
+        return node.is_dir and not node.fetched
+
+    @perf.timed("tree.fetch_dir")
+    def fetchMore(self, parent):
+        node = self._node(parent)
+        if node.fetched:
+            return
+        node.fetched = True
+        entries = _scan_dir(node.path())
+        if not entries:
+            return
+        self.beginInsertRows(parent, 0, len(entries) - 1)
+        node.children = [_Node(name, node, is_dir, ino) for name, is_dir, ino in entries]
+        self._renumber(node)
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if node.parent is self._root and self.multi_root:
+                return os.path.basename(node.name) or node.name
+            return node.name
+        if role == Qt.ItemDataRole.ToolTipRole and node.parent is self._root and self.multi_root:
+            return node.name
+        if role == Qt.ItemDataRole.UserRole:
+            return node.path()
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            # Dépôt dans la racine (avec plusieurs racines : sur l'une d'elles seulement)
+            return Qt.ItemFlag.NoItemFlags if self.multi_root else Qt.ItemFlag.ItemIsDropEnabled
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if not self.is_root(index):
+            flags |= Qt.ItemFlag.ItemIsDragEnabled
+        if index.internalPointer().is_dir:
+            flags |= Qt.ItemFlag.ItemIsDropEnabled
+        return flags
+
+    # ----------------------------- Glisser-déposer -----------------------------
+
+    def supportedDragActions(self):
+        return Qt.DropAction.MoveAction
+
+    def supportedDropActions(self):
+        return Qt.DropAction.MoveAction
+
+    def mimeTypes(self):
+        return ["text/uri-list"]
+
+    def mimeData(self, indexes):
+        data = QMimeData()
+        data.setUrls([QUrl.fromLocalFile(self._node(i).path()) for i in indexes if i.isValid() and i.column() == 0])
+        return data
+
+    def _dropped_paths(self, data):
+        """Chemins déposés appartenant à une racine (hors racines elles-mêmes)."""
+        paths = []
+        for url in data.urls():
+            if not url.isLocalFile():
+                continue
+            path = os.path.normpath(url.toLocalFile())
+            root = self._root_node(path)
+            if root is not None and path != root.name:
+                paths.append(path)
+        return paths
+
+    def canDropMimeData(self, data, action, row, column, parent):
+        node = self._node(parent)
+        return node.is_dir and bool(node.name) and bool(self._dropped_paths(data))
+
+    def dropMimeData(self, data, action, row, column, parent):
+        """Demande le déplacement (exécuté en arrière-plan par la vue principale).
+
+        Renvoie False : la vue ne doit pas retirer elle-même les lignes source.
+        """
+        node = self._node(parent)
+        paths = self._dropped_paths(data)
+        if node.is_dir and node.name and paths:
+            self.move_requested.emit(paths, node.path())
+        return False
+
+    # ----------------------------- Mises à jour incrémentales -----------------------------
+
+    @staticmethod
+    def _renumber(node, start=0):
+        for row in range(start, len(node.children)):
+            node.children[row].row = row
+
+    def _loaded_node(self, path):
+        """Nœud déjà chargé correspondant à `path` (None sinon, sans lecture disque)."""
+        index = self.index_for_path(path, fetch=False)
+        if index is None:
+            return None
+        return self._node(index)
+
+    def _insert_child(self, parent, name, is_dir, ino=0):
+        names = [c.name for c in parent.children]
+        pos = bisect.bisect_left(names, name)
+        if pos < len(names) and names[pos] == name:
+            return parent.children[pos]
+        self.beginInsertRows(self._index_of(parent), pos, pos)
+        node = _Node(name, parent, is_dir, ino)
+        parent.children.insert(pos, node)
+        self._renumber(parent, pos)
+        self.endInsertRows()
+        return node
+
+    def _remove_child(self, node):
+        parent = node.parent
+        row = node.row
+        self.beginRemoveRows(self._index_of(parent), row, row)
+        parent.children.pop(row)
+        self._renumber(parent, row)
+        self.endRemoveRows()
+
+    def _rename_child(self, node, new_name):
+        """Renomme un nœud en conservant son sous-arbre (et donc son état de dépliage)."""
+        parent = node.parent
+        row = node.row
+        others = [c.name for c in parent.children if c is not node]
+        new_row = bisect.bisect_left(others, new_name)
+        dest = new_row if new_row <= row else new_row + 1
+        if dest not in (row, row + 1):
+            parent_index = self._index_of(parent)
+            self.beginMoveRows(parent_index, row, row, parent_index, dest)
+            parent.children.pop(row)
+            parent.children.insert(new_row, node)
+            node.name = new_name
+            self._renumber(parent, min(row, new_row))
+            self.endMoveRows()
+        else:
+            node.name = new_name
+        index = self._index_of(node)
+        self.dataChanged.emit(index, index)
+
+    def path_created(self, path):
+        """Ajoute une entrée créée par le Notebook (si son dossier parent est chargé)."""
+        name = os.path.basename(os.path.normpath(path))
+        parent = self._loaded_node(os.path.dirname(os.path.normpath(path)))
+        if parent is None or not parent.fetched or is_hidden_entry(name):
+            return
+        st = storage.path_stat(path)
+        if st is None:
+            return
+        self._insert_child(parent, name, st[2], st[3])
+
+    def path_removed(self, path):
+        """Retire une entrée (et son sous-arbre) si elle est chargée."""
+        node = self._loaded_node(path)
+        if node is not None and not self._is_top(node):
+            self._remove_child(node)
+
+    def path_renamed(self, old_path, new_path):
+        """Reporte un renommage dans le même dossier, ou un déplacement (retrait + ajout)."""
+        node = self._loaded_node(old_path)
+        if node is None or self._is_top(node):
+            self.path_created(new_path)
+            return
+        if os.path.dirname(os.path.normpath(old_path)) == os.path.dirname(os.path.normpath(new_path)):
+            self._rename_child(node, os.path.basename(os.path.normpath(new_path)))
+        else:
+            self._remove_child(node)
+            self.path_created(new_path)
+
+    def sync_dir(self, path, entries=None):
+        """Compare un dossier chargé au disque et applique le minimum d'insertions / retraits.
+
+        Un retrait et un ajout portant le même inode sont traités comme un renommage.
+        `entries` : contenu déjà lu (scan_dirs), sinon le dossier est relu.
+        Renvoie True si le dossier a changé.
+        """
+        parent = self._loaded_node(path)
+        if parent is None or not parent.is_dir or not parent.fetched:
+            return False
+        if entries is None:
+            entries = _scan_dir(parent.path())
+        on_disk = {name: (is_dir, ino) for name, is_dir, ino in entries}
+        current = {c.name: c for c in parent.children}
+        removed = [c for name, c in current.items() if name not in on_disk]
+        added = [(name, is_dir, ino) for name, (is_dir, ino) in on_disk.items() if name not in current]
+        if not removed and not added:
+            return False
+
+        by_ino = {c.ino: c for c in removed if c.ino}
+        for name, is_dir, ino in added:
+            node = by_ino.pop(ino, None) if ino else None
+            if node is not None and node.is_dir == is_dir:
+                removed.remove(node)
+                self._rename_child(node, name)
+            else:
+                self._insert_child(parent, name, is_dir, ino)
+        for node in removed:
+            self._remove_child(node)
+        return True
+
+    def loaded_dirs(self):
+        """Chemins de tous les dossiers dont le contenu est chargé (racine comprise)."""
+        paths = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node.fetched:
+                if node.name:
+                    paths.append(node.path())
+                stack.extend(c for c in node.children if c.is_dir)
+        return paths
+
+    # ----------------------------- État de dépliage -----------------------------
+
+    def expanded_paths(self, view):
+        """Chemins des dossiers actuellement dépliés dans `view` (dossiers chargés uniquement)."""
+        paths = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            for child in node.children:
+                if child.is_dir and child.fetched and view.isExpanded(self._index_of(child)):
+                    paths.append(child.path())
+                    stack.append(child)
+        return paths
+
+    def restore_expanded(self, view, paths):
+        """Redéplie les dossiers donnés (du moins profond au plus profond)."""
+        for path in sorted(paths, key=lambda p: p.count(os.sep)):
+            index = self.index_for_path(path)
+            if index is not None and index.isValid():
+                view.expand(index)
+
+    # ----------------------------- Instantané -----------------------------
+
+    def _rel(self, node):
+        parts = []
+        while not self._is_top(node):
+            parts.append(node.name)
+            node = node.parent
+        return "/".join(reversed(parts))
+
+    def snapshot(self, view, root_path=None):
+        """{chemin relatif ("/") : [[nom, est_dossier, inode]...]} d'une racine et de ses dossiers dépliés."""
+        dirs = {}
+        top = self._root_node(root_path) if root_path else self._root
+        if top is None or not top.name:
+            return dirs
+        if top is not self._root and not top.fetched:
+            return dirs  # racine jamais dépliée
+        stack = [top]
+        while stack:
+            node = stack.pop()
+            dirs[self._rel(node)] = [[c.name, c.is_dir, c.ino] for c in node.children]
+            stack.extend(c for c in node.children
+                         if c.is_dir and c.fetched and view.isExpanded(self._index_of(c)))
+        return dirs
+
+    def load_snapshot(self, dirs, root_path=None):
+        """Remplace le contenu d'une racine par un instantané (aucune lecture disque) ;
+        renvoie les dossiers chargés.
+
+        Lève TypeError / ValueError si l'instantané est mal formé (le modèle est alors inchangé).
+        """
+        current = self._root_node(root_path) if root_path else self._root
+        if current is None or not current.name:
+            return []
+        root = _Node(current.name, current.parent, True)
+        root.row = current.row
+        loaded = []
+        stack = [(root, "")]
+        while stack:
+            node, rel = stack.pop()
+            entries = dirs.get(rel)
+            if entries is None:
+                continue
+            node.fetched = True
+            node.children = [_Node(str(name), node, bool(is_dir), int(ino))
+                             for name, is_dir, ino in entries if not is_hidden_entry(name)]
+            self._renumber(node)
+            loaded.append(node.path())
+            stack.extend((c, f"{rel}/{c.name}" if rel else c.name) for c in node.children if c.is_dir)
+        self.beginResetModel()
+        if current is self._root:
+            self._root = root
+        else:
+            self._root.children[current.row] = root
+        self.endResetModel()
+        return loaded
@@ -3,53 +3,180 @@
 # - Suppression fiable (macOS / Windows / Linux)
 # - Interface modernisée et légère
 
-import os, json, shutil, time
+import os, html, bisect, threading
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QPushButton, QSplitter, QTreeWidget,
-    QTreeWidgetItem, QMenu, QInputDialog, QMessageBox, QFileDialog,
-    QDialog, QLineEdit, QLabel, QHBoxLayout, QApplication
+    QWidget, QVBoxLayout, QPushButton, QSplitter, QTreeWidget, QTreeView,
+    QTreeWidgetItem, QListWidget, QListWidgetItem, QMenu, QInputDialog, QMessageBox, QFileDialog,
+    QDialog, QLineEdit, QLabel, QHBoxLayout, QStyledItemDelegate, QStyle, QApplication,
+    QProgressDialog, QAbstractItemView
 )
-from PyQt6.QtCore import Qt
-from .storage import ensure_base_path
+from PyQt6.QtCore import Qt, QTimer, QObject, QRunnable, QThreadPool, QSize, pyqtSignal
+from PyQt6.QtGui import QTextDocument, QKeySequence, QShortcut
+from .storage import ensure_base_path, create_folder_at, create_note_at, rename_path
+from .search_index import iter_search_shards, save_indexes, sync_directory
 from .editor_widget import NotebookEditor
+from .tree_model import NotebookTreeModel, scan_dirs
+from .watcher import NotebookWatcher
+from . import quick_open, perf, storage, history, transfer, links, cards, session, batch, journal
+from .config import load_config, save_config
 from .lang import t
 
-CONFIG_PATH = os.path.join(os.path.expanduser("~"), ".anki_notebook_config.json")
-
 
 # ----------------------------- Config du dossier racine -----------------------------
 
+def configured_notebook_paths():
+    """Racines de la config ("notebook_paths", ou l'ancien "notebook_path" seul), disponibles ou non."""
+    config = load_config()
+    paths = config.get("notebook_paths")
+    if not isinstance(paths, list) or not paths:
+        paths = [config.get("notebook_path")]
+    result = []
+    for path in paths:
+        if isinstance(path, str) and path and os.path.normpath(path) not in result:
+            result.append(os.path.normpath(path))
+    return result
+
+
+def load_notebook_paths():
+    """Racines à monter : celles de la config qui existent, sinon ensure_base_path().
+
+    Une racine absente (disque démonté...) est ignorée pour cette session mais reste dans la config.
+    """
+    return [path for path in configured_notebook_paths() if os.path.isdir(path)] or [ensure_base_path()]
+
+
 def load_notebook_path():
-    """Lit le chemin racine depuis la config, sinon fallback vers ensure_base_path()."""
-    if os.path.exists(CONFIG_PATH):
-        try:
-            with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-                path = json.load(f).get("notebook_path")
-                if path and os.path.exists(path):
-                    return path
-        except Exception:
-            pass
-    return ensure_base_path()
+    """Première racine montée."""
+    return load_notebook_paths()[0]
 
 
-def save_notebook_path(path):
-    """Sauvegarde le chemin racine dans la config utilisateur."""
+def save_notebook_paths(paths):
+    """Sauvegarde les racines (la première aussi dans "notebook_path", pour les versions précédentes)."""
     try:
-        with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-            json.dump({"notebook_path": path}, f)
+        save_config(notebook_paths=list(paths), notebook_path=paths[0])
     except Exception as e:
         QMessageBox.warning(None, t("error"), f"{e}")
 
 
+def save_notebook_path(path):
+    """Sauvegarde une racine unique."""
+    save_notebook_paths([path])
+
+
+def _overlaps(path, root):
+    """`path` est `root` ou se trouve dessous."""
+    path, root = os.path.normpath(path), os.path.normpath(root)
+    return path == root or path.startswith(os.path.join(root, ""))
+
+
+# -------------------------------- Recherche en arrière-plan --------------------------------
+
+SEARCH_DEBOUNCE_MS = 200
+SEARCH_LIMIT = 500  # résultats affichés (toutes racines confondues)
+
+# Données portées par chaque résultat (en plus du chemin en UserRole)
+POSITION_ROLE = Qt.ItemDataRole.UserRole + 1
+TERM_ROLE = Qt.ItemDataRole.UserRole + 2
+SNIPPET_ROLE = Qt.ItemDataRole.UserRole + 3
+
+
+class _SearchSignals(QObject):
+    """Signaux émis par le worker de recherche (reçus dans le thread GUI)."""
+    batch = pyqtSignal(int, str, list)
+    unavailable = pyqtSignal(int, str)
+    finished = pyqtSignal(int)
+
+
+class _SearchTask(QRunnable):
+    """Interroge l'index de chaque racine (en parallèle) et transmet les résultats par lots."""
+
+    def __init__(self, query_id, root_paths, text, cancel_event, signals):
+        super().__init__()
+        self.query_id = query_id
+        self.root_paths = root_paths
+        self.text = text
+        self.cancel_event = cancel_event
+        self.signals = signals
+
+    def run(self):
+        try:
+            with perf.span("search.query"):
+                for root, batch in iter_search_shards(self.root_paths, self.text, limit=SEARCH_LIMIT,
+                                                      cancelled=self.cancel_event.is_set):
+                    if self.cancel_event.is_set():
+                        return
+                    if batch is None:
+                        self.signals.unavailable.emit(self.query_id, root)
+                    else:
+                        self.signals.batch.emit(self.query_id, root, batch)
+        except RuntimeError:
+            # La boîte de dialogue a été détruite pendant la requête
+            return
+        finally:
+            try:
+                self.signals.finished.emit(self.query_id)
+            except RuntimeError:
+                pass
+
+
+class _SnippetDelegate(QStyledItemDelegate):
+    """Affiche chaque résultat sur deux lignes : titre, puis extrait surligné (HTML)."""
+
+    def _document(self, option, index):
+        doc = QTextDocument()
+        doc.setDefaultFont(option.font)
+        doc.setDocumentMargin(2)
+        title = html.escape(index.data(Qt.ItemDataRole.DisplayRole) or "")
+        snippet = index.data(SNIPPET_ROLE) or "&nbsp;"
+        doc.setHtml(f"<b>{title}</b><br><span style='color:#555'>{snippet}</span>")
+        return doc
+
+    def paint(self, painter, option, index):
+        self.initStyleOption(option, index)
+        style = option.widget.style() if option.widget else QApplication.style()
+        option.text = ""
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, option, painter, option.widget)
+        doc = self._document(option, index)
+        painter.save()
+        painter.setClipRect(option.rect)
+        painter.translate(option.rect.topLeft())
+        doc.drawContents(painter)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        self.initStyleOption(option, index)
+        doc = self._document(option, index)
+        return QSize(int(doc.idealWidth()), int(doc.size().height()))
+
+
 # -------------------------------- Boîte de recherche --------------------------------
 
 class SearchDialog(QDialog):
     """Fenêtre modale de recherche globale dans toutes les notes (.md)."""
 
-    def __init__(self, parent, root_path, open_note_callback):
+    def __init__(self, parent, root_paths, open_note_callback):
         super().__init__(parent)
-        self.root_path = root_path
+        self.root_paths = [root_paths] if isinstance(root_paths, str) else list(root_paths)
         self.open_note_callback = open_note_callback
+
+        # --- Worker unique : une requête annulée libère vite la place ---
+        # (il répartit lui-même la requête entre les racines, un thread par racine)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._signals = _SearchSignals(self)
+        self._signals.batch.connect(self._on_batch)
+        self._signals.unavailable.connect(self._on_unavailable)
+        self._query_id = 0
+        self._cancel_event = None
+        self._ranks = []        # -score des résultats affichés (fusion des racines par score)
+        self._unavailable = []  # racines signalées indisponibles pour la requête en cours
+
+        # --- Anti-rebond de la saisie ---
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(SEARCH_DEBOUNCE_MS)
+        self._debounce.timeout.connect(self._start_search)
+
         self._build()
 
     def _build(self):
@@ -60,85 +187,282 @@ class SearchDialog(QDialog):
 
         self.input = QLineEdit()
         self.input.setPlaceholderText(t("search_placeholder"))
+        self.input.setToolTip(t("search_syntax"))
         self.input.textChanged.connect(self.on_search_changed)
 
         self.results = QTreeWidget()
         self.results.setHeaderHidden(True)
+        self.results.setRootIsDecorated(False)
+        self.results.setUniformRowHeights(True)
+        self.results.setItemDelegate(_SnippetDelegate(self.results))
         self.results.itemDoubleClicked.connect(self.on_item_double_clicked)
 
+        self.status = QLabel()
+        self.status.setStyleSheet("color: #888;")
+        self.status.setWordWrap(True)
+
         layout.addWidget(QLabel(t("search_label")))
         layout.addWidget(self.input)
         layout.addWidget(self.results)
+        layout.addWidget(self.status)
 
-    def on_search_changed(self, text):
-        text = text.strip().lower()
+    def _clear_results(self):
         self.results.clear()
-        if not text:
+        self._ranks = []
+        self._unavailable = []
+        self.status.clear()
+
+    def on_search_changed(self, text):
+        # Toute frappe annule la requête en cours ; la suivante part après l'anti-rebond
+        self._cancel_current()
+        self._clear_results()
+        if not text.strip():
+            self._debounce.stop()
+            return
+        self._debounce.start()
+
+    def _cancel_current(self):
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            self._cancel_event = None
+
+    def _start_search(self):
+        self._cancel_current()
+        self._clear_results()
+        self._query_id += 1
+        self._cancel_event = threading.Event()
+        task = _SearchTask(self._query_id, self.root_paths, self.input.text(), self._cancel_event, self._signals)
+        self._pool.start(task)
+
+    def _on_batch(self, query_id, root, batch):
+        if query_id != self._query_id:
+            return  # lot d'une requête périmée
+        if root in self._unavailable:
+            # Racine signalée indisponible qui répond finalement
+            self._unavailable.remove(root)
+            self._show_unavailable()
+        multi = len(self.root_paths) > 1
+        if not multi:
+            self._ranks.extend(-hit.score for hit in batch)
+            self.results.addTopLevelItems([self._item(hit, None) for hit in batch])
+            return
+        # Fusion : chaque racine envoie ses résultats classés, insérés à leur rang global
+        label = os.path.basename(root) or root
+        for hit in batch:
+            pos = bisect.bisect_right(self._ranks, -hit.score)
+            if pos >= SEARCH_LIMIT:
+                continue
+            self._ranks.insert(pos, -hit.score)
+            self.results.insertTopLevelItem(pos, self._item(hit, label))
+        while len(self._ranks) > SEARCH_LIMIT:
+            self._ranks.pop()
+            self.results.takeTopLevelItem(self.results.topLevelItemCount() - 1)
+
+    @staticmethod
+    def _item(hit, root_label):
+        item = QTreeWidgetItem([f"{hit.title}  —  {root_label}" if root_label else hit.title])
+        item.setData(0, Qt.ItemDataRole.UserRole, hit.path)
+        item.setData(0, POSITION_ROLE, hit.position)
+        item.setData(0, TERM_ROLE, hit.term)
+        item.setData(0, SNIPPET_ROLE, hit.snippet)
+        return item
+
+    def _on_unavailable(self, query_id, root):
+        """Racine indisponible ou trop lente : ses résultats manquent, les autres sont affichés."""
+        if query_id != self._query_id:
             return
+        self._unavailable.append(root)
+        self._show_unavailable()
 
-        matches = []
-        for root, _, files in os.walk(self.root_path):
-            for f in files:
-                if f.startswith(".") or not f.endswith(".md"):
-                    continue
-                full_path = os.path.join(root, f)
-                try:
-                    with open(full_path, "r", encoding="utf-8", errors="ignore") as file:
-                        content = file.read().lower()
-                        if text in f.lower() or text in content:
-                            matches.append((f, full_path))
-                except Exception:
-                    pass
-
-        for title, path in matches[:500]:
-            item = QTreeWidgetItem([title])
-            item.setData(0, Qt.ItemDataRole.UserRole, path)
-            self.results.addTopLevelItem(item)
+    def _show_unavailable(self):
+        names = ", ".join(os.path.basename(root) or root for root in self._unavailable)
+        self.status.setText(t("search_root_unavailable", names=names) if names else "")
+
+    def done(self, result):
+        self._debounce.stop()
+        self._cancel_current()
+        super().done(result)
 
     def on_item_double_clicked(self, item, col):
         path = item.data(0, Qt.ItemDataRole.UserRole)
-        if os.path.isfile(path):
-            self.open_note_callback(path)
+        if storage.is_file(path):
+            self.open_note_callback(path, item.data(0, POSITION_ROLE), item.data(0, TERM_ROLE))
             self.accept()
 
 
+# -------------------------------- Réconciliation de l'arborescence --------------------------------
+
+class _ReconcileSignals(QObject):
+    """Contenu relu des dossiers de l'instantané (reçu dans le thread GUI)."""
+    done = pyqtSignal(str, list)
+
+
+class _PathIndexSignals(QObject):
+    """Index des chemins d'une racine construit (ses dossiers peuvent être surveillés)."""
+    ready = pyqtSignal(str)
+
+
+class _ReconcileTask(QRunnable):
+    """Relit les dossiers affichés depuis l'instantané, hors du thread GUI."""
+
+    def __init__(self, root_path, paths, signals):
+        super().__init__()
+        self.root_path = root_path
+        self.paths = paths
+        self.signals = signals
+
+    def run(self):
+        with perf.span("tree.reconcile.scan"):
+            result = scan_dirs(self.paths)
+        try:
+            self.signals.done.emit(self.root_path, result)
+        except RuntimeError:
+            pass  # panneau détruit entre-temps
+
+
+# -------------------------------- Tâches en arrière-plan --------------------------------
+
+class _JobSignals(QObject):
+    """Avancement et fin d'une tâche (reçus dans le thread GUI)."""
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+
+
+class _JobTask(QRunnable):
+    """Exécute func(progress) hors du thread GUI ; une exception est transmise comme résultat."""
+
+    def __init__(self, func, cancel_event, signals):
+        super().__init__()
+        self.func = func
+        self.cancel_event = cancel_event
+        self.signals = signals
+
+    def run(self):
+        def report(done, total):
+            self.signals.progress.emit(done, total)
+            return not self.cancel_event.is_set()
+        try:
+            result = self.func(report)
+        except Exception as e:
+            result = e
+        try:
+            self.signals.finished.emit(result)
+        except RuntimeError:
+            pass  # panneau détruit entre-temps
+
+
 # -------------------------------- Classe principale --------------------------------
 
+# Rétroliens : nouvel essai tant que l'index des liens est en cours de validation
+BACKLINKS_RETRY_MS = 500
+
 class NotebookMain(QWidget):
     """Explorateur de fichiers + éditeur Markdown + recherche globale."""
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.root_path = load_notebook_path()
-        os.makedirs(self.root_path, exist_ok=True)
+        # Plusieurs racines possibles ; la première sert de racine par défaut
+        self.root_paths = load_notebook_paths()
+        self.root_path = self.root_paths[0]
+        for root in self.root_paths:
+            os.makedirs(root, exist_ok=True)
+            storage.open_notebook(root)  # backend fichiers ou SQLite selon la racine
+
+        # --- Sauvegarde périodique des index (sans effet s'ils n'ont pas changé) ---
+        self.index_timer = QTimer(self)
+        self.index_timer.setInterval(30000)
+        self.index_timer.timeout.connect(save_indexes)
+        self.index_timer.timeout.connect(links.save_link_indexes)
+        self.index_timer.start()
 
-        # --- Arborescence ---
-        self.tree = QTreeWidget()
+        # --- Arborescence (modèle paresseux : un dossier est lu quand on le déplie) ---
+        # L'instantané de la dernière session est affiché tel quel, puis réconcilié en arrière-plan
+        self.tree_model = NotebookTreeModel(self.root_paths, self)
+        self._reconcile_signals = _ReconcileSignals(self)
+        self._reconcile_signals.done.connect(self._on_tree_reconciled)
+        self.tree = QTreeView()
+        self.tree.setModel(self.tree_model)
         self.tree.setHeaderHidden(True)
-        self.tree.itemDoubleClicked.connect(self.on_item_double_clicked)
+        self.tree.setUniformRowHeights(True)
+        # Sélection multiple et déplacement par glisser-déposer (exécuté en arrière-plan)
+        self.tree.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.tree.setDragDropMode(QAbstractItemView.DragDropMode.DragDrop)
+        self.tree.setDefaultDropAction(Qt.DropAction.MoveAction)
+        self.tree.setDropIndicatorShown(True)
+        self.tree_model.move_requested.connect(self.move_paths)
+        self._job = None
+        self.tree.doubleClicked.connect(self.on_item_double_clicked)
         self.tree.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.tree.customContextMenuRequested.connect(self.show_context_menu)
 
+        # --- Surveillance du disque : dossiers chargés + note ouverte ---
+        self.watcher = NotebookWatcher(self)
+        self.watcher.directory_changed.connect(self._on_directory_changed)
+        self.watcher.file_changed.connect(self._on_file_changed)
+        self.tree_model.rowsInserted.connect(self._update_watched_dirs)
+        self.tree_model.modelReset.connect(self._update_watched_dirs)
+        self._path_index_signals = _PathIndexSignals(self)
+        self._path_index_signals.ready.connect(self._update_watched_dirs)
+
         # --- Boutons (haut) ---
         self.btn_new = QPushButton(t("new"))
         self.btn_change_dir = QPushButton(t("change_dir"))
         self.btn_search = QPushButton(t("search"))
+        self.btn_quick_open = QPushButton(t("quick_open_button"))
+        self.btn_quick_open.setToolTip(t("quick_open") + " (Ctrl+P)")
+        self.btn_storage = QPushButton(t("storage"))
+        self.btn_cards = QPushButton(t("sync_cards"))
+        self.btn_cards.setToolTip(t("sync_cards_tip"))
 
         self.btn_new.clicked.connect(self.new_root_item)
-        self.btn_change_dir.clicked.connect(self.change_root_folder)
+        self.btn_change_dir.clicked.connect(self.open_roots_menu)
         self.btn_search.clicked.connect(self.open_search_dialog)
+        self.btn_quick_open.clicked.connect(self.open_quick_open)
+        self.btn_storage.clicked.connect(self.open_storage_menu)
+        self.btn_cards.clicked.connect(self.sync_cards)
 
         btn_layout = QHBoxLayout()
         btn_layout.addWidget(self.btn_new)
         btn_layout.addWidget(self.btn_change_dir)
         btn_layout.addWidget(self.btn_search)
+        btn_layout.addWidget(self.btn_quick_open)
+        btn_layout.addWidget(self.btn_storage)
+        btn_layout.addWidget(self.btn_cards)
+
+        # --- Ouverture rapide (Ctrl+P) : index des chemins construit en arrière-plan ---
+        self.quick_open_shortcut = QShortcut(QKeySequence("Ctrl+P"), self)
+        self.quick_open_shortcut.setContext(Qt.ShortcutContext.WidgetWithChildrenShortcut)
+        self.quick_open_shortcut.activated.connect(self.open_quick_open)
+        self._prewarm_indexes()
 
         # --- Éditeur ---
         self.editor = NotebookEditor()
+        self.editor.current_file_changed.connect(self._on_editor_file_changed)
+        self.editor.link_activated.connect(self.open_link)
+
+        # --- Rétroliens de la note ouverte (index des liens, sans relecture du notebook) ---
+        self.backlinks_label = QLabel(t("backlinks"))
+        self.backlinks_list = QListWidget()
+        self.backlinks_list.itemActivated.connect(self._on_backlink_activated)
+        self.backlinks_list.itemClicked.connect(self._on_backlink_activated)
+        backlinks_panel = QWidget()
+        backlinks_layout = QVBoxLayout(backlinks_panel)
+        backlinks_layout.setContentsMargins(0, 0, 0, 0)
+        backlinks_layout.addWidget(self.backlinks_label)
+        backlinks_layout.addWidget(self.backlinks_list)
+        self.backlinks_timer = QTimer(self)
+        self.backlinks_timer.setSingleShot(True)
+        self.backlinks_timer.setInterval(BACKLINKS_RETRY_MS)
+        self.backlinks_timer.timeout.connect(self.refresh_backlinks)
+
+        left = QSplitter(Qt.Orientation.Vertical)
+        left.addWidget(self.tree)
+        left.addWidget(backlinks_panel)
+        left.setSizes([480, 140])
 
         # --- Split principal ---
         split = QSplitter()
-        split.addWidget(self.tree)
+        split.addWidget(left)
         split.addWidget(self.editor)
         split.setSizes([260, 600])
 
@@ -157,13 +481,13 @@ class NotebookMain(QWidget):
                 font-size: 13px;
             }
             QPushButton:hover { background-color: #ebebeb; }
-            QTreeWidget {
+            QTreeView {
                 background-color: #fafafa;
                 border: 1px solid #dcdcdc;
                 border-radius: 6px;
                 font-size: 13px;
             }
-            QTextEdit {
+            QPlainTextEdit {
                 border: 1px solid #dcdcdc;
                 border-radius: 6px;
                 background-color: #ffffff;
@@ -173,7 +497,9 @@ class NotebookMain(QWidget):
             }
         """)
 
-        self.refresh_tree()
+        self.restore_session()
+        self._update_watched_dirs()
+        QTimer.singleShot(0, self.recover_journals)  # une fois le panneau affiché
 
     # ----------------------------- Re-traduction -----------------------------
 
@@ -181,74 +507,438 @@ class NotebookMain(QWidget):
         self.btn_new.setText(t("new"))
         self.btn_change_dir.setText(t("change_dir"))
         self.btn_search.setText(t("search"))
+        self.btn_quick_open.setText(t("quick_open_button"))
+        self.btn_quick_open.setToolTip(t("quick_open") + " (Ctrl+P)")
+        self.btn_storage.setText(t("storage"))
+        self.btn_cards.setText(t("sync_cards"))
+        self.btn_cards.setToolTip(t("sync_cards_tip"))
+        self.backlinks_label.setText(t("backlinks"))
         if hasattr(self.editor, "retranslate_ui"):
             self.editor.retranslate_ui()
 
-    # ----------------------------- Helpers anti-fantômes -----------------------------
-
-    def _detach_editor_if_affected(self, target_path: str):
-        """Détache l’éditeur si le fichier/dossier supprimé est ouvert ou contient le fichier ouvert."""
-        cur = getattr(self.editor, "file_path", None)
-        if not cur:
-            return
-        if os.path.isdir(target_path):
-            if cur.startswith(os.path.join(target_path, "")):
-                self.editor.text_edit.clear()
-                self.editor.file_path = None
-        else:
-            if os.path.normpath(cur) == os.path.normpath(target_path):
-                self.editor.text_edit.clear()
-                self.editor.file_path = None
+    def flush(self):
+        """Écrit tout ce qui est en attente (note ouverte, index, session) — fermeture du dock."""
+        self.editor.flush()
+        self.save_session()
+        save_indexes()
+        links.save_link_indexes()
+        history.flush_history()
 
     # ----------------------------- Actions haut ------------------------------
 
     def open_search_dialog(self):
-        dlg = SearchDialog(self, self.root_path, self.editor.load_file)
+        dlg = SearchDialog(self, self.root_paths, self.editor.load_file)
+        dlg.exec()
+        save_indexes()
+
+    def open_quick_open(self):
+        dlg = quick_open.QuickOpenDialog(self, self.root_paths, self.editor.load_file)
         dlg.exec()
 
+    def open_roots_menu(self):
+        """Dossiers racines : remplacer, ajouter, retirer."""
+        menu = QMenu()
+        change = menu.addAction(t("change_root"))
+        add = menu.addAction(t("add_root"))
+        removals = {}
+        if len(self.root_paths) > 1:
+            menu.addSeparator()
+            for root in self.root_paths:
+                removals[menu.addAction(t("remove_root", name=os.path.basename(root) or root))] = root
+        act = menu.exec(self.btn_change_dir.mapToGlobal(self.btn_change_dir.rect().bottomLeft()))
+        if act is change:
+            self.change_root_folder()
+        elif act is add:
+            self.add_root_folder()
+        elif act in removals:
+            self.remove_root_folder(removals[act])
+
     def change_root_folder(self):
         new_path = QFileDialog.getExistingDirectory(self, t("choose_folder"), self.root_path)
         if new_path:
-            cur = getattr(self.editor, "file_path", None)
-            if cur and not cur.startswith(os.path.join(new_path, "")):
-                self.editor.text_edit.clear()
-                self.editor.file_path = None
-            self.root_path = new_path
-            save_notebook_path(new_path)
-            os.makedirs(new_path, exist_ok=True)
-            self.refresh_tree()
+            self.set_root_folder(new_path)
             QMessageBox.information(self, t("updated_folder"), f"{t('new_folder_set')}:\n{new_path}")
 
-    # ----------------------------- Arborescence ------------------------------
+    def add_root_folder(self):
+        new_path = QFileDialog.getExistingDirectory(self, t("add_root"), os.path.dirname(self.root_path))
+        if not new_path:
+            return
+        new_path = os.path.normpath(new_path)
+        if any(_overlaps(new_path, root) or _overlaps(root, new_path) for root in self.root_paths):
+            QMessageBox.warning(self, t("error"), t("root_overlap"))
+            return
+        self._set_roots(self.root_paths + [new_path])
 
-    def refresh_tree(self):
-        self.tree.blockSignals(True)
-        self.tree.clear()
-        self._add_children(self.tree.invisibleRootItem(), self.root_path)
-        self.tree.expandAll()
-        self.tree.blockSignals(False)
-        # Si la note ouverte a disparu, on détache
-        cur = getattr(self.editor, "file_path", None)
-        if cur and not os.path.exists(cur):
-            self.editor.text_edit.clear()
-            self.editor.file_path = None
+    def remove_root_folder(self, root):
+        """Retire une racine de l'arborescence (ses fichiers ne sont pas touchés)."""
+        if len(self.root_paths) > 1 and root in self.root_paths:
+            self._set_roots([r for r in self.root_paths if r != root])
 
-    def _add_children(self, parent_item, path):
-        if not os.path.exists(path):
-            return
+    def set_root_folder(self, new_path):
+        """Remplace toutes les racines par une seule (fichiers ou SQLite) et recharge l'arborescence."""
+        self._set_roots([os.path.normpath(new_path)])
+
+    def _set_roots(self, paths):
+        """Monte les racines `paths` : onglets hors racines fermés, arbre, session et index rechargés."""
+        self.save_session()
+        for open_path in self.editor.open_paths():
+            if not any(_overlaps(open_path, root) for root in paths):
+                self.editor.close_path(open_path, save=True)
+        # Les racines configurées mais absentes pour cette session sont conservées
+        missing = [p for p in configured_notebook_paths() if p not in self.root_paths and not os.path.isdir(p)]
+        self.root_paths = list(paths)
+        self.root_path = self.root_paths[0]
+        save_notebook_paths(self.root_paths + [p for p in missing if p not in self.root_paths])
+        for root in self.root_paths:
+            os.makedirs(root, exist_ok=True)
+            storage.open_notebook(root)
+        self.tree_model.set_roots(self.root_paths)
+        self.restore_session()
+        self.recover_journals()
+        self._prewarm_indexes()
+        self.refresh_backlinks()
+
+    def _prewarm_indexes(self):
+        for root in self.root_paths:
+            quick_open.prewarm(root, self._path_index_ready)
+            links.prewarm(root)
+
+    def _path_index_ready(self, root):
+        """Appelé depuis le thread de construction : relais vers le thread GUI."""
         try:
-            entries = sorted(os.listdir(path))
-        except FileNotFoundError:
+            self._path_index_signals.ready.emit(root)
+        except RuntimeError:
+            pass  # panneau détruit entre-temps
+
+    def _root_of(self, path):
+        """Racine contenant `path` (la plus profonde), sinon la première."""
+        roots = [root for root in self.root_paths if path and _overlaps(path, root)]
+        return max(roots, key=len) if roots else self.root_path
+
+    def _target_root(self):
+        """Racine visée par les actions globales : celle de l'élément sélectionné, sinon de la note ouverte."""
+        current = self.tree.currentIndex()
+        if current.isValid():
+            return self._root_of(self.tree_model.file_path(current))
+        return self._root_of(self.editor.file_path)
+
+    # ----------------------------- Liens wiki et rétroliens ------------------------------
+
+    def open_link(self, target):
+        """Ouvre la note désignée par [[target]] ; propose de la créer si elle n'existe pas."""
+        root = self._root_of(self.editor.file_path)
+        index = links.peek_link_index(root) or links.get_link_index(root)
+        path = index.resolve(target, self.editor.file_path)
+        if path is None:
+            answer = QMessageBox.question(self, t("new_note"), t("link_create", name=target))
+            if answer != QMessageBox.StandardButton.Yes:
+                return
+            base = os.path.dirname(self.editor.file_path or "") if "/" not in target else root
+            path = create_note_at(os.path.join(base or root, *target.strip().split("/")) + ".md")
+            self.tree_model.path_created(path)
+        self.editor.load_file(path)
+
+    def refresh_backlinks(self):
+        """Liste des notes qui pointent vers la note ouverte (réessaie tant que l'index se charge)."""
+        self.backlinks_list.clear()
+        cur = self.editor.file_path
+        if not cur:
             return
-        for e in entries:
-            if e.startswith(".") or e.lower() in {"thumbs.db", "desktop.ini"}:
+        root = self._root_of(cur)
+        index = links.peek_link_index(root)
+        if index is None:
+            self.backlinks_timer.start()
+            return
+        for source in index.backlinks(cur):
+            item = QListWidgetItem(os.path.splitext(os.path.relpath(source, root))[0])
+            item.setData(Qt.ItemDataRole.UserRole, source)
+            self.backlinks_list.addItem(item)
+
+    def _on_backlink_activated(self, item):
+        path = item.data(Qt.ItemDataRole.UserRole)
+        if path and path != self.editor.file_path:
+            self.editor.load_file(path)
+
+    def _offer_link_rewrite(self, sources, old_path, new_path):
+        """Après un renommage : propose de mettre à jour les liens entrants en une fois."""
+        answer = QMessageBox.question(self, t("rename"), t("link_rewrite", count=len(sources)))
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+        self.editor.flush()
+        changed = links.rewrite_links(sources, old_path, new_path, self._root_of(new_path))
+        if self.editor.file_path in changed:
+            self.editor.reload_from_disk()
+        self.refresh_backlinks()
+
+    # ----------------------------- Cartes Anki ------------------------------
+
+    def sync_cards(self):
+        """Crée / met à jour les cartes des blocs Q/R et à trous (une opération, une annulation)."""
+        from aqt import mw
+        from aqt.operations import CollectionOp
+        if mw is None or mw.col is None:
+            QMessageBox.warning(self, t("error"), t("sync_cards_no_collection"))
+            return
+        self.editor.flush()
+        # Les marqueurs <!--card:...--> sont écrits en arrière-plan : aucune saisie entre-temps,
+        # sinon le tampon (sans marqueurs) écraserait la note à la sauvegarde suivante
+        self.editor.set_read_only(True)
+        root = self._root_of(self.editor.file_path)
+        result = {}
+
+        def op(col):
+            plan = cards.plan_sync(root)
+            result["plan"] = plan
+            return cards.apply_plan(col, plan, t("sync_cards_undo"))
+
+        def done(_changes):
+            self.btn_cards.setEnabled(True)
+            self.editor.set_read_only(False)
+            plan = result["plan"]
+            if self.editor.file_path in plan.rewritten:
+                self.editor.reload_from_disk()
+            QMessageBox.information(self, t("sync_cards"), t(
+                "sync_cards_done", added=plan.added, updated=plan.updated,
+                unchanged=plan.unchanged, orphans=len(plan.orphans)))
+
+        def failed(error):
+            self.btn_cards.setEnabled(True)
+            self.editor.set_read_only(False)
+            self.editor.reload_from_disk()  # marqueurs éventuellement écrits avant l'échec
+            QMessageBox.warning(self, t("error"), f"{error}")
+
+        self.btn_cards.setEnabled(False)
+        CollectionOp(parent=self, op=op).success(done).failure(failed).run_in_background()
+
+    # ----------------------------- Historique des versions ------------------------------
+
+    def open_history(self, path):
+        from .history_dialog import HistoryDialog
+        if self.editor.file_path == path:
+            self.editor.flush()
+        HistoryDialog(self, path, lambda content: self.restore_version(path, content)).exec()
+
+    def recover_journals(self):
+        """Propose de restaurer les modifications retrouvées dans le journal après un arrêt brutal."""
+        recoveries = [r for root in self.root_paths for r in journal.pending_recoveries(root)]
+        for recovery in recoveries:
+            name = os.path.splitext(os.path.basename(recovery.path))[0]
+            answer = QMessageBox.question(self, t("recovery"), t("recovery_found", name=name))
+            if answer != QMessageBox.StandardButton.Yes:
+                recovery.discard()
                 continue
-            full = os.path.join(path, e)
-            item = QTreeWidgetItem([e])
-            item.setData(0, Qt.ItemDataRole.UserRole, full)
-            parent_item.addChild(item)
-            if os.path.isdir(full):
-                self._add_children(item, full)
+            if self.editor.file_path == recovery.path:
+                self.editor.flush()
+            history.snapshot_now(recovery.path, storage.load_markdown(recovery.path))
+            if not recovery.apply():
+                QMessageBox.warning(self, t("error"), t("recovery_failed", name=name))
+            elif self.editor.file_path == recovery.path:
+                self.editor.reload_from_disk()
+
+    def restore_version(self, path, content):
+        """Remplace la note par une ancienne version (l'état actuel est d'abord archivé)."""
+        if self.editor.file_path == path:
+            self.editor.flush()
+        history.snapshot_now(path, storage.load_markdown(path))
+        if not storage.save_markdown(path, content):
+            QMessageBox.warning(self, t("error"), t("history_restore_failed"))
+            return
+        if self.editor.file_path == path:
+            self.editor.reload_from_disk()
+        else:
+            self.editor.load_file(path)
+
+    # ----------------------------- Format de stockage ------------------------------
+
+    def open_storage_menu(self):
+        """Import / export en masse, conversion SQLite <-> fichiers Markdown (racine sélectionnée)."""
+        root = self._target_root()
+        menu = QMenu()
+        import_dir = menu.addAction(t("import_folder"))
+        import_zip = menu.addAction(t("import_zip"))
+        export_zip = menu.addAction(t("export_zip"))
+        menu.addSeparator()
+        if storage.backend_for(root).name == "sqlite":
+            convert = menu.addAction(t("export_to_files"))
+            kind = "files"
+        else:
+            convert = menu.addAction(t("convert_to_sqlite"))
+            kind = "sqlite"
+        act = menu.exec(self.btn_storage.mapToGlobal(self.btn_storage.rect().bottomLeft()))
+        if act is import_dir or act is import_zip:
+            self.import_into(root, from_zip=act is import_zip)
+        elif act is export_zip:
+            self.export_folder(root)
+        elif act is convert:
+            self.convert_notebook(root, kind)
+
+    def convert_notebook(self, root, kind):
+        target = QFileDialog.getExistingDirectory(self, t("choose_folder"), os.path.dirname(root))
+        if not target:
+            return
+        target = os.path.normpath(target)
+        if any(_overlaps(target, r) for r in self.root_paths) or (os.path.isdir(target) and os.listdir(target)):
+            QMessageBox.warning(self, t("error"), t("folder_not_empty"))
+            return
+        self.editor.flush()
+
+        def done(count, cancelled):
+            self._update_watched_dirs()
+            if cancelled:
+                return
+            answer = QMessageBox.question(self, t("storage"), t("copy_done", count=count, path=target))
+            if answer == QMessageBox.StandardButton.Yes:
+                # La copie remplace la racine convertie, les autres restent montées
+                self._set_roots([target if r == root else r for r in self.root_paths])
+
+        # Éditeur figé : une frappe pendant la copie n'atteindrait pas le nouveau notebook
+        self._run_job(t("copying"), lambda report: storage.copy_notebook(root, target, kind, progress=report),
+                      done, lock_editor=True)
+
+    def import_into(self, dest_folder, from_zip=False):
+        """Importe un dossier ou une archive zip dans un nouveau sous-dossier de `dest_folder`."""
+        if from_zip:
+            source, _ = QFileDialog.getOpenFileName(self, t("import_zip"), "", "Zip (*.zip)")
+        else:
+            source = QFileDialog.getExistingDirectory(self, t("import_folder"))
+        if not source:
+            return
+
+        def done(result, cancelled):
+            target_root, count, failures = result
+            # Une seule mise à jour de l'arbre et des index pour tout l'import
+            self.tree_model.path_created(target_root)
+            sync_directory(dest_folder)
+            quick_open.sync_directory(dest_folder)
+            links.sync_directory(dest_folder)
+            self._update_watched_dirs()
+            message = t("import_done", count=count, path=target_root)
+            if failures:
+                message += "\n\n" + t("import_failures", count=len(failures)) + "\n" + "\n".join(
+                    f"{path} : {error}" for path, error in failures[:10])
+            QMessageBox.information(self, t("storage"), message)
+
+        self._run_job(t("importing"), lambda report: transfer.import_notes(source, dest_folder, progress=report), done)
+
+    def export_folder(self, folder):
+        """Exporte un dossier (ou tout le notebook) dans une archive zip."""
+        default = os.path.join(os.path.expanduser("~"), os.path.basename(os.path.normpath(folder)) + ".zip")
+        zip_path, _ = QFileDialog.getSaveFileName(self, t("export_zip"), default, "Zip (*.zip)")
+        if not zip_path:
+            return
+        self.editor.flush()
+
+        def done(count, cancelled):
+            self._update_watched_dirs()
+            if not cancelled:
+                QMessageBox.information(self, t("storage"), t("export_done", count=count, path=zip_path))
+
+        self._run_job(t("exporting"), lambda report: transfer.export_zip(folder, zip_path, progress=report), done)
+
+    # ----------------------------- Session (instantané de l'interface) ------------------------------
+
+    def save_session(self):
+        """Enregistre, dans chaque racine, son arborescence dépliée, sa sélection et ses onglets."""
+        editor_state = self.editor.session_state()
+        current = self.tree.currentIndex()
+        selected = self.tree_model.file_path(current) if current.isValid() else None
+        for root in self.root_paths:
+            rel = lambda path, root=root: (
+                session.to_rel(root, path) if path and self._root_of(path) == root else None)
+            tabs = [r for r in map(rel, editor_state["tabs"]) if r]
+            views = {rel(path): view for path, view in editor_state["views"].items() if rel(path)}
+            session.save_session(root, {
+                "dirs": self.tree_model.snapshot(self.tree, root),
+                "selected": rel(selected),
+                "tabs": tabs,
+                "current": rel(editor_state["current"]),
+                "views": views,
+            })
+
+    @perf.timed("tree.restore_session")
+    def restore_session(self):
+        """Affiche la dernière session de chaque racine sans la parcourir, puis lance les réconciliations."""
+        expanded, selected, tabs, views, current = [], None, [], {}, None
+        for root in self.root_paths:
+            state = session.load_session(root)
+            dirs = state.get("dirs")
+            if not isinstance(dirs, dict) or "" not in dirs:
+                continue
+            try:
+                loaded = self.tree_model.load_snapshot(dirs, root)
+            except (TypeError, ValueError, AttributeError):
+                continue  # instantané corrompu : lecture normale à la demande
+            abs_path = lambda rel, root=root: session.to_abs(root, rel) if isinstance(rel, str) and rel else None
+            if self.tree_model.multi_root:
+                expanded.append(root)
+            expanded.extend(session.to_abs(root, rel) for rel in dirs if rel)
+            selected = selected or abs_path(state.get("selected"))
+            tabs.extend(p for p in map(abs_path, state.get("tabs") or []) if p)
+            current = current or abs_path(state.get("current"))
+            root_views = state.get("views") if isinstance(state.get("views"), dict) else {}
+            views.update({abs_path(rel): view for rel, view in root_views.items() if abs_path(rel)})
+            QThreadPool.globalInstance().start(_ReconcileTask(root, loaded, self._reconcile_signals))
+        self.tree_model.restore_expanded(self.tree, expanded)
+        if selected:
+            index = self.tree_model.index_for_path(selected, fetch=False)
+            if index is not None and index.isValid():
+                self.tree.setCurrentIndex(index)
+                self.tree.scrollTo(index)
+        if tabs:
+            self.editor.restore_session(tabs, current, views)
+
+    @perf.timed("tree.reconcile.apply")
+    def _on_tree_reconciled(self, root_path, result):
+        """Applique les seules différences entre l'instantané et le disque."""
+        if root_path not in self.root_paths:
+            return
+        for path, entries in result:
+            self.tree_model.sync_dir(path, entries)
+        self.editor.close_missing()
+
+    # ----------------------------- Surveillance du disque ------------------------------
+
+    def _watchable(self, path):
+        """Une base SQLite n'est modifiée que par l'add-on : rien à surveiller."""
+        return storage.backend_for(path).watchable
+
+    def _update_watched_dirs(self, *args):
+        """Dossiers chargés dans l'arbre, plus tous ceux qui contiennent des notes (dépliés ou non) :
+        un changement externe dans un dossier replié atteint aussi les index."""
+        dirs = [path for path in self.tree_model.loaded_dirs() if self._watchable(path)]
+        for root in self.root_paths:
+            if self._watchable(root):
+                dirs.extend(quick_open.known_dirs(root))
+        self.watcher.set_directories(dirs)
+
+    def _on_editor_file_changed(self, path):
+        self.watcher.set_files([path] if path and self._watchable(path) else [])
+        self.refresh_backlinks()
+
+    def _on_directory_changed(self, path):
+        """Changement externe (ou interne) dans un dossier : correctifs minimaux arbre + index."""
+        self.tree_model.sync_dir(path)
+        sync_directory(path)
+        quick_open.sync_directory(path)
+        links.sync_directory(path)
+        self.editor.close_missing()
+        self._update_watched_dirs()
+
+    def _on_file_changed(self, path):
+        cur = getattr(self.editor, "file_path", None)
+        if cur and os.path.normpath(cur) == path and os.path.isfile(path):
+            self.editor.reload_from_disk()
+
+    # ----------------------------- Arborescence ------------------------------
+
+    @perf.timed("tree.refresh")
+    def refresh_tree(self):
+        """Relit l'arborescence en conservant les dossiers dépliés (seuls ceux-ci sont relus)."""
+        expanded = self.tree_model.expanded_paths(self.tree)
+        self.tree_model.reload()
+        self.tree_model.restore_expanded(self.tree, expanded)
+        # Les onglets des notes disparues sont fermés
+        self.editor.close_missing()
 
     # ------------------ Création / suppression / renommage -------------------
 
@@ -260,83 +950,242 @@ class NotebookMain(QWidget):
         if not act:
             return
 
+        root = self._target_root()
+        created = None
         if act == f_act:
             name, ok = QInputDialog.getText(self, t("new_folder"), t("folder_name"))
             if ok and name.strip():
-                os.makedirs(os.path.join(self.root_path, name.strip()), exist_ok=True)
+                created = create_folder_at(os.path.join(root, name.strip()))
         elif act == n_act:
             name, ok = QInputDialog.getText(self, t("new_note"), t("note_name"))
             if ok and name.strip():
-                with open(os.path.join(self.root_path, name.strip() + ".md"), "w", encoding="utf-8") as f:
-                    f.write("")
+                created = create_note_at(os.path.join(root, name.strip() + ".md"))
 
         self.tree.clearSelection()
-        self.refresh_tree()
+        if created:
+            self.tree_model.path_created(created)
 
     def show_context_menu(self, pos):
-        item = self.tree.itemAt(pos)
-        if not item:
+        index = self.tree.indexAt(pos)
+        if not index.isValid():
             return
-        path = item.data(0, Qt.ItemDataRole.UserRole)
-        if not os.path.exists(path):
-            self.refresh_tree()
+        selected = self._selected_paths()
+        if len(selected) > 1 and self.tree.selectionModel().isSelected(index):
+            self._show_batch_menu(pos, selected)
+            return
+        path = self.tree_model.file_path(index)
+        if not storage.exists(path):
+            self.tree_model.path_removed(path)
             return
 
-        is_dir = os.path.isdir(path)
+        is_dir = storage.is_dir(path)
+        is_root = self.tree_model.is_root(index)
         menu = QMenu()
         if is_dir:
             menu.addAction(t("new_subfolder"))
             menu.addAction(t("new_note_here"))
+            menu.addAction(t("import_here"))
+            menu.addAction(t("export_zip"))
+        else:
+            menu.addAction(t("history"))
         menu.addSeparator()
-        menu.addAction(t("rename"))
-        menu.addAction(t("delete"))
+        if is_root:
+            # Une racine n'est ni renommée ni déplacée ni supprimée depuis l'arbre
+            remove_root = menu.addAction(t("remove_root", name=os.path.basename(path) or path))
+        else:
+            menu.addAction(t("rename"))
+            menu.addAction(t("move_to"))
+            menu.addAction(t("delete"))
 
         act = menu.exec(self.tree.viewport().mapToGlobal(pos))
         if not act:
             return
+        if is_root and act is remove_root:
+            self.remove_root_folder(path)
+            return
         text = act.text()
 
         if text == t("new_subfolder"):
             name, ok = QInputDialog.getText(self, t("new_subfolder"), t("folder_name"))
             if ok and name.strip():
-                os.makedirs(os.path.join(path, name.strip()), exist_ok=True)
-                self.refresh_tree()
+                self.tree_model.path_created(create_folder_at(os.path.join(path, name.strip())))
 
         elif text == t("new_note_here"):
             name, ok = QInputDialog.getText(self, t("new_note_here"), t("note_name"))
             if ok and name.strip():
-                with open(os.path.join(path, name.strip() + ".md"), "w", encoding="utf-8") as f:
-                    f.write("")
-                self.refresh_tree()
+                self.tree_model.path_created(create_note_at(os.path.join(path, name.strip() + ".md")))
+
+        elif text == t("import_here"):
+            self.import_into(path)
+
+        elif text == t("export_zip"):
+            self.export_folder(path)
+
+        elif text == t("history"):
+            self.open_history(path)
 
         elif text == t("rename"):
             new_name, ok = QInputDialog.getText(self, t("rename"), t("new_name"), text=os.path.basename(path))
             if ok and new_name.strip():
                 new_full = os.path.join(os.path.dirname(path), new_name.strip())
-                self._detach_editor_if_affected(path)
-                os.rename(path, new_full)
-                self.refresh_tree()
+                self.editor.flush()
+                index = links.peek_link_index(self._root_of(path)) if not is_dir else None
+                inbound = index.backlinks(path) if index is not None else []
+                rename_path(path, new_full)
+                self.editor.path_renamed(path, new_full)
+                self.tree_model.path_renamed(path, new_full)
+                if inbound and new_full.endswith(".md"):
+                    self._offer_link_rewrite(inbound, path, new_full)
+
+        elif text == t("move_to"):
+            self.choose_move_target([path])
 
         elif text == t("delete"):
             confirm = QMessageBox.question(self, t("delete"), t("confirm_delete", name=os.path.basename(path)))
             if confirm == QMessageBox.StandardButton.Yes:
-                try:
-                    self._detach_editor_if_affected(path)
-                    if os.path.isdir(path):
-                        shutil.rmtree(path)
-                    elif os.path.exists(path):
-                        os.remove(path)
-                    time.sleep(0.1)
-                    QApplication.processEvents()
-                    self.tree.clearSelection()
+                self.delete_paths([path])
+
+    # ------------------ Opérations groupées (sélection multiple, glisser-déposer) -------------------
+
+    def _selected_paths(self):
+        return [self.tree_model.file_path(i) for i in self.tree.selectionModel().selectedRows()]
+
+    def _show_batch_menu(self, pos, paths):
+        menu = QMenu()
+        act_move = menu.addAction(t("move_to"))
+        act_rename = menu.addAction(t("batch_rename"))
+        menu.addSeparator()
+        act_delete = menu.addAction(t("delete_count", count=len(paths)))
+        act = menu.exec(self.tree.viewport().mapToGlobal(pos))
+        if act is act_move:
+            self.choose_move_target(paths)
+        elif act is act_rename:
+            self.rename_paths(paths)
+        elif act is act_delete:
+            confirm = QMessageBox.question(self, t("delete"), t("confirm_delete_count", count=len(paths)))
+            if confirm == QMessageBox.StandardButton.Yes:
+                self.delete_paths(paths)
+
+    def _run_job(self, label, func, on_done, lock_editor=False):
+        """Exécute func(progress) en arrière-plan avec une barre annulable, puis on_done(résultat, annulé).
+
+        Une seule tâche à la fois ; les erreurs sont affichées (on_done n'est pas appelé).
+        `lock_editor` garde l'éditeur en lecture seule jusqu'à la fin de la tâche.
+        """
+        if self._job is not None:
+            QMessageBox.information(self, t("storage"), t("job_running"))
+            return
+        if lock_editor:
+            # Pas de frappe (ni d'autosauvegarde) vers un chemin qui est en train de changer
+            self.editor.set_read_only(True)
+        cancel_event = threading.Event()
+        signals = _JobSignals(self)
+        progress = QProgressDialog(label, t("cancel"), 0, 0, self)
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(300)
+        progress.canceled.connect(cancel_event.set)
+
+        def on_progress(done, total):
+            progress.setMaximum(total)
+            progress.setValue(done)
+
+        def on_finished(result):
+            self._job = None
+            cancelled = cancel_event.is_set()  # avant close(), qui émet aussi `canceled`
+            progress.close()
+            signals.deleteLater()
+            try:
+                if isinstance(result, Exception):
                     self.refresh_tree()
-                except Exception as e:
-                    QMessageBox.warning(self, t("error"), f"{t('delete_error')} : {e}")
+                    self._update_watched_dirs()
+                    QMessageBox.warning(self, t("error"), f"{result}")
+                    return
+                on_done(result, cancelled)
+            finally:
+                if lock_editor:
+                    # Après on_done : les onglets pointent déjà vers leurs nouveaux chemins
+                    self.editor.set_read_only(False)
+
+        signals.progress.connect(on_progress)
+        signals.finished.connect(on_finished)
+        self._job = (signals, progress)
+        # Pas de correctifs au fil de l'eau pendant la tâche : une seule mise à jour à la fin
+        self.watcher.set_directories([])
+        QThreadPool.globalInstance().start(_JobTask(func, cancel_event, signals))
+
+    def _after_batch(self, dirs, failures):
+        """Mise à jour unique de l'arbre pour les dossiers touchés, puis rapport des échecs."""
+        for path in dirs:
+            self.tree_model.sync_dir(path)
+        self.editor.close_missing()
+        self._update_watched_dirs()
+        self.refresh_backlinks()
+        if failures:
+            QMessageBox.warning(self, t("error"), t("batch_failures", count=len(failures)) + "\n" + "\n".join(
+                f"{os.path.basename(path)} : {error}" for path, error in failures[:10]))
+
+    def _run_moves(self, label, ops):
+        if not ops:
+            return
+        self.editor.flush()
+
+        def done(result, cancelled):
+            moved, failures = result
+            for src, dst in moved:
+                self.editor.path_renamed(src, dst)
+            self._after_batch(batch.affected_dirs(moved), failures)
+
+        self._run_job(label, lambda report: batch.run_moves(ops, report), done, lock_editor=True)
+
+    def move_paths(self, paths, dest_folder):
+        """Déplace des notes / dossiers (glisser-déposer ou « Déplacer vers… »)."""
+        # D'une racine à l'autre : seulement entre dossiers de fichiers (pas vers / depuis une base SQLite)
+        target = storage.backend_for(dest_folder)
+        if any(storage.backend_for(p) is not target and "sqlite" in (storage.backend_for(p).name, target.name)
+               for p in paths):
+            QMessageBox.warning(self, t("error"), t("move_across_storage"))
+            return
+        self._run_moves(t("moving"), batch.plan_move(paths, dest_folder))
+
+    def choose_move_target(self, paths):
+        dest = QFileDialog.getExistingDirectory(self, t("move_to"), self._root_of(paths[0]))
+        if not dest:
+            return
+        dest = os.path.normpath(dest)
+        if not any(_overlaps(dest, root) for root in self.root_paths):
+            QMessageBox.warning(self, t("error"), t("move_outside_root"))
+            return
+        self.move_paths(paths, dest)
+
+    def rename_paths(self, paths):
+        template, ok = QInputDialog.getText(self, t("batch_rename"), t("batch_rename_label"), text="{name}")
+        if not ok or not template.strip():
+            return
+        try:
+            ops = batch.plan_rename(paths, template.strip())
+        except ValueError as e:
+            QMessageBox.warning(self, t("error"), t("invalid_name", name=e))
+            return
+        self._run_moves(t("renaming"), ops)
+
+    def delete_paths(self, paths):
+        """Supprime en arrière-plan ; les onglets concernés sont fermés avant."""
+        paths = batch.top_level(paths)
+        for path in paths:
+            self.editor.close_path(path)
+        self.editor.flush()
+        self.tree.clearSelection()
+
+        def done(result, cancelled):
+            deleted, failures = result
+            self._after_batch(batch.affected_dirs([], deleted), failures)
+
+        self._run_job(t("deleting"), lambda report: batch.run_deletes(paths, report), done)
 
     # --------------------------------- Ouvrir --------------------------------
 
-    def on_item_double_clicked(self, item, col):
-        path = item.data(0, Qt.ItemDataRole.UserRole)
-        if os.path.isfile(path) and path.endswith(".md"):
+    def on_item_double_clicked(self, index):
+        path = self.tree_model.file_path(index)
+        if storage.is_file(path) and path.endswith(".md"):
             self.editor.load_file(path)
 
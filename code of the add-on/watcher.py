@@ -0,0 +1,124 @@
+# watcher.py — flux de modifications du système de fichiers
+# - QFileSystemWatcher sur les dossiers du notebook (chargés dans l'arbre ou connus des index)
+#   et sur la note ouverte
+# - Repli par scrutation (mtime) si le système refuse de surveiller un chemin
+# - Les notifications rapprochées sont regroupées avant d'être émises
+
+import os
+from PyQt6.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+
+COALESCE_MS = 150
+POLL_INTERVAL_MS = 3000
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+class NotebookWatcher(QObject):
+    """Surveille un ensemble de dossiers et de fichiers et émet des changements regroupés."""
+
+    directory_changed = pyqtSignal(str)
+    file_changed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_dir_event)
+        self._watcher.fileChanged.connect(self._on_file_event)
+
+        self._dirs = set()
+        self._files = set()
+        self._polled = {}  # chemin -> (mtime_ns, taille) pour les chemins non surveillables
+
+        self._pending_dirs = set()
+        self._pending_files = set()
+        self._coalesce = QTimer(self)
+        self._coalesce.setSingleShot(True)
+        self._coalesce.setInterval(COALESCE_MS)
+        self._coalesce.timeout.connect(self._emit_pending)
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(POLL_INTERVAL_MS)
+        self._poll_timer.timeout.connect(self._poll)
+
+    # ----------------------------- Abonnements -----------------------------
+
+    def _add(self, path):
+        if not self._watcher.addPath(path):
+            # Limite atteinte (inotify, FSEvents) ou système de fichiers réseau : scrutation
+            self._polled[path] = _stamp(path)
+            if not self._poll_timer.isActive():
+                self._poll_timer.start()
+
+    def _remove(self, path):
+        if path in self._polled:
+            del self._polled[path]
+        else:
+            self._watcher.removePath(path)
+        if not self._polled:
+            self._poll_timer.stop()
+
+    def set_directories(self, paths):
+        """Surveille exactement ces dossiers (diff avec l'ensemble courant).
+
+        Seuls les dossiers nouveaux sont vérifiés sur disque : l'appel reste léger
+        avec plusieurs milliers de dossiers.
+        """
+        paths = {os.path.normpath(p) for p in paths}
+        for path in self._dirs - paths:
+            self._remove(path)
+        added = {p for p in paths - self._dirs if os.path.isdir(p)}
+        for path in added:
+            self._add(path)
+        self._dirs = (self._dirs & paths) | added
+
+    def set_files(self, paths):
+        """Surveille exactement ces fichiers (typiquement : la note ouverte)."""
+        paths = {os.path.normpath(p) for p in paths if p and os.path.isfile(p)}
+        for path in self._files - paths:
+            self._remove(path)
+        for path in paths - self._files:
+            self._add(path)
+        self._files = paths
+
+    def clear(self):
+        self.set_directories(())
+        self.set_files(())
+
+    # ----------------------------- Événements -----------------------------
+
+    def _on_dir_event(self, path):
+        self._pending_dirs.add(os.path.normpath(path))
+        self._coalesce.start()
+
+    def _on_file_event(self, path):
+        path = os.path.normpath(path)
+        self._pending_files.add(path)
+        # Une écriture atomique (remplacement) retire le fichier de la surveillance
+        if path in self._files and path not in self._watcher.files() and path not in self._polled:
+            if os.path.isfile(path):
+                self._add(path)
+        self._coalesce.start()
+
+    def _poll(self):
+        for path, old in list(self._polled.items()):
+            new = _stamp(path)
+            if new != old:
+                self._polled[path] = new
+                if path in self._dirs:
+                    self._on_dir_event(path)
+                else:
+                    self._on_file_event(path)
+
+    def _emit_pending(self):
+        dirs, files = self._pending_dirs, self._pending_files
+        self._pending_dirs, self._pending_files = set(), set()
+        for path in sorted(dirs):
+            self.directory_changed.emit(path)
+        for path in sorted(files):
+            self.file_changed.emit(path)
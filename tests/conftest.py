@@ -0,0 +1,19 @@
+# conftest.py — charge les modules de l'add-on comme paquet « ankinote » (sans __init__ : aqt)
+
+import os, sys, types, importlib
+import pytest
+
+ADDON_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "code of the add-on")
+
+if "ankinote" not in sys.modules:
+    _pkg = types.ModuleType("ankinote")
+    _pkg.__path__ = [ADDON_DIR]
+    sys.modules["ankinote"] = _pkg
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture
+def addon():
+    """addon("storage") -> module ankinote.storage."""
+    return lambda name: importlib.import_module("ankinote." + name)
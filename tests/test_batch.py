@@ -0,0 +1,74 @@
+# test_batch.py — planification et exécution des opérations groupées
+
+import os
+import pytest
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """racine/ a.md, b.md, d/ (c.md, e/ f.md), dest/ a.md"""
+    for rel in ("a.md", "b.md", "d/c.md", "d/e/f.md", "dest/a.md"):
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel, encoding="utf-8")
+    return lambda *parts: str(tmp_path.joinpath(*parts))
+
+
+def test_top_level_drops_duplicates_and_nested_items(addon, tree):
+    batch = addon("batch")
+    paths = [tree("d", "c.md"), tree("d"), tree("d") + os.sep, tree("a.md"), tree("dx")]
+    assert batch.top_level(paths) == [tree("a.md"), tree("d"), tree("dx")]
+
+
+def test_plan_move_skips_no_ops_and_numbers_conflicts(addon, tree):
+    batch = addon("batch")
+    ops = batch.plan_move([tree("a.md"), tree("b.md"), tree("d"), tree("dest", "a.md")], tree("dest"))
+    assert ops == [
+        (tree("a.md"), tree("dest", "a (2).md")),
+        (tree("b.md"), tree("dest", "b.md")),
+        (tree("d"), tree("dest", "d")),
+    ]
+
+
+def test_plan_move_refuses_a_folder_into_itself(addon, tree):
+    batch = addon("batch")
+    assert batch.plan_move([tree("d"), tree("a.md")], tree("d", "e")) == [(tree("a.md"), tree("d", "e", "a.md"))]
+
+
+def test_plan_rename_keeps_extensions_and_numbers_in_name_order(addon, tree):
+    batch = addon("batch")
+    ops = batch.plan_rename([tree("b.md"), tree("a.md"), tree("d")], "{n} - {name}", start=1)
+    assert ops == [
+        (tree("a.md"), tree("1 - a.md")),
+        (tree("b.md"), tree("2 - b.md")),
+        (tree("d"), tree("3 - d")),
+    ]
+
+
+def test_plan_rename_to_same_names_avoids_collisions(addon, tree):
+    batch = addon("batch")
+    ops = batch.plan_rename([tree("a.md"), tree("b.md")], "note")
+    assert ops == [(tree("a.md"), tree("note.md")), (tree("b.md"), tree("note (2).md"))]
+    assert batch.plan_rename([tree("a.md")], "{name}") == []
+
+
+@pytest.mark.parametrize("template", ["", "  ", "a/b", "x:y", "..", ".cache"])
+def test_plan_rename_rejects_invalid_names(addon, tree, template):
+    with pytest.raises(ValueError):
+        addon("batch").plan_rename([tree("a.md")], template)
+
+
+def test_run_moves_stops_when_progress_returns_false(addon, tree):
+    batch = addon("batch")
+    ops = [(tree("a.md"), tree("d", "a.md")), (tree("b.md"), tree("d", "b.md"))]
+    done, failures = batch.run_moves(ops, progress=lambda done, total: False)
+    assert (done, failures) == (ops[:1], [])
+    assert os.path.exists(tree("d", "a.md")) and os.path.exists(tree("b.md"))
+    assert batch.affected_dirs(done) == sorted({tree(), tree("d")})
+
+
+def test_run_deletes_only_top_level_items(addon, tree):
+    batch = addon("batch")
+    done, failures = batch.run_deletes([tree("d", "e", "f.md"), tree("d")])
+    assert done == [tree("d")] and failures == []
+    assert not os.path.exists(tree("d"))
@@ -0,0 +1,89 @@
+# test_cards.py — synchro des cartes contre une collection Anki temporaire (paquet anki)
+
+import os
+import pytest
+
+pytest.importorskip("anki.collection")
+
+NOTE = """# Chapitre
+
+Q: Capitale de la France ?
+A: Paris
+
+Le {{c1::cœur}} pompe le sang.
+"""
+
+
+@pytest.fixture
+def notebook(tmp_path, addon, monkeypatch):
+    cards = addon("cards")
+    monkeypatch.setattr(cards, "load_config", lambda: {})  # pas de config utilisateur
+    root = tmp_path / "notebook"
+    (root / "bio").mkdir(parents=True)
+    (root / "bio" / "coeur.md").write_text(NOTE, encoding="utf-8")
+    addon("storage").open_notebook(str(root))
+    return str(root)
+
+
+@pytest.fixture
+def col(tmp_path):
+    from anki.collection import Collection
+    col = Collection(str(tmp_path / "collection.anki2"))
+    yield col
+    col.close()
+
+
+def _sync(cards, root, col):
+    plan = cards.plan_sync(root)
+    cards.apply_plan(col, plan)
+    return plan
+
+
+def test_first_sync_adds_notes_and_markers(addon, notebook, col):
+    cards = addon("cards")
+    note_path = os.path.join(notebook, "bio", "coeur.md")
+    plan = _sync(cards, notebook, col)
+    assert (plan.added, plan.updated) == (2, 0)
+    assert plan.rewritten == [note_path]
+    assert col.note_count() == 2
+    text = open(note_path, encoding="utf-8").read()
+    assert text.count("<!--card:") == 2
+    assert set(col.decks.all_names()) >= {"Notebook::bio"}
+
+
+def test_resync_is_stable_and_updates_in_place(addon, notebook, col):
+    cards = addon("cards")
+    note_path = os.path.join(notebook, "bio", "coeur.md")
+    _sync(cards, notebook, col)
+    plan = _sync(cards, notebook, col)
+    assert (plan.added, plan.updated, plan.unchanged) == (0, 0, 2)
+
+    text = open(note_path, encoding="utf-8").read().replace("A: Paris", "A: Paris (Île-de-France)")
+    with open(note_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    plan = _sync(cards, notebook, col)
+    assert (plan.added, plan.updated) == (0, 1)
+    assert col.note_count() == 2
+    backs = [col.get_note(nid).fields[1] for nid in col.find_notes("note:Basic")]
+    assert any("Île-de-France" in back for back in backs)
+
+
+def test_removed_block_keeps_note_tagged_orphan(addon, notebook, col):
+    cards = addon("cards")
+    note_path = os.path.join(notebook, "bio", "coeur.md")
+    _sync(cards, notebook, col)
+    lines = open(note_path, encoding="utf-8").read().split("\n")
+    with open(note_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(line for line in lines if "c1::" not in line))
+    plan = _sync(cards, notebook, col)
+    assert len(plan.orphans) == 1
+    assert col.note_count() == 2
+    assert len(col.find_notes(f"tag:{cards.ORPHAN_TAG}")) == 1
+
+
+def test_single_undo_step(addon, notebook, col):
+    cards = addon("cards")
+    _sync(cards, notebook, col)
+    assert col.note_count() == 2
+    col.undo()
+    assert col.note_count() == 0
@@ -0,0 +1,20 @@
+# test_editor_widget.py — éditeur : abonnement aux erreurs de la file d'écriture
+
+import pytest
+
+pytest.importorskip("PyQt6.QtWidgets")
+
+
+def test_destroyed_editor_leaves_save_queue(addon):
+    from PyQt6.QtCore import QCoreApplication, QEvent
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    storage, editor_widget = addon("storage"), addon("editor_widget")
+    before = len(storage.save_queue._error_callbacks)
+
+    editor = editor_widget.NotebookEditor()
+    assert len(storage.save_queue._error_callbacks) == before + 1
+    editor.deleteLater()
+    QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+    app.processEvents()
+    assert len(storage.save_queue._error_callbacks) == before
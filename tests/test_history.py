@@ -0,0 +1,90 @@
+# test_history.py — deltas, élagage et relecture de l'historique des versions
+
+import pytest
+
+HOUR, DAY = 3600, 86400
+
+
+@pytest.mark.parametrize("old, new", [
+    ("", "a\nb\n"),
+    ("a\nb\nc\n", "a\nc\n"),
+    ("a\nb\nc", "x\na\nb\nc\ny"),
+    ("une ligne sans fin", ""),
+    ("a\r\nb\n", "a\r\nB\nb\n"),
+])
+def test_delta_round_trip(addon, old, new):
+    history = addon("history")
+    ops = history.make_delta(old, new)
+    assert history.apply_delta(old, ops) == new
+    assert all(isinstance(op, str) or len(op) == 2 for op in ops)
+
+
+def _versions(*times):
+    return [{"hash": str(i), "time": t, "size": 0} for i, t in enumerate(times)]
+
+
+def test_thin_keeps_everything_from_the_last_hour(addon):
+    now = 100 * DAY
+    versions = _versions(now - 50 * 60, now - 30 * 60, now - 60)
+    assert addon("history").thin_versions(versions, now) == versions
+
+
+def test_thin_keeps_one_version_per_hour_then_per_day(addon):
+    now = 100 * DAY
+    versions = _versions(
+        now - 3 * DAY - 2 * HOUR, now - 3 * DAY - HOUR,              # même jour : une seule
+        now - 5 * HOUR + 60, now - 5 * HOUR + 120, now - 2 * HOUR,   # deux heures distinctes
+        now - 60,
+    )
+    kept = [v["time"] for v in addon("history").thin_versions(versions, now)]
+    assert kept == [now - 3 * DAY - HOUR, now - 5 * HOUR + 120, now - 2 * HOUR, now - 60]
+
+
+def test_thin_drops_versions_older_than_retention_but_keeps_the_latest(addon):
+    history = addon("history")
+    now = 1000 * DAY
+    versions = _versions(now - 500 * DAY, now - 400 * DAY)
+    assert history.thin_versions(versions, now) == versions[-1:]
+
+
+def test_store_reads_back_every_version_through_delta_chains(tmp_path, addon, monkeypatch):
+    history = addon("history")
+    monkeypatch.setattr(history, "KEYFRAME_EVERY", 3)
+    store = history.HistoryStore(str(tmp_path))
+    note = str(tmp_path / "n.md")
+    contents = ["".join(f"ligne {j}\n" for j in range(40 + i)) for i in range(7)]
+    for i, content in enumerate(contents):
+        assert store.snapshot(note, content, when=i)
+    assert not store.snapshot(note, contents[-1], when=10)
+
+    versions = store.versions(note)
+    assert [store.read_version(note, v["hash"]) for v in versions] == contents
+    depths = [store._log(store._note_id(note))["objects"][v["hash"]][1] for v in versions]
+    assert max(depths) < 3 and depths[0] == 0
+
+
+def test_prune_keeps_remaining_versions_readable(tmp_path, addon):
+    history = addon("history")
+    store = history.HistoryStore(str(tmp_path))
+    note = str(tmp_path / "n.md")
+    now = 100 * DAY
+    contents = {}
+    for i in range(6):
+        when = now - 10 * DAY + i * 60  # six versions la même heure : une seule conservée
+        contents[when] = "".join(f"ligne {j}\n" for j in range(30)) + f"version {i}\n"
+        store.snapshot(note, contents[when], when=when)
+    store.snapshot(note, contents[when] + "fin\n", when=now)
+
+    versions = store.versions(note)
+    assert len(versions) == 2
+    assert store.read_version(note, versions[0]["hash"]) == contents[now - 10 * DAY + 5 * 60]
+    assert store.read_version(note, versions[1]["hash"]).endswith("version 5\nfin\n")
+
+
+def test_rename_moves_history_with_the_folder(tmp_path, addon):
+    store = addon("history").HistoryStore(str(tmp_path))
+    old, new = str(tmp_path / "a" / "n.md"), str(tmp_path / "b" / "n.md")
+    store.snapshot(old, "contenu", when=0)
+    store.rename(str(tmp_path / "a"), str(tmp_path / "b"))
+    assert store.versions(old) == []
+    assert store.read_version(new, store.versions(new)[0]["hash"]) == "contenu"
@@ -0,0 +1,63 @@
+# test_index_catch_up.py — modifications faites pendant la validation initiale des index
+
+import os
+import pytest
+
+
+def _write(root, rel, text=""):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def _edit_during(monkeypatch, cls, method, root, storage):
+    """Pendant cls.method (validation en cours), une note est créée et une autre déplacée."""
+    original = getattr(cls, method)
+
+    def patched(self, *args, **kwargs):
+        result = original(self, *args, **kwargs)
+        storage.save_markdown(str(root / "late.md"), "zebrafish")
+        storage.rename_path(str(root / "a" / "old.md"), str(root / "b" / "old.md"))
+        return result
+    monkeypatch.setattr(cls, method, patched)
+
+
+def test_search_index_replays_changes_made_while_validating(tmp_path, addon, monkeypatch):
+    storage, search_index = addon("storage"), addon("search_index")
+    root = tmp_path / "notebook"
+    _write(root, "a/old.md", "okapi")
+    (root / "b").mkdir()
+    storage.open_notebook(str(root))
+    _edit_during(monkeypatch, search_index.NotebookIndex, "refresh", root, storage)
+
+    index = search_index.get_index(str(root))
+    assert [h.path for h in index.search("zebrafish")] == [str(root / "late.md")]
+    assert [h.path for h in index.search("okapi")] == [str(root / "b" / "old.md")]
+
+
+def test_link_index_replays_changes_made_while_validating(tmp_path, addon, monkeypatch):
+    storage, links = addon("storage"), addon("links")
+    root = tmp_path / "notebook"
+    _write(root, "a/old.md")
+    (root / "b").mkdir()
+    storage.open_notebook(str(root))
+    _edit_during(monkeypatch, links.LinkIndex, "refresh", root, storage)
+
+    index = links.get_link_index(str(root))
+    assert index.resolve("late") == str(root / "late.md")
+    assert index.resolve("old") == str(root / "b" / "old.md")
+
+
+def test_path_index_replays_changes_made_while_building(tmp_path, addon, monkeypatch):
+    pytest.importorskip("PyQt6")
+    storage, quick_open = addon("storage"), addon("quick_open")
+    root = tmp_path / "notebook"
+    _write(root, "a/old.md")
+    (root / "b").mkdir()
+    storage.open_notebook(str(root))
+    _edit_during(monkeypatch, quick_open.PathIndex, "build", root, storage)
+
+    index = quick_open.get_path_index(str(root))
+    paths = {os.path.relpath(p, root) for p in index.query("", limit=10)}
+    assert paths == {"late.md", os.path.join("b", "old.md")}
@@ -0,0 +1,90 @@
+# test_journal.py — rejeu du journal des modifications et reprise après un arrêt brutal
+
+import os
+
+
+def _crash(journal):
+    """Arrêt brutal : le fichier reste sur disque, la session oublie le journal."""
+    journal._close_file()
+    journal._forget()
+
+
+def _open(tmp_path, addon, text):
+    storage, journal = addon("storage"), addon("journal")
+    root = tmp_path / "notebook"
+    root.mkdir()
+    note = root / "n.md"
+    note.write_text(text, encoding="utf-8")
+    storage.open_notebook(str(root))
+    base = addon("history").content_hash(text)
+    return str(root), str(note), journal.NoteJournal(str(note), base)
+
+
+def test_replay_uses_utf16_positions(addon):
+    replay = addon("journal").replay
+    assert replay("a😀b", [[3, 1, "c"]]) == "a😀c"
+    assert replay("abc", [[1, 1, "XY"], [0, 0, ">"]]) == ">aXYc"
+    assert replay("abc", [[10, 5, "!"], [-2, 0, "<"]]) == "<abc!"
+
+
+def test_unsaved_edits_are_recovered_once(tmp_path, addon):
+    journal = addon("journal")
+    root, note, j = _open(tmp_path, addon, "bonjour")
+    j.append(7, 0, " le monde")
+    j.append(0, 1, "B")
+    _crash(j)
+
+    recoveries = journal.pending_recoveries(root)
+    assert [(r.path, r.content) for r in recoveries] == [(note, "Bonjour le monde")]
+    assert recoveries[0].apply()
+    assert open(note, encoding="utf-8").read() == "Bonjour le monde"
+    assert journal.pending_recoveries(root) == []
+
+
+def test_confirmed_save_compacts_earlier_segments(tmp_path, addon):
+    storage, journal, history = addon("storage"), addon("journal"), addon("history")
+    root, note, j = _open(tmp_path, addon, "v1")
+    j.append(2, 0, "+")
+    j.rotate(history.content_hash("v1+"))
+    assert storage.save_markdown(note, "v1+")
+    j.append(3, 0, "!")
+    _crash(j)
+
+    files = os.listdir(os.path.join(root, journal.JOURNAL_DIR))
+    assert files == [f"{j.id}.1.log"]
+    assert [r.content for r in journal.pending_recoveries(root)] == ["v1+!"]
+
+
+def test_journal_matching_the_note_is_discarded(tmp_path, addon):
+    journal = addon("journal")
+    root, note, j = _open(tmp_path, addon, "abc")
+    j.append(3, 0, "d")
+    _crash(j)
+    with open(note, "w", encoding="utf-8") as f:
+        f.write("abcd")  # la note avait été écrite juste avant l'arrêt
+    assert journal.pending_recoveries(root) == []
+    assert os.listdir(os.path.join(root, journal.JOURNAL_DIR)) == []
+
+
+def test_truncated_last_line_and_rename_are_handled(tmp_path, addon):
+    storage, journal = addon("storage"), addon("journal")
+    root, note, j = _open(tmp_path, addon, "x")
+    j.append(1, 0, "y")
+    moved = os.path.join(root, "m.md")
+    storage.rename_path(note, moved)
+    j.moved(moved)
+    j.append(2, 0, "z")
+    _crash(j)
+    segment = os.path.join(root, journal.JOURNAL_DIR, f"{j.id}.0.log")
+    with open(segment, "a", encoding="utf-8") as f:
+        f.write('[3, 0, "interrompu')
+
+    assert [(r.path, r.content) for r in journal.pending_recoveries(root)] == [(moved, "xyz")]
+
+
+def test_closed_journal_without_edits_leaves_nothing(tmp_path, addon):
+    journal = addon("journal")
+    root, note, j = _open(tmp_path, addon, "abc")
+    j.close()
+    assert not os.path.exists(os.path.join(root, journal.JOURNAL_DIR))
+    assert j.id not in journal._journals
@@ -0,0 +1,28 @@
+# test_links.py — réécriture des liens entrants après un renommage
+
+
+def _write(root, rel, text):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_rewrite_only_links_that_resolved_to_the_renamed_note(tmp_path, addon):
+    storage, links = addon("storage"), addon("links")
+    root = tmp_path / "notebook"
+    source = _write(root, "b/S.md", "[[Target]] · [[a/Target#h|x]]")
+    _write(root, "b/Target.md", "")
+    old = _write(root, "a/Target.md", "moi : [[Target]]")
+    storage.open_notebook(str(root))
+    index = links.get_link_index(str(root))
+
+    inbound = index.backlinks(old)
+    new = str(root / "a" / "Goal.md")
+    storage.rename_path(old, new)
+    links.rewrite_links(inbound, old, new, str(root))
+
+    # [[Target]] depuis b/ visait sa voisine b/Target : inchangé
+    assert (root / "b" / "S.md").read_text(encoding="utf-8") == "[[Target]] · [[a/Goal#h|x]]"
+    assert (root / "a" / "Goal.md").read_text(encoding="utf-8") == "moi : [[Goal]]"
+    assert index.resolve("Target", source) == str(root / "b" / "Target.md")
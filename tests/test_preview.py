@@ -0,0 +1,13 @@
+# test_preview.py — page complète de l'aperçu (QtWebEngine)
+
+import pytest
+
+pytest.importorskip("PyQt6.QtWidgets")
+
+
+def test_render_page_keeps_css_and_body(addon):
+    preview = addon("preview")
+    page = preview.render_page("<p>100% <b>ok</b> {x}</p>")
+    assert "max-width: 100%;" in page
+    assert '<div id="root"><p>100% <b>ok</b> {x}</p></div>' in page
+    assert "{body}" not in page
@@ -0,0 +1,99 @@
+# test_query.py — langage de requête : analyse, portées, évaluation sur des notes
+
+import pytest
+
+
+def _note(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def _matches(query_mod, text, path):
+    return query_mod.Matcher(query_mod.parse(text)).match(path) is not None
+
+
+def test_plain_words_are_simple(addon):
+    query = addon("query")
+    assert query.parse("alpha beta").is_simple()
+    for text in ("alpha OR beta", "-alpha", '"alpha beta"', "name:alpha", "alpha in:cours", "alpha case:on", ""):
+        assert not query.parse(text).is_simple(), text
+
+
+def test_parse_builds_boolean_tree(addon):
+    q = addon("query").parse("a (b | c) NOT d")
+    assert [t.text for t in q.terms] == ["a", "b", "c", "d"]
+    assert q.expr == ("and", [("term", 0), ("or", [("term", 1), ("term", 2)]), ("not", ("term", 3))])
+    assert q.positive_terms() == [0, 1, 2]
+
+
+def test_unbalanced_input_never_fails(addon):
+    q = addon("query").parse('(a "b c')
+    assert [(t.kind, t.text) for t in q.terms] == [("word", "a"), ("phrase", "b c")]
+    q = addon("query").parse("a ) b")
+    assert [t.text for t in q.terms] == ["a", "b"]
+
+
+def test_scopes_and_exclusions(addon):
+    q = addon("query").parse(r"x in:Cours\ -in:cours/old/")
+    assert q.scopes == ["Cours"] and q.excluded == ["cours/old"]
+    assert q.in_scope("cours/a.md")
+    assert not q.in_scope("cours/old/a.md")
+    assert not q.in_scope("autre/a.md")
+    assert addon("query").parse("x in:../etc").scopes == []
+
+
+def test_fields_negation_and_or(tmp_path, addon):
+    query = addon("query")
+    path = _note(tmp_path, "Biologie.md", "La cellule contient un noyau.")
+    assert _matches(query, "name:biologie", path)
+    assert not _matches(query, "content:biologie", path)
+    assert _matches(query, "cellule noyau", path)
+    assert not _matches(query, "cellule -noyau", path)
+    assert _matches(query, "mitochondrie OR noyau", path)
+
+
+def test_phrase_spans_line_breaks_and_case_option(tmp_path, addon):
+    query = addon("query")
+    path = _note(tmp_path, "n.md", "premier\nMot suivant")
+    assert _matches(query, '"premier mot"', path)
+    assert not _matches(query, '"premier mot" case:on', path)
+    assert _matches(query, '"premier Mot" case:yes', path)
+
+
+def test_regex_and_invalid_regex_falls_back_to_text(tmp_path, addon):
+    query = addon("query")
+    path = _note(tmp_path, "n.md", "version 2.10 et [a")
+    assert _matches(query, r"/\d+\.\d+/", path)
+    assert _matches(query, "/[a/", path)
+    assert addon("query").parse("/[a/").terms[0].kind == "regex"
+
+
+def test_match_returns_position_and_excerpt(tmp_path, addon):
+    query = addon("query")
+    path = _note(tmp_path, "n.md", "début\nici le mot cible\n")
+    position, found, excerpt = query.Matcher(query.parse("cible")).match(path)
+    assert (position, found) == (len("début\nici le mot "), "cible")
+    assert excerpt == "début ici le mot cible"
+
+
+def test_windows_cover_text_split_across_chunks(addon, monkeypatch):
+    query = addon("query")
+    monkeypatch.setattr(query, "MATCH_OVERLAP", 8)
+    lines = [f"ligne {i}\n" for i in range(50)]
+    text = "".join(lines)
+    chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+    windows = list(query._windows(chunks))
+    assert all(text[offset:offset + len(part)] == part for offset, part in windows)
+    covered = set()
+    for offset, part in windows:
+        covered.update(range(offset, offset + len(part)))
+    assert covered == set(range(len(text)))
+    assert all(part.endswith("\n") for _, part in windows)
+
+
+@pytest.mark.parametrize("text, expected", [("alpha", True), ("-alpha", False), ("alpha AND gamma", False)])
+def test_word_found_in_note_name(tmp_path, addon, text, expected):
+    query = addon("query")
+    path = _note(tmp_path, "alpha.md", "beta")
+    assert _matches(query, text, path) is expected
@@ -0,0 +1,37 @@
+# test_quick_open.py — fenêtre d'ouverture rapide pendant la construction de l'index
+
+import threading, time
+import pytest
+
+pytest.importorskip("PyQt6.QtWidgets")
+
+
+def test_dialog_opens_before_index_is_built(tmp_path, addon, monkeypatch):
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    storage, quick_open = addon("storage"), addon("quick_open")
+    root = tmp_path / "notebook"
+    root.mkdir()
+    (root / "note.md").write_text("", encoding="utf-8")
+    storage.open_notebook(str(root))
+
+    release = threading.Event()
+    build = quick_open.PathIndex.build
+
+    def slow_build(self):
+        release.wait(5)
+        build(self)
+    monkeypatch.setattr(quick_open.PathIndex, "build", slow_build)
+
+    dialog = quick_open.QuickOpenDialog(None, str(root), lambda path: None)
+    assert dialog.results.count() == 0
+    assert not dialog.status.isHidden()
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while dialog.pending and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    assert dialog.status.isHidden()
+    assert dialog.results.count() == 1
+    dialog.deleteLater()
@@ -0,0 +1,65 @@
+# test_search_index.py — classement BM25 et extraits surlignés de l'index inversé
+
+import os
+
+
+def _index(tmp_path, addon, notes):
+    search_index = addon("search_index")
+    root = tmp_path / "notebook"
+    for rel, text in notes.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+    index = search_index.NotebookIndex(str(root))
+    index.refresh()
+    return index
+
+
+def _ranked(index, text):
+    return [rel for _, rel, _, _, _ in index.rank(text)]
+
+
+def test_analyze_keeps_first_offsets_in_chars_and_bytes(addon):
+    terms, length = addon("search_index").analyze("Été été chaud")
+    assert length == 3
+    assert terms["été"] == [2, 0, 0]
+    assert terms["chaud"] == [1, 8, len("Été été ".encode("utf-8"))]
+
+
+def test_term_frequency_and_length_order_results(tmp_path, addon):
+    index = _index(tmp_path, addon, {
+        "a.md": "okapi okapi okapi zèbre",
+        "b.md": "okapi zèbre zèbre zèbre",
+        "c.md": "okapi " + "remplissage " * 40,
+        "d.md": "rien",
+    })
+    assert _ranked(index, "okapi") == ["a.md", "b.md", "c.md"]
+
+
+def test_every_word_is_required(tmp_path, addon):
+    index = _index(tmp_path, addon, {"a.md": "okapi zèbre", "b.md": "okapi", "c.md": "zèbre"})
+    assert _ranked(index, "okapi zèbre") == ["a.md"]
+
+
+def test_title_and_exact_tokens_outrank_partial_matches(tmp_path, addon):
+    index = _index(tmp_path, addon, {
+        "notes/okapi.md": "un animal",
+        "b.md": "okapi animal",
+        "c.md": "okapis animal",
+    })
+    assert _ranked(index, "okapi") == [os.path.join("notes", "okapi.md"), "b.md", "c.md"]
+
+
+def test_whole_query_in_file_name_is_kept(tmp_path, addon):
+    index = _index(tmp_path, addon, {"cours.md": "sans rapport", "b.md": "cours", "c.md": "autre"})
+    assert _ranked(index, "cours.md")[0] == "cours.md"
+    assert "c.md" not in _ranked(index, "cours.md")
+
+
+def test_snippet_is_escaped_highlighted_and_trimmed(tmp_path, addon):
+    index = _index(tmp_path, addon, {"a.md": "é" * 200 + " <b> la   cible\n ici " + "x" * 300})
+    _, rel, tok, _, byte_off = index.rank("cible")[0]
+    snippet = index.snippet(rel, byte_off, {"cible"}, width=60)
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert "&lt;b&gt; la <b style='background:#fff3a0'>cible</b> ici" in snippet
+    assert index.snippet(rel, None, {"cible"}) == ""
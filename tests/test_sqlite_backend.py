@@ -0,0 +1,91 @@
+# test_sqlite_backend.py — backend SQLite : sous-arbres, casse des chemins, recherche
+
+import pytest
+
+
+def _backend(tmp_path, addon):
+    sqlite_backend = addon("sqlite_backend")
+    root = str(tmp_path / "notebook")
+    return root, sqlite_backend.SQLiteBackend(root)
+
+
+def _notes(backend, root):
+    return sorted(p[len(root) + 1:].replace("\\", "/") for p, _, _ in backend.walk_notes(root))
+
+
+def _make(backend, root, *rels):
+    for rel in rels:
+        parts = rel.split("/")
+        for i in range(1, len(parts)):
+            backend.make_dir("/".join([root] + parts[:i]))
+        backend.write("/".join([root] + parts), f"contenu de {rel}")
+
+
+def test_walk_is_case_sensitive(tmp_path, addon):
+    root, backend = _backend(tmp_path, addon)
+    _make(backend, root, "Foo/a.md", "foo/keep.md")
+    assert sorted(p[len(root) + 1:] for p, _, _ in backend.walk_notes(root + "/Foo")) == ["Foo/a.md"]
+
+
+def test_delete_spares_sibling_with_other_case(tmp_path, addon):
+    root, backend = _backend(tmp_path, addon)
+    _make(backend, root, "Foo/a.md", "foo/keep.md")
+    backend.delete(root + "/Foo")
+    assert backend.stat(root + "/foo/keep.md") is not None
+    assert _notes(backend, root) == ["foo/keep.md"]
+
+
+def test_rename_spares_sibling_with_other_case(tmp_path, addon):
+    root, backend = _backend(tmp_path, addon)
+    _make(backend, root, "Foo/sub/a.md", "foo/keep.md")
+    backend.rename(root + "/Foo", root + "/Bar")
+    assert _notes(backend, root) == ["Bar/sub/a.md", "foo/keep.md"]
+    assert backend.read(root + "/Bar/sub/a.md") == "contenu de Foo/sub/a.md"
+    assert [name for name, _, _ in backend.list_dir(root + "/Bar")] == ["sub"]
+
+
+def test_search_finds_content(tmp_path, addon):
+    root, backend = _backend(tmp_path, addon)
+    _make(backend, root, "cours/biologie.md")
+    backend.write(root + "/cours/biologie.md", "La mitochondrie produit l'énergie.")
+    paths = [row[0] for row in backend.search(["mitochondrie"])]
+    assert paths == [root + "/cours/biologie.md"]
+
+
+def test_write_many_is_all_or_nothing(tmp_path, addon):
+    root, backend = _backend(tmp_path, addon)
+    _make(backend, root, "a.md")
+    failures = backend.write_many([(root + "/b.md", "b"), (root + "/a.md/c.md", "c")])
+    assert [path for path, _ in failures] == [root + "/b.md", root + "/a.md/c.md"]
+    assert backend.stat(root + "/b.md") is None
+
+
+def test_notes_and_folders_keep_their_metadata(tmp_path, addon):
+    root, backend = _backend(tmp_path, addon)
+    backend.write(root + "/x/y/é.md", "été")
+    assert backend.stat(root + "/x/y/é.md")[1:3] == (len("été".encode("utf-8")), False)
+    assert backend.stat(root + "/x/y")[2] is True
+    assert backend.read_bytes(root + "/x/y/é.md", 2, 3) == "té".encode("utf-8")
+    assert backend.make_note(root + "/x/new.md") is True
+    assert backend.make_note(root + "/x/new.md") is False
+    assert [name for name, _, _ in backend.list_dir(root + "/x")] == ["new.md", "y"]
+
+
+def test_rename_refuses_existing_target(tmp_path, addon):
+    root, backend = _backend(tmp_path, addon)
+    _make(backend, root, "a.md", "b.md")
+    with pytest.raises(FileExistsError):
+        backend.rename(root + "/a.md", root + "/b.md")
+    assert backend.read(root + "/a.md") == "contenu de a.md"
+
+
+def test_search_requires_every_word_and_weights_names(tmp_path, addon):
+    root, backend = _backend(tmp_path, addon)
+    backend.write(root + "/okapi.md", "animal zèbre")
+    backend.write(root + "/b.md", "okapi animal")
+    backend.write(root + "/c.md", "okapi seul")
+    paths = [row[0] for row in backend.search(["okapi", "animal"])]
+    if backend.has_fts:
+        assert paths == [root + "/okapi.md", root + "/b.md"]
+    else:
+        assert sorted(paths) == [root + "/b.md", root + "/okapi.md"]
@@ -0,0 +1,31 @@
+# test_storage.py — backend fichiers : déplacement entre deux volumes (EXDEV)
+
+import errno, os
+import pytest
+
+
+@pytest.fixture
+def cross_device(monkeypatch):
+    """os.rename échoue comme entre deux disques ; shutil reste utilisable."""
+    def rename(old, new):
+        raise OSError(errno.EXDEV, os.strerror(errno.EXDEV), old)
+    monkeypatch.setattr(os, "rename", rename)
+
+
+def test_rename_falls_back_to_copy_across_devices(tmp_path, addon, cross_device):
+    backend = addon("storage").FileSystemBackend()
+    (tmp_path / "a" / "sub").mkdir(parents=True)
+    (tmp_path / "a" / "sub" / "note.md").write_text("contenu", encoding="utf-8")
+    backend.rename(str(tmp_path / "a"), str(tmp_path / "b"))
+    assert not (tmp_path / "a").exists()
+    assert (tmp_path / "b" / "sub" / "note.md").read_text(encoding="utf-8") == "contenu"
+
+
+def test_rename_across_devices_refuses_existing_target(tmp_path, addon, cross_device):
+    backend = addon("storage").FileSystemBackend()
+    (tmp_path / "a.md").write_text("nouveau", encoding="utf-8")
+    (tmp_path / "b.md").write_text("ancien", encoding="utf-8")
+    with pytest.raises(FileExistsError):
+        backend.rename(str(tmp_path / "a.md"), str(tmp_path / "b.md"))
+    assert (tmp_path / "b.md").read_text(encoding="utf-8") == "ancien"
+    assert (tmp_path / "a.md").exists()